@@ -6,16 +6,25 @@ import time
 
 app = Flask(__name__)
 
-def run_script(script_name):
+# Every bot reads through one local gateway: shared cache, batching and rate budget
+GATEWAY_URL = f"http://127.0.0.1:{os.environ.get('MEV_GATEWAY_PORT', '8547')}"
+
+def run_script(script_name, env=None):
     """Run a Python script in the background."""
     print(f"🚀 Starting {script_name}...")
-    subprocess.Popen(["python3", script_name])
+    subprocess.Popen(["python3", script_name], env=env)
 
 # Start MEV Bots in separate threads to not block Flask
 def start_bots():
     time.sleep(5)  # Wait for Flask to stabilize
-    run_script("mev_bot/radar.py")
-    run_script("mev_bot/gorilla_bot.py")
+    run_script("mev_bot/rpc_gateway.py")
+    # Bots start only once the gateway answers eth_blockNumber
+    if subprocess.run(["python3", "mev_bot/rpc_gateway.py", "--wait"]).returncode:
+        print("⚠️ RPC gateway not answering; bots not started")
+        return
+    bot_env = dict(os.environ, MEV_RPC_URLS=GATEWAY_URL)
+    run_script("mev_bot/radar.py", bot_env)
+    run_script("mev_bot/gorilla_bot.py", bot_env)
 
 # Launch the bots when the app starts
 threading.Thread(target=start_bots, daemon=True).start()
@@ -0,0 +1,219 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         JSON-RPC RECORD / REPLAY STAND-IN            ║
+║         Offline benchmarks for the bots              ║
+╚══════════════════════════════════════════════════════╝
+
+record: a local proxy in front of a real node. It forwards every request
+(single or batch) and appends each request/response pair to a .jsonl
+capture, stamped with the seconds since recording started.
+
+replay: serves a capture back on the recorded timeline. A request gets the
+latest recorded answer for the same (method, params) at the same offset into
+the run, so heads, logs and pool state move as they did live. When the
+capture runs out, the chain stands still at its last answers. It does not
+loop, because a loop would send block numbers backwards and block-driven
+bots ignore anything at or below the head they have seen. Latency, jitter and 429s can be injected.
+eth_sendRawTransaction is answered with the tx hash, and the time since the
+newest head was served is recorded as the bot's tick-to-trade latency.
+
+    python3 benchmark/rpc_replay.py record --upstream https://mainnet.base.org --out base.jsonl
+    python3 benchmark/rpc_replay.py replay --capture base.jsonl --latency-ms 40 --jitter-ms 15 --p429 0.02
+    MEV_RPC_URLS=http://127.0.0.1:8545 WS_RPC_URL= python3 mev_bot/gorilla_bot.py
+
+GET /stats on the replay server returns the counters as JSON.
+"""
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from web3 import Web3
+
+HEAD_METHODS = ('eth_blockNumber', 'eth_getBlockByNumber')
+
+
+def request_key(method, params):
+    return method + json.dumps(params or [], sort_keys=True)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else None
+
+
+# ───────────────────────── RECORD ─────────────────────────
+class Recorder:
+    def __init__(self, upstream, out_path, timeout=10):
+        self.upstream = upstream
+        self.session = requests.Session()
+        self.timeout = timeout
+        self.out = open(out_path, 'a')
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.recorded = 0
+
+    def forward(self, body):
+        resp = self.session.post(self.upstream, json=body, timeout=self.timeout)
+        reply = resp.json()
+        t = time.monotonic() - self.start
+        by_id = {r.get('id'): r for r in (reply if isinstance(reply, list) else [reply]) if isinstance(r, dict)}
+        with self.lock:
+            for req in (body if isinstance(body, list) else [body]):
+                res = by_id.get(req.get('id'), {})
+                if 'result' not in res: continue  # throttles / upstream errors are not replayed
+                self.out.write(json.dumps({'t': round(t, 4), 'method': req['method'],
+                                           'params': req.get('params', []), 'result': res['result']}) + '\n')
+                self.recorded += 1
+            self.out.flush()
+        return resp.status_code, reply
+
+
+# ───────────────────────── REPLAY ─────────────────────────
+class Replayer:
+    def __init__(self, capture_path, latency_ms=0.0, jitter_ms=0.0, p429=0.0, speed=1.0):
+        self.timeline = defaultdict(lambda: ([], []))  # key -> (times, results)
+        duration = 0.0
+        with open(capture_path) as f:
+            for line in f:
+                if not line.strip(): continue
+                e = json.loads(line)
+                times, results = self.timeline[request_key(e['method'], e['params'])]
+                times.append(e['t'])
+                results.append(e['result'])
+                duration = max(duration, e['t'])
+        self.duration = duration or 1.0
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.p429 = p429
+        self.speed = speed
+        self.start = time.monotonic()
+        self.lock = threading.Lock()
+        self.head = 0
+        self.head_served_at = None
+        self.counters = defaultdict(int)
+        self.tick_to_trade = []
+
+    def _now(self):
+        return min((time.monotonic() - self.start) * self.speed, self.duration)
+
+    def answer(self, req):
+        method, params = req.get('method'), req.get('params', [])
+        self.counters[method] += 1
+        if method == 'eth_sendRawTransaction':
+            with self.lock:
+                if self.head_served_at is not None:
+                    self.tick_to_trade.append(time.monotonic() - self.head_served_at)
+            return {'result': Web3.to_hex(Web3.keccak(hexstr=params[0]))}
+        if method == 'eth_chainId':
+            return {'result': '0x2105'}
+        entry = self.timeline.get(request_key(method, params))
+        if entry is None:
+            self.counters['misses'] += 1
+            return {'error': {'code': -32000, 'message': f'not in capture: {method}'}}
+        times, results = entry
+        result = results[max(0, bisect.bisect_right(times, self._now()) - 1)]
+        if method in HEAD_METHODS:
+            self._see_head(result)
+        return {'result': result}
+
+    def _see_head(self, result):
+        number = result.get('number') if isinstance(result, dict) else result
+        if not number: return
+        n = int(number, 16)
+        with self.lock:
+            if n > self.head:
+                self.head, self.head_served_at = n, time.monotonic()
+
+    def handle(self, body):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.p429 and random.random() < self.p429:
+            self.counters['injected_429'] += 1
+            return 429, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32005, 'message': 'rate limit exceeded'}}
+        def one(req):
+            return dict(self.answer(req), jsonrpc='2.0', id=req.get('id'))
+        return 200, [one(r) for r in body] if isinstance(body, list) else one(body)
+
+    def stats(self):
+        with self.lock:
+            ttt = list(self.tick_to_trade)
+        return {'requests': dict(self.counters), 'head': self.head, 'trades': len(ttt),
+                'capture_ended': self._now() >= self.duration,
+                'tick_to_trade_ms': {p: (percentile(ttt, q) or 0) * 1000 for p, q in (('p50', 0.5), ('p99', 0.99))}}
+
+
+# ───────────────────────── HTTP ─────────────────────────
+def serve(backend, host, port):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like a real node
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, obj):
+            data = json.dumps(obj).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            try:
+                status, reply = backend.handle(body) if isinstance(backend, Replayer) else backend.forward(body)
+                self._send(status, reply)
+            except Exception as e:
+                self._send(502, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32603, 'message': str(e)}})
+
+        def do_GET(self):
+            if isinstance(backend, Replayer):
+                self._send(200, backend.stats())
+            else:
+                self._send(200, {'recorded': backend.recorded})
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON-RPC record / replay stand-in")
+    sub = ap.add_subparsers(dest='mode', required=True)
+    rec = sub.add_parser('record')
+    rec.add_argument('--upstream', required=True)
+    rec.add_argument('--out', required=True)
+    rep = sub.add_parser('replay')
+    rep.add_argument('--capture', required=True)
+    rep.add_argument('--latency-ms', type=float, default=0.0)
+    rep.add_argument('--jitter-ms', type=float, default=0.0)
+    rep.add_argument('--p429', type=float, default=0.0, help='fraction of requests answered with HTTP 429')
+    rep.add_argument('--speed', type=float, default=1.0, help='timeline playback speed')
+    for p in (rec, rep):
+        p.add_argument('--host', default='127.0.0.1')
+        p.add_argument('--port', type=int, default=8545)
+    args = ap.parse_args()
+
+    if args.mode == 'record':
+        backend = Recorder(args.upstream, args.out)
+        print(f"⏺  Recording {args.upstream} -> {args.out} on http://{args.host}:{args.port}")
+    else:
+        backend = Replayer(args.capture, args.latency_ms, args.jitter_ms, args.p429, args.speed)
+        print(f"▶  Replaying {args.capture} ({len(backend.timeline)} distinct requests, "
+              f"{backend.duration:.0f}s, then held at the end) on http://{args.host}:{args.port}")
+    server = serve(backend, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if isinstance(backend, Replayer):
+            print(json.dumps(backend.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
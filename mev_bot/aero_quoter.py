@@ -0,0 +1,177 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         AERODROME V2 LOCAL QUOTER                    ║
+║         Volatile xy=k · Stable x³y+xy³ · pool fees   ║
+╚══════════════════════════════════════════════════════╝
+
+Integer port of Aerodrome Pool.getAmountOut for both pool types. The pool's
+own fee comes from PoolFactory.getFee(pool, stable), in basis points, so
+custom fees are included. Per-pool metadata (decimals, stable flag, tokens,
+fee) is batch-loaded with two Multicall3 calls and cached. Reserves come
+from the caller or from a PoolStateEngine kept current by Sync events. A
+quote for any size then costs no RPC and matches the router's getAmountsOut
+to the wei.
+"""
+import time
+from web3 import Web3
+import eth_abi
+from multicall import selector, aggregate3, aggregate3_async
+
+E18     = 10 ** 18
+FEE_BPS = 10_000
+FEE_TTL = 600   # seconds before a pool's fee is read again (factories can change them)
+
+SEL_METADATA = selector("metadata()")
+SEL_FACTORY  = selector("factory()")
+
+
+def sel_get_fee(pool, stable):
+    return selector("getFee(address,bool)") + eth_abi.encode(['address', 'bool'], [pool, stable])
+
+
+# ───────────────────────── CURVE MATH ─────────────────────────
+def _k(x, y, meta):
+    """Pool._k: invariant from raw reserves (stable pools normalise to 18 decimals)."""
+    if not meta['stable']:
+        return x * y
+    _x = x * E18 // meta['dec0']
+    _y = y * E18 // meta['dec1']
+    _a = _x * _y // E18
+    _b = _x * _x // E18 + _y * _y // E18
+    return _a * _b // E18
+
+
+def _f(x0, y):
+    _a = x0 * y // E18
+    _b = x0 * x0 // E18 + y * y // E18
+    return _a * _b // E18
+
+
+def _d(x0, y):
+    return 3 * x0 * (y * y // E18) // E18 + (x0 * x0 // E18) * x0 // E18
+
+
+def _get_y(x0, xy, y, meta):
+    """Pool._get_y: Newton steps on x0 * y * (x0² + y²) = xy, with the contract's exact rounding exits."""
+    for _ in range(255):
+        k = _f(x0, y)
+        if k < xy:
+            dy = (xy - k) * E18 // _d(x0, y)
+            if dy == 0:
+                if k == xy:
+                    return y
+                # The contract calls _k (decimal-scaling) here, not _f; mirrored as-is
+                if _k(x0, y + 1, meta) > xy:
+                    return y + 1
+                dy = 1
+            y += dy
+        else:
+            dy = (k - xy) * E18 // _d(x0, y)
+            if dy == 0:
+                if k == xy or _f(x0, y - 1) < xy:
+                    return y
+                dy = 1
+            y -= dy
+    raise ValueError("!y")
+
+
+def get_amount_out(amount_in, token0_in, reserve0, reserve1, meta):
+    """Pool.getAmountOut: fee first, then the volatile or stable curve."""
+    amount_in -= amount_in * meta['fee'] // FEE_BPS
+    if not meta['stable']:
+        r_in, r_out = (reserve0, reserve1) if token0_in else (reserve1, reserve0)
+        return amount_in * r_out // (r_in + amount_in)
+    xy = _k(reserve0, reserve1, meta)
+    r0, r1 = reserve0 * E18 // meta['dec0'], reserve1 * E18 // meta['dec1']
+    r_in, r_out = (r0, r1) if token0_in else (r1, r0)
+    dec_in, dec_out = (meta['dec0'], meta['dec1']) if token0_in else (meta['dec1'], meta['dec0'])
+    amount_in = amount_in * E18 // dec_in
+    y = r_out - _get_y(amount_in + r_in, xy, r_out, meta)
+    return y * dec_out // E18
+
+
+def price_x128(reserve0, reserve1, base_is_token0, meta):
+    """
+    Marginal raw price of base in quote as Q128. Volatile pools use the reserve
+    ratio; stable pools use the slope of x³y + xy³ = k, (3x²y + y³) / (x³ + 3xy²).
+    """
+    if not reserve0 or not reserve1:
+        return 0
+    if not meta['stable']:
+        r_base, r_quote = (reserve0, reserve1) if base_is_token0 else (reserve1, reserve0)
+        return (r_quote << 128) // r_base
+    x, y = reserve0 * E18 // meta['dec0'], reserve1 * E18 // meta['dec1']
+    num = (3 * x * x * y + y ** 3) * meta['dec1']   # token0 priced in token1, raw units
+    den = (x ** 3 + 3 * x * y * y) * meta['dec0']
+    return (num << 128) // den if base_is_token0 else (den << 128) // num
+
+
+# ───────────────────────── METADATA CACHE ─────────────────────────
+class AeroQuoter:
+    def __init__(self, fee_ttl=FEE_TTL):
+        self.fee_ttl = fee_ttl
+        self.meta = {}   # pool -> {'stable', 'dec0', 'dec1', 'token0', 'token1', 'factory', 'fee', 'loaded_at'}
+
+    def missing(self, pools):
+        now = time.time()
+        return [p.lower() for p in pools
+                if p.lower() not in self.meta or now - self.meta[p.lower()]['loaded_at'] > self.fee_ttl]
+
+    def _meta_calls(self, pools):
+        calls = []
+        for pool in pools:
+            target = Web3.to_checksum_address(pool)
+            calls += [(target, True, SEL_METADATA), (target, True, SEL_FACTORY)]
+        return calls
+
+    def _decode_meta(self, pools, results):
+        found = {}
+        for n, pool in enumerate(pools):
+            (ok_m, md), (ok_f, fac) = results[2 * n], results[2 * n + 1]
+            if ok_m and ok_f and len(md) >= 224:
+                dec0, dec1, _, _, stable, t0, t1 = eth_abi.decode(
+                    ['uint256', 'uint256', 'uint256', 'uint256', 'bool', 'address', 'address'], md[:224])
+                found[pool] = {'stable': stable, 'dec0': dec0, 'dec1': dec1, 'token0': t0.lower(), 'token1': t1.lower(),
+                               'factory': Web3.to_checksum_address(eth_abi.decode(['address'], fac)[0])}
+        return found
+
+    def _fee_calls(self, found):
+        return [(m['factory'], True, sel_get_fee(Web3.to_checksum_address(p), m['stable'])) for p, m in found.items()]
+
+    def _apply_fees(self, found, results):
+        now = time.time()
+        for (pool, m), (ok, data) in zip(found.items(), results):
+            if ok and len(data) >= 32:
+                self.meta[pool] = dict(m, fee=eth_abi.decode(['uint256'], data)[0], loaded_at=now)
+        return set(found)
+
+    def load(self, w3, pools):
+        """Loads (or refreshes) metadata and fees for pools that are missing or stale."""
+        pools = self.missing(pools)
+        if not pools: return set()
+        found = self._decode_meta(pools, aggregate3(w3, self._meta_calls(pools)))
+        return self._apply_fees(found, aggregate3(w3, self._fee_calls(found))) if found else set()
+
+    async def load_async(self, aw3, pools):
+        pools = self.missing(pools)
+        if not pools: return set()
+        found = self._decode_meta(pools, await aggregate3_async(aw3, self._meta_calls(pools)))
+        return self._apply_fees(found, await aggregate3_async(aw3, self._fee_calls(found))) if found else set()
+
+    # ── quoting ──
+    def amount_out(self, pool, amount_in, token0_in, reserve0, reserve1):
+        meta = self.meta.get(pool.lower())
+        if meta is None or not reserve0 or not reserve1:
+            return None
+        return get_amount_out(amount_in, token0_in, reserve0, reserve1, meta)
+
+    def quote(self, engine, pool, token0_in, amount_in):
+        """Same call shape as v3_sim.quote, with reserves from a PoolStateEngine."""
+        state = engine.state(pool)
+        if not state or 'reserve0' not in state:
+            return None
+        return self.amount_out(pool, amount_in, token0_in, state['reserve0'], state['reserve1'])
+
+    def price_x128(self, pool, reserve0, reserve1, base_is_token0):
+        meta = self.meta.get(pool.lower())
+        return price_x128(reserve0, reserve1, base_is_token0, meta or {'stable': False})
@@ -0,0 +1,189 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         BLOCK-SCOPED READ CACHE                      ║
+║         One answer per (block, method, params)       ║
+╚══════════════════════════════════════════════════════╝
+
+Reads against 'latest' (eth_call, balances, code, gas price, the latest
+block) cannot change until the next block. They are cached under the
+current block number, and the cache is dropped as soon as a newer block is
+seen. A block is seen when the scheduler calls advance(), the pool's probe
+sees a new head, or an eth_blockNumber / latest-block answer passes through.
+Identical requests that are already in flight are merged into one call.
+If no head has been seen for a whole block time, nothing is served from
+memory; in-flight requests are still merged.
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future
+from web3 import Web3, AsyncWeb3
+
+MAX_AGE = 2.0  # Base block time; past this without a head the cache stops serving
+
+# method -> index of its block-tag param (None: no tag, valid for the block)
+CACHEABLE = {
+    'eth_call': 1,
+    'eth_getBalance': 1,
+    'eth_getCode': 1,
+    'eth_getStorageAt': 2,
+    'eth_getBlockByNumber': 0,
+    'eth_gasPrice': None,
+    'eth_maxPriorityFeePerGas': None,
+}
+
+
+class BlockCache:
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self.block = 0
+        self.advanced_at = 0.0
+        self.entries = {}
+        self.inflight = {}    # key -> concurrent Future (threads)
+        self.ainflight = {}   # key -> asyncio Future (event loop)
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'merged': 0, 'blocks': 0}
+
+    def advance(self, block):
+        """Call with every head seen; a newer block drops every cached answer."""
+        with self.lock:
+            if block > self.block:
+                self.block = block
+                self.entries.clear()
+                self.counters['blocks'] += 1
+            if block >= self.block:
+                self.advanced_at = time.monotonic()
+
+    def key(self, method, params):
+        if method not in CACHEABLE:
+            return None
+        i = CACHEABLE[method]
+        params = list(params or [])
+        # Explicit block numbers / 'pending' / 'safe' are left alone; only 'latest' is block-scoped
+        tag = params[i] if i is not None and i < len(params) else 'latest'
+        if tag != 'latest':
+            return None
+        return method + json.dumps(params, sort_keys=True, default=str)
+
+    def _fresh(self):
+        return time.monotonic() - self.advanced_at <= self.max_age
+
+    def _lookup(self, key):
+        with self.lock:
+            if self._fresh() and (self.block, key) in self.entries:
+                self.counters['hits'] += 1
+                return self.entries[(self.block, key)]
+        return None
+
+    def _store(self, key, block, method, resp):
+        result = resp.get('result') if isinstance(resp, dict) else None
+        if result is None:
+            return
+        if method == 'eth_getBlockByNumber' and isinstance(result, dict) and result.get('number'):
+            self.advance(int(result['number'], 16))
+        with self.lock:
+            # Only keep answers that belong to the block that is still current
+            if block == self.block and self._fresh():
+                self.entries[(block, key)] = resp
+
+    def observe(self, method, resp):
+        """Picks up new heads from ordinary eth_blockNumber traffic."""
+        if method == 'eth_blockNumber' and isinstance(resp, dict) and resp.get('result'):
+            self.advance(int(resp['result'], 16))
+
+    # ── threads ──
+    def request(self, method, params, fetch):
+        """Serves fetch() through the cache; fetch returns a JSON-RPC response dict."""
+        key = self.key(method, params)
+        if key is None:
+            resp = fetch()
+            self.observe(method, resp)
+            return resp
+        hit = self._lookup(key)
+        if hit is not None:
+            return hit
+        with self.lock:
+            block = self.block
+            pending = self.inflight.get(key)
+            if pending is None:
+                self.inflight[key] = owner = Future()
+            else:
+                self.counters['merged'] += 1
+        if pending is not None:
+            return pending.result()
+        self.counters['misses'] += 1
+        try:
+            resp = fetch()
+            self._store(key, block, method, resp)
+            owner.set_result(resp)
+            return resp
+        except Exception as e:
+            owner.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    # ── event loop ──
+    async def arequest(self, method, params, fetch):
+        """Async twin of request(); fetch is a coroutine function."""
+        key = self.key(method, params)
+        if key is None:
+            resp = await fetch()
+            self.observe(method, resp)
+            return resp
+        hit = self._lookup(key)
+        if hit is not None:
+            return hit
+        pending = self.ainflight.get(key)
+        if pending is not None:
+            self.counters['merged'] += 1
+            return await asyncio.shield(pending)
+        block = self.block
+        owner = self.ainflight[key] = asyncio.get_running_loop().create_future()
+        self.counters['misses'] += 1
+        try:
+            resp = await fetch()
+            self._store(key, block, method, resp)
+            owner.set_result(resp)
+            return resp
+        except BaseException as e:
+            # Cancellation of the first caller must not strand the merged ones
+            owner.set_exception(e if isinstance(e, Exception) else ConnectionError("request cancelled"))
+            owner.exception()
+            raise
+        finally:
+            self.ainflight.pop(key, None)
+
+    def report(self):
+        with self.lock:
+            return dict(self.counters, block=self.block, entries=len(self.entries))
+
+
+CACHE = BlockCache()  # process-wide: every bot in the process shares it
+
+
+# Mixins: put in front of any provider class to route its requests through the cache
+class CachedRequests:
+    cache = CACHE
+
+    def make_request(self, method, params):
+        parent = super().make_request
+        return self.cache.request(method, params, lambda: parent(method, params))
+
+
+class AsyncCachedRequests:
+    cache = CACHE
+
+    async def make_request(self, method, params):
+        parent = super().make_request
+        return await self.cache.arequest(method, params, lambda: parent(method, params))
+
+
+class CachedHTTPProvider(CachedRequests, Web3.HTTPProvider):
+    pass
+
+
+class CachedAsyncHTTPProvider(AsyncCachedRequests, AsyncWeb3.AsyncHTTPProvider):
+    pass
@@ -0,0 +1,90 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         BLOCK-DRIVEN SCAN SCHEDULER                  ║
+║         newHeads over WebSocket · HTTP poll fallback ║
+╚══════════════════════════════════════════════════════╝
+
+Runs exactly one evaluation pass per new block. Heads come from an
+eth_subscribe("newHeads") WebSocket; if that is unavailable or drops, the
+scheduler polls eth_blockNumber over HTTP until the socket can be re-opened.
+When a newer block lands, a pass still working on the old one is cancelled.
+"""
+import asyncio
+import json
+import time
+
+try:
+    import websockets
+except ImportError:  # HTTP polling still works without it
+    websockets = None
+
+POLL_INTERVAL     = 0.2   # seconds between eth_blockNumber polls (Base blocks are 2 s)
+WS_RETRY_SECONDS  = 30    # how long to poll before trying the WebSocket again
+WS_OPEN_TIMEOUT   = 10
+
+
+class BlockScheduler:
+    def __init__(self, aw3, ws_url=None, poll_interval=POLL_INTERVAL):
+        self.aw3 = aw3
+        self.ws_url = ws_url
+        self.poll_interval = poll_interval
+        self.last_block = 0
+        self.passes = 0
+        self.cancelled = 0
+        self.source = None
+
+    # ── head sources ──
+    async def _ws_heads(self):
+        async with websockets.connect(self.ws_url, open_timeout=WS_OPEN_TIMEOUT) as ws:
+            await ws.send(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads']}))
+            ack = json.loads(await ws.recv())
+            if 'error' in ack:
+                raise ConnectionError(ack['error'])
+            self.source = 'ws'
+            async for raw in ws:
+                head = json.loads(raw).get('params', {}).get('result')
+                if head and 'number' in head:
+                    yield int(head['number'], 16)
+
+    async def _poll_heads(self, seconds=None):
+        self.source = 'poll'
+        stop_at = None if seconds is None else time.monotonic() + seconds
+        while stop_at is None or time.monotonic() < stop_at:
+            try:
+                yield await self.aw3.eth.block_number
+            except Exception:
+                pass
+            await asyncio.sleep(self.poll_interval)
+
+    async def heads(self):
+        """Yields each new block number once, in order, whatever the source."""
+        while True:
+            if self.ws_url and websockets:
+                try:
+                    async for n in self._ws_heads():
+                        if n > self.last_block:
+                            self.last_block = n
+                            yield n
+                except Exception as e:
+                    print(f"newHeads socket lost ({str(e)[:40]}), polling over HTTP")
+            async for n in self._poll_heads(WS_RETRY_SECONDS if self.ws_url and websockets else None):
+                if n > self.last_block:
+                    self.last_block = n
+                    yield n
+
+    # ── dispatch ──
+    async def run(self, on_block):
+        """Calls await on_block(block_number) once per block, cancelling stale passes."""
+        current = None
+        async for block in self.heads():
+            if current and not current.done():
+                current.cancel()
+                self.cancelled += 1
+            self.passes += 1
+            current = asyncio.create_task(on_block(block))
+            current.add_done_callback(_consume)
+
+
+def _consume(task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Block pass failed: {task.exception()}")
@@ -1,5 +1,6 @@
 import requests
 from collections import defaultdict
+from spread_matrix import rank_opportunities
 
 def scan():
     # Looking for top volume tokens on Base
@@ -23,40 +24,28 @@ def scan():
             tokens[addr].append(p)
             
         print('--- HIGH-VOLUME MULTI-DEX TARGETS (BASE) ---')
-        targets = []
+        addrs, groups = [], []
         for addr, p_list in tokens.items():
             dexes = {p.get('dexId') for p in p_list}
             if len(dexes) > 1:
-                name = p_list[0].get('baseToken', {}).get('name')
-                symbol = p_list[0].get('baseToken', {}).get('symbol')
                 max_liq = max(p.get('liquidity', {}).get('usd', 0) for p in p_list)
-                
                 if max_liq > 20000:
-                    prices = {}
-                    for p in p_list:
-                        prices[p.get('dexId')] = float(p.get('priceUsd', 0))
-                    
-                    d_list = list(prices.keys())
-                    max_gap = 0
-                    best_pair = ""
-                    for i in range(len(d_list)):
-                        for j in range(i+1, len(d_list)):
-                            p1, p2 = prices[d_list[i]], prices[d_list[j]]
-                            if p1 > 0 and p2 > 0:
-                                gap = abs(p1 - p2) / min(p1, p2) * 100
-                                if gap > max_gap:
-                                    max_gap = gap
-                                    best_pair = f"{d_list[i]} vs {d_list[j]}"
-
-                    targets.append({
-                        'symbol': symbol,
-                        'gap': max_gap,
-                        'pair': best_pair,
-                        'liq': max_liq,
-                        'addr': addr
-                    })
+                    # One price per DEX (last listing wins, as before)
+                    by_dex = {p.get('dexId'): {'dex': p.get('dexId'), 'price': p.get('priceUsd'), 'liq': max_liq} for p in p_list}
+                    addrs.append(addr)
+                    groups.append(list(by_dex.values()))
 
-        targets.sort(key=lambda x: x['gap'], reverse=True)
+        # Best cheap-DEX / dear-DEX pair for every token in one vectorized pass
+        targets = []
+        for opp in rank_opportunities(groups, fee_key=None):
+            addr = addrs[opp['token']]
+            targets.append({
+                'symbol': tokens[addr][0].get('baseToken', {}).get('symbol'),
+                'gap': opp['spread'],
+                'pair': f"{opp['buy']['dex']} vs {opp['sell']['dex']}",
+                'liq': opp['max_liq'],
+                'addr': addr
+            })
         for t in targets[:15]:
             print(f"{t['symbol']} | Gap: {t['gap']:.2f}% | {t['pair']} | Liq: ${t['liq']:,.0f} | {t['addr']}")
 
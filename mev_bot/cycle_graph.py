@@ -0,0 +1,187 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         NEGATIVE-LOG CYCLE GRAPH                     ║
+║         Every pool an edge · cycles up to 4 hops     ║
+╚══════════════════════════════════════════════════════╝
+
+Tokens are nodes. Each pool adds two directed edges, weighted by
+-log(rate * (1 - fee)). Rates are marginal raw-unit prices, so decimals
+cancel around any cycle. A cycle is profitable at the margin exactly when
+its weights sum to less than zero.
+
+The structure (tokens, pools, fees) is built once and only the weights are
+refreshed from pool state each block. Cycles are enumerated by a bounded DFS
+from source tokens. It is pruned by a k-step Bellman-Ford run backwards
+from the source: back[k][v] is the cheapest way home from v in at most k
+hops, so a branch is cut as soon as it can no longer close below the
+threshold. The search is exact within max_len and only touches branches
+that can still pay.
+
+Weights are mid-price. A cycle found here is a candidate; size it with the
+local quoters (v3_sim, aero_quoter, sizing) before acting on it.
+"""
+import math
+import numpy as np
+from aero_quoter import price_x128 as aero_price_x128
+
+Q96 = 1 << 96
+MAX_LEN = 4
+HUBS = 16    # default sources: the best-connected tokens
+
+# Fallback fees (fraction) when a pool's own fee is not known
+SLIPSTREAM_FEES = {1: 0.0001, 50: 0.0005, 100: 0.0005, 200: 0.003, 2000: 0.01}
+AERO_V2_FEES = {False: 0.003, True: 0.0005}
+
+
+def pool_fee(row, books=None, aero=None, addr=None):
+    """Fee as a fraction from whatever is known: live tick book, Aerodrome factory fee, registry row."""
+    if books and addr in books:
+        return books[addr].fee / 1e6
+    if aero and addr in aero.meta:
+        return aero.meta[addr]['fee'] / 1e4
+    if row.get('fee'):
+        return row['fee'] / 1e6
+    if row.get('dex') == 'slipstream':
+        return SLIPSTREAM_FEES.get(row.get('tick_spacing'), 0.003)
+    return AERO_V2_FEES[bool(row.get('stable'))]
+
+
+def log_price(state, stable_meta=None):
+    """log of the marginal token1-per-token0 raw price; None if the pool is empty."""
+    if 'sqrtPriceX96' in state:
+        sq = state['sqrtPriceX96']
+        return 2 * (math.log(sq) - math.log(Q96)) if sq else None
+    r0, r1 = state.get('reserve0'), state.get('reserve1')
+    if not r0 or not r1:
+        return None
+    if stable_meta and stable_meta.get('stable'):
+        p = aero_price_x128(r0, r1, True, stable_meta)
+        return math.log(p) - 128 * math.log(2) if p else None
+    return math.log(r1) - math.log(r0)
+
+
+class CycleGraph:
+    def __init__(self):
+        self.tokens = []        # node -> token address
+        self.node = {}          # token address -> node
+        self.pools = []         # pool index -> address
+        self.pool_index = {}
+        self.src, self.dst, self.edge_pool, self.fee_log = [], [], [], []
+        self.out = []           # node -> [edge, ...]
+        self.w = np.zeros(0)    # edge weights; grown to match the edge lists on first use
+
+    def _weights(self):
+        if len(self.w) < len(self.src):
+            self.w = np.concatenate([self.w, np.full(len(self.src) - len(self.w), np.inf)])
+        return self.w
+
+    def _node(self, token):
+        token = token.lower()
+        if token not in self.node:
+            self.node[token] = len(self.tokens)
+            self.tokens.append(token)
+            self.out.append([])
+        return self.node[token]
+
+    def add_pool(self, pool, token0, token1, fee):
+        """Two edges: token0 -> token1 (edge 2i) and token1 -> token0 (edge 2i+1)."""
+        pool = pool.lower()
+        if pool in self.pool_index:
+            return
+        a, b = self._node(token0), self._node(token1)
+        self.pool_index[pool] = len(self.pools)
+        self.pools.append(pool)
+        for s, d in ((a, b), (b, a)):
+            self.out[s].append(len(self.src))
+            self.src.append(s)
+            self.dst.append(d)
+            self.edge_pool.append(pool)
+            self.fee_log.append(-math.log1p(-fee))
+
+    def set_log_price(self, pool, log_p):
+        """log(token1 per token0); None disables the pool's edges until it has a price."""
+        i, w = self.pool_index[pool.lower()], self._weights()
+        if log_p is None:
+            w[2 * i] = w[2 * i + 1] = np.inf
+        else:
+            w[2 * i] = -log_p + self.fee_log[2 * i]
+            w[2 * i + 1] = log_p + self.fee_log[2 * i + 1]
+
+    def update(self, states, metas=None):
+        """Refresh weights from {pool: state} (a PoolStateEngine snapshot's 'pools')."""
+        metas = metas or {}
+        for pool, state in states.items():
+            if pool in self.pool_index and state:
+                self.set_log_price(pool, log_price(state, metas.get(pool)))
+
+    # ───────────────────────── SEARCH ─────────────────────────
+    def _back(self, source, max_len, src, dst):
+        """back[k][v]: least weight of a path v -> source with at most k edges."""
+        back = [np.full(len(self.tokens), np.inf)]
+        back[0][source] = 0.0
+        for _ in range(max_len):
+            b = back[-1].copy()
+            with np.errstate(invalid='ignore'):
+                np.minimum.at(b, src, self._weights() + back[-1][dst])
+            back.append(b)
+        return back
+
+    def hubs(self, n=HUBS):
+        return sorted(range(len(self.tokens)), key=lambda v: -len(self.out[v]))[:n]
+
+    def find_cycles(self, sources=None, max_len=MAX_LEN, min_profit=0.0, limit=100):
+        """
+        Cycles through any of `sources` (token addresses; default the HUBS best-connected
+        tokens) with at most max_len hops and mid-price profit above min_profit (fraction).
+        Returns dicts sorted by profit: tokens (closed loop), pools, profit.
+        """
+        if not self.pools:
+            return []
+        starts = self.hubs() if sources is None else [self.node[t.lower()] for t in sources if t.lower() in self.node]
+        bound = -math.log1p(min_profit)
+        w, dst, out = self._weights().tolist(), self.dst, self.out
+        src_a, dst_a = np.asarray(self.src), np.asarray(self.dst)
+        found = {}
+
+        for s in starts:
+            back = [b.tolist() for b in self._back(s, max_len, src_a, dst_a)]
+            stack = [(s, 0.0, (s,), ())]
+            while stack:
+                v, acc, nodes, edges = stack.pop()
+                left = max_len - len(edges) - 1
+                for e in out[v]:
+                    total = acc + w[e]
+                    u = dst[e]
+                    if u == s:
+                        if total < bound and len(edges) >= 1 and self.edge_pool[e] not in (self.edge_pool[x] for x in edges):
+                            cyc = edges + (e,)
+                            i = cyc.index(min(cyc))
+                            found.setdefault(cyc[i:] + cyc[:i], total)
+                    elif left > 0 and u not in nodes and total + back[left][u] < bound:
+                        stack.append((u, total, nodes + (u,), edges + (e,)))
+
+        cycles = []
+        for cyc, total in sorted(found.items(), key=lambda kv: kv[1])[:limit]:
+            cycles.append({
+                'tokens': [self.tokens[self.src[e]] for e in cyc] + [self.tokens[self.src[cyc[0]]]],
+                'pools': [self.edge_pool[e] for e in cyc],
+                'zero_for_one': [e % 2 == 0 for e in cyc],
+                'profit': math.expm1(-total),
+            })
+        return cycles
+
+    def profit(self, cycle):
+        """Mid-price profit of a cycle from find_cycles at the current weights (for re-scoring)."""
+        w = self._weights()
+        total = sum(w[2 * self.pool_index[p] + (not z)] for p, z in zip(cycle['pools'], cycle['zero_for_one']))
+        return math.expm1(-total) if total < np.inf else None
+
+
+def from_registry(registry, pools, books=None, aero=None):
+    """Graph over `pools` (addresses) using token / fee data from a PoolRegistry (or meta_index) row."""
+    g = CycleGraph()
+    for addr in pools:
+        row = registry.pool(addr)
+        if row and row.get('token0') and row.get('token1'):
+            g.add_pool(addr, row['token0'], row['token1'], pool_fee(row, books, aero, addr.lower()))
+    return g
@@ -6,8 +6,16 @@
 ╚══════════════════════════════════════════════════════╝
 """
 from web3 import Web3
-import json, time, os, asyncio, requests, eth_abi
+import json, os, asyncio, requests, eth_abi
 from dotenv import load_dotenv
+from pair_scan import read_pair_prices
+from pool_state import PoolStateEngine
+from rpc_pool import get_pool
+from rpc_router import is_rate_limit
+from meta_index import get_index
+from pool_registry import get_registry
+from volatility import VolatilityEngine
+from gas_model import get_gas_model, route_key, calldata_size, TX_OVERHEAD
 
 load_dotenv()
 load_dotenv("mev_bot/.env")
@@ -19,34 +27,29 @@ TG_TOKEN         = os.getenv("TELEGRAM_BOT_TOKEN")
 TG_CHAT          = os.getenv("TELEGRAM_CHAT_ID")
 
 # ───────────────────────── DYNAMIC CONFIG ─────────────────────────
-MIN_GAP_PERCENT = 0.8  # Default
+MIN_GAP_PERCENT = 0.8  # Default (calm market); each pair slides towards 0.5 as its own volatility rises
 BASE_PRIORITY_FEE = 0.05 # Gwei
 MAX_PRIORITY_FEE = 2.0   # Gwei (for $10+ profit)
+DEFAULT_GAS = 800000     # gas limit until a route has been estimated (then learned, gas_model.json)
 
-# Volatility Tracking
-WETH_PRICE_HISTORY = [] # Stores (timestamp, price)
+# Volatility Tracking: per-pair ring buffers (1m / 5m / 1h), fed from every scan
+VOL = VolatilityEngine()
 VOLATILITY_MODE = False
+AGGRESSIVE_GAP = 0.5
 
 # ───────────────────────── STABLE RPC ROTATION ─────────────────────────
 # Using stable, free-tier primary nodes
-RPC_URLS = [
+# MEV_RPC_URLS (comma-separated) replaces the list, e.g. with benchmark/rpc_replay.py
+RPC_URLS = [u for u in os.getenv("MEV_RPC_URLS", "").split(",") if u] or [
     "https://base-mainnet.g.alchemy.com/v2/USbVaOTSKlqazrRw7rjg2", # Alchemy (Private)
     "https://base.llamarpc.com",                                   # Llama (Reliable)
     "https://1rpc.io/base",                                        # 1RPC (Privacy oriented)
     "https://mainnet.base.org"                                     # Public (Failover)
 ]
-rpc_idx = 0
+POOL = get_pool(RPC_URLS, request_kwargs={'timeout': 8})
 
 def get_w3():
-    global rpc_idx
-    for _ in range(len(RPC_URLS)):
-        url = RPC_URLS[rpc_idx]
-        rpc_idx = (rpc_idx + 1) % len(RPC_URLS)
-        try:
-            w = Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': 8}))
-            if w.is_connected(): return w
-        except: continue
-    return None
+    return POOL.get_w3()
 
 # Rest of the optimized code...
 # [Parallel scanning logic preserved for performance]
@@ -71,95 +74,70 @@ PAIRS = [
     ("WETH", "KEYCAT", "WILD"),
 ]
 
-RESERVES_ABI = [{"inputs":[],"name":"getReserves","outputs":[{"name":"","type":"uint112"},{"name":"","type":"uint112"},{"name":"","type":"uint32"}],"type":"function"},{"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"type":"function"}]
-V3_POOL_ABI = [{"inputs":[],"name":"slot0","outputs":[{"name":"sqrtPriceX96","type":"uint160"},{"name":"tick","type":"int24"},{"name":"","type":"uint16"},{"name":"","type":"uint16"},{"name":"","type":"uint16"},{"name":"","type":"uint8"},{"name":"","type":"bool"}],"type":"function"},{"inputs":[],"name":"token0","outputs":[{"name":"token","type":"address"}],"type":"function"}]
-ERC20_ABI = [{"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"type":"function"}]
 EXEC_ABI = [{"inputs":[{"name":"asset","type":"address"},{"name":"amount","type":"uint256"},{"name":"params","type":"bytes"}],"name":"execute","outputs":[],"type":"function"}]
 
-DEC_CACHE = {}
+# Decimals, getPool answers and token0 are persisted across restarts (meta_index.db)
+INDEX = get_index()
+DEC_CACHE = INDEX.decimals_view()
+POOL_CACHE = INDEX.pool_cache_view()  # (dex, tokenA, tokenB[, fee]) -> pool_address, ("token0", pool) -> token0
+ENGINE = PoolStateEngine()  # reserves / slot0 kept current from Sync & Swap logs
+REGISTRY = get_registry().follow(POOL.get_w3)  # every Base pool from factory events; no getPool once caught up
+GAS = get_gas_model()
+UNI_FEES = [500, 3000, 10000]
 
 def get_dec(addr, w3):
-    if addr not in DEC_CACHE: DEC_CACHE[addr] = w3.eth.contract(address=addr, abi=ERC20_ABI).functions.decimals().call()
-    return DEC_CACHE[addr]
+    return INDEX.decimals(w3, addr)
+
+def eth_per_token(token, prices):
+    # WETH for one whole token, off this pass's prices; None when no WETH pair was read
+    weth = Web3.to_checksum_address(TOKENS["WETH"])
+    if token == weth: return 1.0
+    p = prices.get((token, weth)) or {}
+    if p.get('aero'): return p['aero']
+    p = prices.get((weth, token)) or {}
+    if p.get('aero'): return 1 / p['aero']
+    return None
 
-def get_aero_price(token_a, token_b, w3):
-    try:
-        f = w3.eth.contract(address="0x420DD381b31aEf6683db6B902084cB0FFECe40Da", abi=[{"inputs":[{"name":"tA","type":"address"},{"name":"tB","type":"address"},{"name":"s","type":"bool"}],"name":"getPool","outputs":[{"name":"","type":"address"}],"type":"function"}])
-        pa = f.functions.getPool(token_a, token_b, False).call()
-        if int(pa, 16) == 0: return None
-        pool = w3.eth.contract(address=pa, abi=RESERVES_ABI)
-        res = pool.functions.getReserves().call()
-        t0 = pool.functions.token0().call()
-        da, db = get_dec(token_a, w3), get_dec(token_b, w3)
-        ra, rb = (res[0], res[1]) if t0.lower() == token_a.lower() else (res[1], res[0])
-        return (rb / 10**db) / (ra / 10**da)
-    except: return None
-
-def get_uni_price(token_a, token_b, w3):
-    for f in [500, 3000, 10000]:
-        try:
-            fac = w3.eth.contract(address="0x33128a8fC17869897dcE68Ed026d694621f6FDfD", abi=[{"inputs":[{"name":"tA","type":"address"},{"name":"tB","type":"address"},{"name":"f","type":"uint24"}],"name":"getPool","outputs":[{"name":"","type":"address"}],"type":"function"}])
-            pa = fac.functions.getPool(token_a, token_b, f).call()
-            if int(pa, 16) == 0: continue
-            pool = w3.eth.contract(address=pa, abi=V3_POOL_ABI)
-            sq = pool.functions.slot0().call()[0]
-            if sq == 0: continue
-            da, db = get_dec(token_a, w3), get_dec(token_b, w3)
-            pr = (sq / (2**96)) ** 2
-            try: t0 = pool.functions.token0().call()
-            except: t0 = pool.functions.token().call() # Fallback for some ABIs
-            p = pr*(10**da)/(10**db) if t0.lower()==token_a.lower() else (1.0/pr)*(10**db)/(10**da)
-            return p, f
-        except: continue
-    return None, None
+def min_gap(n1, n2):
+    return VOL.min_gap((n1, n2), MIN_GAP_PERCENT, AGGRESSIVE_GAP)
 
 async def check_volatility(w3):
-    global MIN_GAP_PERCENT, VOLATILITY_MODE
+    # Market-wide mode alert off WETH/USDC; the gaps themselves are per pair (min_gap)
+    global VOLATILITY_MODE
     try:
-        current_price = get_aero_price(TOKENS["WETH"], TOKENS["USDC"], w3)
-        if not current_price: return
-        now = time.time()
-        WETH_PRICE_HISTORY.append((now, current_price))
-        
-        # Keep only last 1 hour of history
-        one_hour_ago = now - 3600
-        while WETH_PRICE_HISTORY and WETH_PRICE_HISTORY[0][0] < one_hour_ago:
-            WETH_PRICE_HISTORY.pop(0)
-
-        if len(WETH_PRICE_HISTORY) > 10:
-            old_price = WETH_PRICE_HISTORY[0][1]
-            change = abs(current_price - old_price) / old_price * 100
-            
-            if change > 3.0: # 3% move in 1 hour = Aggressive Mode
-                if not VOLATILITY_MODE:
-                    requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage", data={"chat_id": TG_CHAT, "text": f"🔥 VOLATILITY DETECTED: {change:.2f}% move. Switching to AGGRESSIVE MODE (Gap: 0.5%)"})
-                MIN_GAP_PERCENT = 0.5
-                VOLATILITY_MODE = True
-            else:
-                if VOLATILITY_MODE:
-                    requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage", data={"chat_id": TG_CHAT, "text": "🛡️ Market Stabilized. Returning to SHIELD MODE (Gap: 0.8%)"})
-                MIN_GAP_PERCENT = 0.8
-                VOLATILITY_MODE = False
+        stress = VOL.stress(("USDC", "WETH")) * 100
+        if stress > 3.0: # 3% move / vol / drawdown in 1 hour = Aggressive Mode
+            if not VOLATILITY_MODE:
+                requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage", data={"chat_id": TG_CHAT, "text": f"🔥 VOLATILITY DETECTED: {stress:.2f}% move. Switching to AGGRESSIVE MODE (Gap: {AGGRESSIVE_GAP}%)"})
+            VOLATILITY_MODE = True
+        else:
+            if VOLATILITY_MODE:
+                requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage", data={"chat_id": TG_CHAT, "text": f"🛡️ Market Stabilized. Returning to SHIELD MODE (Gap: {MIN_GAP_PERCENT}%)"})
+            VOLATILITY_MODE = False
     except: pass
 
 async def scan(w3):
-    tasks = []
-    for n1, n2, diff in PAIRS:
-        addr1, addr2 = TOKENS[n1], TOKENS[n2]
-        async def check(n1, n2, a1, a2, diff):
-            try:
-                aero, uni_data = get_aero_price(a1, a2, w3), get_uni_price(a1, a2, w3)
-                u, f = uni_data
-                if aero and u:
-                    gap = (abs(aero - u) / min(aero, u)) * 100
-                    if gap > MIN_GAP_PERCENT:
-                        amt = 500 if diff == "HIGH" else 50
-                        fire_trade(w3, n1, n2, a1, amt * 10**get_dec(a1, w3), a2, f, aero < u, gap)
-            except: pass
-        tasks.append(check(n1, n2, addr1, addr2, diff))
-    await asyncio.gather(*tasks)
-
-def fire_trade(w3, n1, n2, a1, raw, a2, f, buyAero, gap):
+    # Pool state comes from the event-sourced engine: one eth_getLogs per pass
+    pairs = [(Web3.to_checksum_address(TOKENS[n1]), Web3.to_checksum_address(TOKENS[n2])) for n1, n2, _ in PAIRS]
+    url = w3.provider.endpoint_uri
+    try: prices = read_pair_prices(url, pairs, UNI_FEES, DEC_CACHE, POOL_CACHE, session=POOL.session(url), engine=ENGINE, w3=w3, limiter=POOL.limiter(url), registry=REGISTRY)
+    except Exception as e:
+        # A throttled endpoint is not the same as "no opportunity"
+        if is_rate_limit(e): print(f"⚠️ Throttled by {url[:40]}: {POOL.limiter(url).report()}")
+        return
+    for (n1, n2, diff), (a1, a2) in zip(PAIRS, pairs):
+        try:
+            aero, uni = prices[(a1, a2)]['aero'], prices[(a1, a2)]['uni']
+            VOL.update((n1, n2), aero or (uni and uni[0][1]))
+            if aero and uni:
+                f, u = uni[0]
+                gap = (abs(aero - u) / min(aero, u)) * 100
+                if gap > min_gap(n1, n2):
+                    amt = 500 if diff == "HIGH" else 50
+                    fire_trade(w3, n1, n2, a1, amt * 10**get_dec(a1, w3), a2, f, aero < u, gap, eth_per_token(a1, prices))
+        except: pass
+
+def fire_trade(w3, n1, n2, a1, raw, a2, f, buyAero, gap, eth_px):
     contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=EXEC_ABI)
     params = eth_abi.encode(['bool', 'address', 'uint24', 'bool', 'address'], [False, a2, f, buyAero, "0x0000000000000000000000000000000000000000"])
     
@@ -169,13 +147,23 @@ def fire_trade(w3, n1, n2, a1, raw, a2, f, buyAero, gap):
     if gap > 2.0: priority_tip = 0.5
     if gap > 5.0: priority_tip = 1.5 # Go full aggro for big gaps
     
-    tx = contract.functions.execute(a1, raw, params).build_transaction({
-        'from': BOT_ADDRESS, 'nonce': w3.eth.get_transaction_count(BOT_ADDRESS), 'gas': 800000,
-        'maxFeePerGas': int(w3.eth.gas_price * 1.5), 
-        'maxPriorityFeePerGas': w3.to_wei(str(priority_tip), 'gwei')
-    })
+    fn = contract.functions.execute(a1, raw, params)
+    route = route_key(CONTRACT_ADDRESS, f"uni{f}", 0, 1 if buyAero else 2)
     try:
-        w3.eth.call(tx)
+        # estimateGas doubles as the simulation and teaches the route's gas model
+        gas = fn.estimate_gas({'from': BOT_ADDRESS})
+        GAS.observe(route, gas)
+        tip = w3.to_wei(str(priority_tip), 'gwei')
+        # Gross edge at the mid-price gap, in wei, vs. L2 execution + L1 data cost: skip what gas eats
+        l1 = GAS.l1_fee(w3, calldata_size(contract.encode_abi('execute', args=[a1, raw, params])) + TX_OVERHEAD)
+        if l1 is None or not eth_px: return  # cost or value unknown: not free
+        edge = raw / 10**get_dec(a1, w3) * gap / 100 * eth_px * 10**18
+        if edge <= GAS.cost_wei(route, w3.eth.get_block('latest')['baseFeePerGas'] + tip, l1, gas): return
+        tx = fn.build_transaction({
+            'from': BOT_ADDRESS, 'nonce': w3.eth.get_transaction_count(BOT_ADDRESS), 'gas': GAS.limit(route, DEFAULT_GAS),
+            'maxFeePerGas': int(w3.eth.gas_price * 1.5), 
+            'maxPriorityFeePerGas': tip
+        })
         h = w3.eth.send_raw_transaction(w3.eth.account.sign_transaction(tx, PRIVATE_KEY).raw_transaction)
         requests.post(f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage", data={"chat_id": TG_CHAT, "text": f"🚀 STRIKE: {n1}/{n2} Gap: {gap:.2f}% | Tip: {priority_tip} Gwei"})
     except: pass
@@ -21,6 +21,7 @@ import requests
 from web3 import Web3
 from eth_abi import encode
 from dotenv import load_dotenv
+from spread_matrix import rank_opportunities
 
 # Load env
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -161,34 +162,29 @@ class FelixFlashExecutor:
     def _find_best_spread(self, pairs):
         """Find best arb opportunity"""
         best = None
-        max_spread = 0
-
-        for i, buy in enumerate(pairs):
-            for j, sell in enumerate(pairs):
-                if i != j and sell['price_usd'] > buy['price_usd']:
-                    spread = ((sell['price_usd'] - buy['price_usd']) / buy['price_usd']) * 100
-
-                    if spread > max_spread:
-                        max_spread = spread
-                        # Max trade = 30% of smaller pool liquidity
-                        max_liq = min(buy['liq'], sell['liq'])
-                        max_trade_usd = max_liq * 0.3
-                        max_trade_eth = max_trade_usd / 2500
-
-                        best = {
-                            'spread': spread,
-                            'buy_dex': buy['dex'],
-                            'sell_dex': sell['dex'],
-                            'buy_price': buy['price_usd'],
-                            'sell_price': sell['price_usd'],
-                            'buy_pair': buy['pair'],
-                            'sell_pair': sell['pair'],
-                            'max_trade_eth': max_trade_eth,
-                            'buy_liq': buy['liq'],
-                            'sell_liq': sell['liq'],
-                            'buy_quote': buy['quote'],
-                            'sell_quote': sell['quote'],
-                        }
+
+        # Every buy/sell combination at once (spread_matrix); DexScreener gives no fees
+        ranked = rank_opportunities([pairs], price_key='price_usd', liq_key='liq', fee_key=None)
+        if ranked:
+            buy, sell, spread = ranked[0]['buy'], ranked[0]['sell'], ranked[0]['spread']
+            # Max trade = 30% of smaller pool liquidity
+            max_trade_usd = ranked[0]['max_liq'] * 0.3
+            max_trade_eth = max_trade_usd / 2500
+
+            best = {
+                'spread': spread,
+                'buy_dex': buy['dex'],
+                'sell_dex': sell['dex'],
+                'buy_price': buy['price_usd'],
+                'sell_price': sell['price_usd'],
+                'buy_pair': buy['pair'],
+                'sell_pair': sell['pair'],
+                'max_trade_eth': max_trade_eth,
+                'buy_liq': buy['liq'],
+                'sell_liq': sell['liq'],
+                'buy_quote': buy['quote'],
+                'sell_quote': sell['quote'],
+            }
 
         if best:
             print(f"\n🎯 BEST OPPORTUNITY:")
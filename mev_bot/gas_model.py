@@ -0,0 +1,184 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         ROUTE GAS MODEL                              ║
+║         Learned gas per route · L2 + L1 cost in ETH  ║
+╚══════════════════════════════════════════════════════╝
+
+Gas used depends on the route and barely at all on the amount. The route is
+(contract, router, aeroType, mode, hops). Every eth_estimateGas we run and
+every receipt of our own transactions is folded into a per-route record:
+the last estimate, an EWMA of gas actually used, and the largest value seen.
+Records persist in gas_model.json, so a restart starts with what it learned.
+Several bots share the file: a save takes a lock, re-reads it and writes
+back only the routes this process changed, keeping everyone else's. Saves
+are throttled to one per SAVE_INTERVAL. Inside an event loop they run on a
+worker thread, never in the loop.
+
+    cost = gas_used * (baseFee + tip) + L1 data fee
+
+The L1 data fee comes from Base's GasPriceOracle (getL1FeeUpperBound for the
+transaction size). It is one eth_call that the block cache answers once per
+block. The cost is in wei, so sizing can net it out of profit
+(best_size(fixed_cost=...)). The gas limit sent is LIMIT_MARGIN over the
+largest value seen, not a hard-coded 850k.
+"""
+import asyncio
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from web3 import Web3
+import eth_abi
+from multicall import selector
+
+GAS_FILE       = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gas_model.json")
+GAS_ORACLE     = Web3.to_checksum_address("0x420000000000000000000000000000000000000F")
+SEL_L1_BOUND   = selector("getL1FeeUpperBound(uint256)")
+LIMIT_MARGIN   = 1.2     # limit sent = largest gas seen on the route x this
+EWMA_ALPHA     = 0.2     # weight of the newest receipt in gas_used
+TX_OVERHEAD    = 120     # bytes of a signed EIP-1559 tx besides calldata (nonce, fees, to, value, sig, ...)
+SAVE_INTERVAL  = 30.0    # seconds between writes of gas_model.json
+
+
+def route_key(contract, router, aero_type, mode, hops=2):
+    return f"{contract.lower()}:{str(router).lower()}:{aero_type}:{mode}:{hops}"
+
+
+def calldata_size(data):
+    """Bytes of calldata from a hex string or bytes."""
+    return (len(data) - 2) // 2 if isinstance(data, str) else len(data)
+
+
+class GasModel:
+    def __init__(self, path=GAS_FILE):
+        self.path = path
+        self.routes = {}    # key -> {'estimate', 'used', 'peak', 'receipts', 'updated'}
+        self.l1_last = None # last L1 fee read, used if the oracle call fails; None until one succeeds
+        self.dirty = set()  # routes changed here since the last save
+        self.saved_at = 0.0
+        self.saving = False
+        self.lock = threading.Lock()
+        self.routes = self._read()
+        atexit.register(self.save)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Merges this process's changed routes into the file under an exclusive lock."""
+        with self.lock:
+            mine = {k: dict(self.routes[k]) for k in self.dirty}
+            self.dirty.clear()
+        if not mine:
+            return
+        try:
+            with open(self.path + '.lock', 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                routes = self._read()
+                routes.update(mine)
+                tmp = self.path + '.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump(routes, f, indent=2)
+                os.replace(tmp, self.path)
+        except OSError:
+            with self.lock: self.dirty.update(mine)   # retried on the next save
+            return
+        with self.lock:
+            # Pick up what other processes learned, without clobbering newer local changes
+            for k, r in routes.items():
+                if k not in self.dirty: self.routes[k] = r
+            self.saved_at = time.monotonic()
+
+    def _save_later(self):
+        if self.saving or time.monotonic() - self.saved_at < SAVE_INTERVAL:
+            return
+        self.saving = True
+
+        def run():
+            try: self.save()
+            finally: self.saving = False
+        try:
+            asyncio.get_running_loop().run_in_executor(None, run)
+        except RuntimeError:
+            run()   # no event loop: plain script, save inline
+
+    # ───────────────────────── LEARNING ─────────────────────────
+    def observe(self, key, gas, receipt=False):
+        """Folds one estimateGas answer (receipt=False) or one receipt's gasUsed into the route."""
+        with self.lock:
+            r = self.routes.setdefault(key, {'estimate': None, 'used': None, 'peak': 0, 'receipts': 0, 'updated': 0})
+            if receipt:
+                r['used'] = gas if r['used'] is None else int(r['used'] + EWMA_ALPHA * (gas - r['used']))
+                r['receipts'] += 1
+            else:
+                r['estimate'] = gas
+            r['peak'] = max(r['peak'], gas)
+            r['updated'] = time.time()
+            self.dirty.add(key)
+        self._save_later()
+        return r
+
+    def record_receipt(self, key, receipt):
+        # A reverted tx stops early: its gasUsed says nothing about the route
+        if receipt and receipt.get('status') == 1:
+            return self.observe(key, receipt['gasUsed'], receipt=True)
+
+    def estimate(self, w3, key, tx):
+        gas = w3.eth.estimate_gas(tx)
+        self.observe(key, gas)
+        return gas
+
+    async def estimate_async(self, aw3, key, tx):
+        gas = await aw3.eth.estimate_gas(tx)
+        self.observe(key, gas)
+        return gas
+
+    # ───────────────────────── MODEL ─────────────────────────
+    def units(self, key, default=None):
+        """Expected gas used: receipts first, then the last estimate."""
+        r = self.routes.get(key)
+        if not r: return default
+        return r['used'] or r['estimate'] or default
+
+    def limit(self, key, default):
+        """Gas limit to send: LIMIT_MARGIN over the largest seen (this estimate included); default until then."""
+        r = self.routes.get(key)
+        return int(r['peak'] * LIMIT_MARGIN) if r and r['peak'] else default
+
+    def l1_fee(self, w3, size):
+        try:
+            data = w3.eth.call({'to': GAS_ORACLE, 'data': SEL_L1_BOUND + eth_abi.encode(['uint256'], [size])})
+            self.l1_last = eth_abi.decode(['uint256'], data)[0]
+        except Exception:
+            pass
+        return self.l1_last
+
+    async def l1_fee_async(self, aw3, size):
+        try:
+            data = await aw3.eth.call({'to': GAS_ORACLE, 'data': SEL_L1_BOUND + eth_abi.encode(['uint256'], [size])})
+            self.l1_last = eth_abi.decode(['uint256'], data)[0]
+        except Exception:
+            pass
+        return self.l1_last
+
+    def cost_wei(self, key, gas_price, l1_fee=0, default_units=None):
+        """Total cost of one transaction on the route in wei; None while the route is unknown."""
+        units = self.units(key, default_units)
+        return None if units is None else units * gas_price + l1_fee
+
+
+_GAS = None
+
+
+def get_gas_model():
+    """Process-wide model on gas_model.json."""
+    global _GAS
+    if _GAS is None:
+        _GAS = GasModel()
+    return _GAS
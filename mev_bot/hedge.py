@@ -0,0 +1,116 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         HEDGED (RACED) READS                         ║
+║         Second endpoint fires past the p-deadline    ║
+╚══════════════════════════════════════════════════════╝
+
+The read goes to the fastest endpoint first. If it has not answered by that
+endpoint's own p-th percentile latency, the same read is fired at the
+runner-up and whichever answers first wins. A primary that fails outright
+hands the read to the runner-up at once. A failing endpoint ranks last
+until it answers again, and each failure counts as a FAILURE_PENALTY
+latency sample. Answers from a block older than the newest block already seen are
+dropped.
+"""
+import asyncio
+import time
+from collections import deque
+
+LATENCY_WINDOW = 200     # samples kept per endpoint
+MIN_DEADLINE   = 0.02    # never hedge sooner than 20 ms
+COLD_DEADLINE  = 0.25    # deadline while an endpoint has too few samples
+MIN_SAMPLES    = 20
+FAILURE_PENALTY = 5.0    # latency sample (s) recorded for a read that raised
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class HedgedReader:
+    def __init__(self, clients, read_fn, percentile=0.95):
+        """
+        clients: {name: client} handed to read_fn (e.g. one Web3 per endpoint).
+        read_fn(client, *args) returns a dict with a 'block' key; it may be a
+        plain blocking function (run in a worker thread) or a coroutine function.
+        """
+        self.clients = dict(clients)
+        self.read_fn = read_fn
+        self.p = percentile
+        self.latencies = {name: deque(maxlen=LATENCY_WINDOW) for name in self.clients}
+        self.last_block = 0
+        self.hedges = 0
+        self.failovers = 0
+        self.errors = {name: 0 for name in self.clients}
+        self.failing = {name: 0 for name in self.clients}   # consecutive failures; > 0 ranks last
+        self.stale_dropped = 0
+
+    def ranked(self):
+        def p50(name):
+            s = self.latencies[name]
+            return percentile(s, 0.5) if s else 0.0
+        return sorted(self.clients, key=lambda name: (self.failing[name] > 0, p50(name)))
+
+    def deadline(self, name):
+        s = self.latencies[name]
+        if len(s) < MIN_SAMPLES:
+            return COLD_DEADLINE
+        return max(MIN_DEADLINE, percentile(s, self.p))
+
+    async def _timed(self, name, *args):
+        start = time.perf_counter()
+        client = self.clients[name]
+        try:
+            if asyncio.iscoroutinefunction(self.read_fn):
+                result = await self.read_fn(client, *args)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(None, self.read_fn, client, *args)
+        except Exception:
+            self.errors[name] += 1
+            self.failing[name] += 1
+            self.latencies[name].append(max(FAILURE_PENALTY, time.perf_counter() - start))
+            raise
+        self.latencies[name].append(time.perf_counter() - start)
+        self.failing[name] = 0
+        return result
+
+    def _accept(self, task):
+        if task.cancelled() or task.exception() is not None:
+            return None
+        result = task.result()
+        if result is None or result['block'] < self.last_block:
+            self.stale_dropped += 1
+            return None
+        self.last_block = result['block']
+        return result
+
+    async def read(self, *args):
+        """Returns the freshest answer, or None if every raced read failed or was stale."""
+        order = self.ranked()
+        primary = asyncio.ensure_future(self._timed(order[0], *args))
+        done, _ = await asyncio.wait({primary}, timeout=self.deadline(order[0]))
+        if done or len(order) < 2:
+            if not done: await asyncio.wait({primary})
+            if len(order) < 2 or primary.cancelled() or primary.exception() is None:
+                return self._accept(primary)
+            # Primary failed before its deadline: the runner-up takes the read
+            self.failovers += 1
+            runner = asyncio.ensure_future(self._timed(order[1], *args))
+            await asyncio.wait({runner})
+            return self._accept(runner)
+
+        self.hedges += 1
+        pending = {primary, asyncio.ensure_future(self._timed(order[1], *args))}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = self._accept(task)
+                if result is not None:
+                    for loser in pending: loser.add_done_callback(self._record_late)
+                    return result
+        return None
+
+    def _record_late(self, task):
+        # Late answers still teach us about the endpoint; just consume the outcome
+        if not task.cancelled(): task.exception()
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 import os
 import time
 from decimal import Decimal
+from pool_registry import get_registry
+from rpc_pool import get_pool
 
 load_dotenv("mev_bot/.env")
 
@@ -14,6 +16,11 @@ class HighFreqArbitrage:
     def __init__(self):
         self.w3 = Web3(Web3.HTTPProvider("https://mainnet.base.org"))
         self.flash_loan_contract = os.getenv("FLASH_ARB_CONTRACT")
+        # Every pool on Base from factory events: once caught up, no getPool per price read
+        # Backfill goes through the rate-limited pool at low priority, never the bare client above
+        rpc_urls = [u for u in os.getenv("MEV_RPC_URLS", "").split(",") if u] or ["https://mainnet.base.org"]
+        self.registry = get_registry().follow(get_pool(rpc_urls).get_w3)
+        self.registry_dex = {'uniswap': 'uniswap_v3', 'aerodrome': 'aerodrome'}
         self.bot_address = os.getenv("BOT_ADDRESS", "0xF2B94CA9bCf9458392D207db8Ff94272F761AdDC")
         
         # DEX configurations on Base
@@ -72,7 +79,13 @@ class HighFreqArbitrage:
                 base_address = '0x4200000000000000000000000000000000000006'
             
             # Get pool address
-            if dex_name == 'aerodrome':
+            registry_dex = self.registry_dex.get(dex_name)
+            if registry_dex and self.registry.ready:
+                if dex_name == 'aerodrome':
+                    pool_addr = self.registry.find(token_address, base_address, registry_dex, stable=False)
+                else:
+                    pool_addr = self.registry.find(token_address, base_address, registry_dex, fee=dex_config['fee'])
+            elif dex_name == 'aerodrome':
                 pool_addr = factory.functions.getPool(token_address, base_address, False).call()
             else:
                 pool_addr = factory.functions.getPool(token_address, base_address, dex_config['fee']).call()
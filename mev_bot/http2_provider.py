@@ -0,0 +1,101 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         HTTP/2 RPC TRANSPORT (httpx)                 ║
+║         Multiplexed streams · br/gzip responses      ║
+╚══════════════════════════════════════════════════════╝
+
+Web3 providers on httpx with HTTP/2. Concurrent requests from one process
+share a single TLS connection as separate streams, with no head-of-line
+blocking behind a slow eth_call. Responses are negotiated as brotli or gzip.
+
+Set MEV_RPC_TRANSPORT=http2 to use it. make_provider / make_async_provider
+return the configured transport, and rpc_pool.make_session does the same for
+sessions, so call sites do not change. The default ("http1") keeps
+Web3.HTTPProvider on requests.
+"""
+import os
+import httpx
+from web3 import Web3, AsyncWeb3
+from web3.providers.base import JSONBaseProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+from block_cache import CachedAsyncHTTPProvider, AsyncCachedRequests
+
+TRANSPORT = os.getenv("MEV_RPC_TRANSPORT", "http1").lower()
+
+# Over HTTP/2 every request rides one connection as its own stream; the extra
+# slots only matter if an endpoint negotiates down to HTTP/1.1.
+LIMITS  = httpx.Limits(max_connections=8, max_keepalive_connections=8, keepalive_expiry=90)
+HEADERS = {'Content-Type': 'application/json', 'Accept-Encoding': 'br, gzip'}
+
+
+def _timeout(timeout):
+    return httpx.Timeout(timeout, connect=min(timeout, 4))
+
+
+def http2_client(timeout=8):
+    """Sync httpx client; also usable as the session for RPCBatch and pool probes."""
+    return httpx.Client(http2=True, limits=LIMITS, headers=HEADERS, timeout=_timeout(timeout))
+
+
+def http2_async_client(timeout=8):
+    return httpx.AsyncClient(http2=True, limits=LIMITS, headers=HEADERS, timeout=_timeout(timeout))
+
+
+class HTTP2Provider(JSONBaseProvider):
+    def __init__(self, endpoint_uri, timeout=8, client=None):
+        super().__init__()
+        self.endpoint_uri = endpoint_uri
+        self.client = client if isinstance(client, httpx.Client) else http2_client(timeout)
+
+    def make_request(self, method, params):
+        resp = self.client.post(self.endpoint_uri, content=self.encode_rpc_request(method, params))
+        resp.raise_for_status()
+        return self.decode_rpc_response(resp.content)
+
+    def __str__(self):
+        return f"HTTP2 connection {self.endpoint_uri}"
+
+
+class AsyncHTTP2Provider(AsyncJSONBaseProvider):
+    def __init__(self, endpoint_uri, timeout=8, client=None):
+        super().__init__()
+        self.endpoint_uri = endpoint_uri
+        self.client = client or http2_async_client(timeout)
+
+    async def make_request(self, method, params):
+        resp = await self.client.post(self.endpoint_uri, content=self.encode_rpc_request(method, params))
+        resp.raise_for_status()
+        return self.decode_rpc_response(resp.content)
+
+    async def is_connected(self, show_traceback=False):
+        try:
+            return 'result' in await self.make_request('web3_clientVersion', [])
+        except Exception:
+            if show_traceback: raise
+            return False
+
+    async def disconnect(self):
+        await self.client.aclose()
+
+    def __str__(self):
+        return f"Async HTTP2 connection {self.endpoint_uri}"
+
+
+class CachedAsyncHTTP2Provider(AsyncCachedRequests, AsyncHTTP2Provider):
+    pass
+
+
+# ───────────────────────── CONFIG-SELECTED FACTORIES ─────────────────────────
+def make_provider(url, request_kwargs=None, session=None):
+    timeout = (request_kwargs or {}).get('timeout', 8)
+    if TRANSPORT == "http2":
+        return HTTP2Provider(url, timeout, client=session)
+    # web3's own retry-with-sleep on 429 is off: the limiter and failover handle it
+    return Web3.HTTPProvider(url, request_kwargs=request_kwargs, session=session, exception_retry_configuration=None)
+
+
+def make_async_provider(url, timeout=8, cached=False):
+    """cached=True serves same-block repeat reads from block_cache.CACHE."""
+    if TRANSPORT == "http2":
+        return (CachedAsyncHTTP2Provider if cached else AsyncHTTP2Provider)(url, timeout)
+    return (CachedAsyncHTTPProvider if cached else AsyncWeb3.AsyncHTTPProvider)(url, request_kwargs={'timeout': timeout})
@@ -7,6 +7,7 @@
 import requests, os, time, json
 from web3 import Web3
 from dotenv import load_dotenv
+from rpc_pool import get_pool
 
 load_dotenv()
 load_dotenv("mev_bot/.env")
@@ -23,13 +24,10 @@ RPC_URLS = [
     "https://mainnet.base.org"
 ]
 
+POOL = get_pool(RPC_URLS, request_kwargs={'timeout': 10})
+
 def get_w3():
-    for url in RPC_URLS:
-        try:
-            w = Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': 10}))
-            if w.is_connected(): return w
-        except: continue
-    return None
+    return POOL.get_w3()
 
 BOT_ADDR = os.getenv("BOT_ADDRESS")
 if BOT_ADDR:
@@ -3,6 +3,7 @@ import json
 import time
 import os
 from dotenv import load_dotenv
+from rpc_pool import get_pool
 
 # --- SECURITY & CONFIG ---
 load_dotenv()
@@ -16,12 +17,10 @@ RPC_URLS = [
     "https://base-mainnet.g.alchemy.com/v2/USbVaOTSKlqazrRw7rjg2"
 ]
 
+POOL = get_pool(RPC_URLS)
+
 def get_w3():
-    for url in RPC_URLS:
-        w3 = Web3(Web3.HTTPProvider(url))
-        if w3.is_connected():
-            return w3
-    return None
+    return POOL.get_w3()
 
 w3 = get_w3()
 
@@ -0,0 +1,263 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         PERSISTENT METADATA INDEX                    ║
+║         Immutable token / pool facts · warm restarts ║
+╚══════════════════════════════════════════════════════╝
+
+Token decimals and symbols, pool token0 / token1 / fee / tickSpacing / kind /
+factory, and factory getPool answers (including "no pool") never change once
+read. They are kept in one SQLite file. At startup the index opens it with
+mmap and loads every row into dicts, so lookups are plain dict hits, and
+anything new is written through as soon as it is read. A restarted bot
+issues no metadata RPCs for anything it has seen before.
+
+    INDEX = get_index()
+    DEC_CACHE, POOL_CACHE = INDEX.decimals_view(), INDEX.pool_cache_view()
+
+The two views are drop-in replacements for the dec_cache / pool_cache dicts
+that pair_scan.read_pair_prices fills.
+"""
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from web3 import Web3
+import eth_abi
+from multicall import selector, aggregate3
+
+INDEX_FILE = os.getenv("MEV_META_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "meta_index.db"))
+MMAP_SIZE  = 64 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (address TEXT PRIMARY KEY, decimals INTEGER, symbol TEXT);
+CREATE TABLE IF NOT EXISTS pools  (address TEXT PRIMARY KEY, token0 TEXT, token1 TEXT, fee INTEGER,
+                                   tick_spacing INTEGER, kind TEXT, factory TEXT);
+CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, pool TEXT);
+CREATE TABLE IF NOT EXISTS cursors (name TEXT PRIMARY KEY, block INTEGER);
+"""
+TOKEN_FIELDS = ('decimals', 'symbol')
+POOL_FIELDS  = ('token0', 'token1', 'fee', 'tick_spacing', 'kind', 'factory', 'dex', 'stable')
+ADDED_POOL_COLUMNS = {'dex': 'TEXT', 'stable': 'INTEGER'}   # columns newer than the first schema
+
+SEL_TOKEN0, SEL_TOKEN1  = selector("token0()"), selector("token1()")
+SEL_FEE, SEL_SPACING    = selector("fee()"), selector("tickSpacing()")
+SEL_FACTORY             = selector("factory()")
+SEL_DECIMALS, SEL_SYMBOL = selector("decimals()"), selector("symbol()")
+
+
+def route_key(key):
+    """("aero", a, b) / ("uni", a, b, fee) -> 'aero:0xa:0xb' / 'uni:0xa:0xb:fee'."""
+    return ':'.join(str(k).lower() for k in key)
+
+
+def _decode_symbol(data):
+    try:
+        return eth_abi.decode(['string'], data)[0]
+    except Exception:
+        # A few old tokens return bytes32
+        return bytes(data[:32]).rstrip(b'\0').decode(errors='ignore') if len(data) >= 32 else None
+
+
+class MetaIndex:
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        self.db.execute("PRAGMA journal_mode=WAL")   # several bot processes may share the file
+        self.db.executescript(SCHEMA)
+        have = {r[1] for r in self.db.execute("PRAGMA table_info(pools)")}
+        for col, typ in ADDED_POOL_COLUMNS.items():
+            if col not in have: self.db.execute(f"ALTER TABLE pools ADD COLUMN {col} {typ}")
+        self.db.execute("CREATE INDEX IF NOT EXISTS pools_pair ON pools (token0, token1)")
+        self.tokens = {r[0]: dict(zip(TOKEN_FIELDS, r[1:])) for r in self.db.execute("SELECT address, decimals, symbol FROM tokens")}
+        self.pools = {}
+        self.pool_rowid = 0   # newest pools row loaded; INSERT OR REPLACE gives a written row a new rowid
+        self.reload_pools()
+        self.routes = dict(self.db.execute("SELECT key, pool FROM routes"))
+
+    # ───────────────────────── READ / WRITE ─────────────────────────
+    def token(self, addr):
+        return self.tokens.get(addr.lower())
+
+    def pool(self, addr):
+        return self.pools.get(addr.lower())
+
+    def set_token(self, addr, **fields):
+        addr = addr.lower()
+        with self.lock:
+            row = self.tokens.setdefault(addr, dict.fromkeys(TOKEN_FIELDS))
+            row.update((k, v) for k, v in fields.items() if v is not None)
+            self.db.execute("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)", (addr, *[row[f] for f in TOKEN_FIELDS]))
+        return row
+
+    def _merge_pool(self, addr, fields):
+        row = self.pools.setdefault(addr.lower(), dict.fromkeys(POOL_FIELDS))
+        row.update((k, v.lower() if isinstance(v, str) and v.startswith('0x') else v)
+                   for k, v in fields.items() if v is not None)
+        return (addr.lower(), *[row[f] for f in POOL_FIELDS])
+
+    def set_pool(self, addr, **fields):
+        with self.lock:
+            values = self._merge_pool(addr, fields)
+            self.db.execute(f"INSERT OR REPLACE INTO pools VALUES ({', '.join('?' * len(values))})", values)
+        return self.pools[addr.lower()]
+
+    def add_pools(self, rows):
+        """Bulk set_pool for [(addr, fields), ...] in one transaction (registry backfills)."""
+        with self.lock:
+            values = [self._merge_pool(addr, fields) for addr, fields in rows]
+            if values:
+                with self.db:
+                    self.db.execute("BEGIN")
+                    self.db.executemany(f"INSERT OR REPLACE INTO pools VALUES ({', '.join('?' * len(values[0]))})", values)
+
+    def reload_pools(self):
+        """Loads pools rows written (by any process) since the last load. Returns their addresses."""
+        rows = self.db.execute(f"SELECT rowid, address, {', '.join(POOL_FIELDS)} FROM pools WHERE rowid > ? ORDER BY rowid",
+                               (self.pool_rowid,)).fetchall()
+        with self.lock:
+            for r in rows:
+                self.pools[r[1]] = dict(zip(POOL_FIELDS, r[2:]))
+            if rows: self.pool_rowid = rows[-1][0]
+        return [r[1] for r in rows]
+
+    def cursor(self, name):
+        row = self.db.execute("SELECT block FROM cursors WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_cursor(self, name, block):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO cursors VALUES (?, ?)", (name, block))
+
+    def has_route(self, key):
+        return route_key(key) in self.routes
+
+    def route(self, key):
+        """Pool for a getPool lookup key; None for both "unknown" and "no pool" (see has_route)."""
+        pool = self.routes.get(route_key(key))
+        return Web3.to_checksum_address(pool) if pool else None
+
+    def set_route(self, key, pool):
+        pool = pool.lower() if pool and int(pool, 16) else None
+        with self.lock:
+            self.routes[route_key(key)] = pool
+            self.db.execute("INSERT OR REPLACE INTO routes VALUES (?, ?)", (route_key(key), pool))
+
+    # ───────────────────────── LAZY FILL ─────────────────────────
+    def decimals(self, w3, addr):
+        """Token decimals, read over RPC only the first time the token is ever seen."""
+        row = self.token(addr)
+        if row is None or row['decimals'] is None:
+            data = w3.eth.call({'to': Web3.to_checksum_address(addr), 'data': SEL_DECIMALS})
+            row = self.set_token(addr, decimals=eth_abi.decode(['uint8'], data)[0])
+        return row['decimals']
+
+    def describe_pools(self, w3, addrs, kind=None):
+        """
+        token0 / token1 / fee / tickSpacing / factory for every pool not indexed yet,
+        one Multicall3 call for all of them. Calls a pool does not have just stay None.
+        """
+        todo = [a.lower() for a in addrs if self.pool(a) is None or self.pool(a)['token0'] is None]
+        sels = [(SEL_TOKEN0, 'address', 'token0'), (SEL_TOKEN1, 'address', 'token1'), (SEL_FEE, 'uint24', 'fee'),
+                (SEL_SPACING, 'int24', 'tick_spacing'), (SEL_FACTORY, 'address', 'factory')]
+        if todo:
+            results = aggregate3(w3, [(Web3.to_checksum_address(a), True, s) for a in todo for s, _, _ in sels])
+            for n, addr in enumerate(todo):
+                fields = {'kind': kind}
+                for (_, typ, name), (ok, data) in zip(sels, results[n * len(sels):(n + 1) * len(sels)]):
+                    if ok and len(data) >= 32:
+                        fields[name] = eth_abi.decode([typ], data)[0]
+                self.set_pool(addr, **fields)
+        return {a.lower(): self.pool(a) for a in addrs}
+
+    def describe_tokens(self, w3, addrs):
+        """decimals + symbol for every token not indexed yet, in one Multicall3 call."""
+        todo = [a.lower() for a in addrs if self.token(a) is None or self.token(a)['decimals'] is None]
+        if todo:
+            results = aggregate3(w3, [(Web3.to_checksum_address(a), True, s) for a in todo for s in (SEL_DECIMALS, SEL_SYMBOL)])
+            for n, addr in enumerate(todo):
+                (ok_d, dec), (ok_s, sym) = results[2 * n], results[2 * n + 1]
+                if ok_d and len(dec) >= 32:
+                    self.set_token(addr, decimals=eth_abi.decode(['uint8'], dec)[0], symbol=_decode_symbol(sym) if ok_s else None)
+        return {a.lower(): self.token(a) for a in addrs}
+
+    # ───────────────────────── DICT VIEWS ─────────────────────────
+    def decimals_view(self):
+        return DecimalsView(self)
+
+    def pool_cache_view(self):
+        return PoolCacheView(self)
+
+
+class DecimalsView(MutableMapping):
+    """token address -> decimals, persisted."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, addr):
+        row = self.index.token(addr)
+        if row is None or row['decimals'] is None:
+            raise KeyError(addr)
+        return row['decimals']
+
+    def __setitem__(self, addr, decimals):
+        self.index.set_token(addr, decimals=decimals)
+
+    def __delitem__(self, addr):
+        raise TypeError("index entries are immutable")
+
+    def __iter__(self):
+        return (a for a, r in self.index.tokens.items() if r['decimals'] is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class PoolCacheView(MutableMapping):
+    """
+    The pair_scan pool_cache layout, persisted:
+    ("aero", a, b) / ("uni", a, b, fee) -> pool or None, ("token0", pool) -> token0.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, key):
+        if key[0] == "token0":
+            row = self.index.pool(key[1])
+            if row is None or row['token0'] is None:
+                raise KeyError(key)
+            return Web3.to_checksum_address(row['token0'])
+        if not self.index.has_route(key):
+            raise KeyError(key)
+        return self.index.route(key)
+
+    def __setitem__(self, key, value):
+        if key[0] == "token0":
+            self.index.set_pool(key[1], token0=value)
+        else:
+            self.index.set_route(key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("index entries are immutable")
+
+    def __iter__(self):
+        for key in self.index.routes:
+            dex, *rest = key.split(':')
+            yield (dex, *rest[:2], *map(int, rest[2:]))
+
+    def __len__(self):
+        return len(self.index.routes)
+
+
+_INDEX = None
+
+
+def get_index(path=INDEX_FILE):
+    """Process-wide index (one SQLite connection per process)."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = MetaIndex(path)
+    return _INDEX
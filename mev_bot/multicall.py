@@ -0,0 +1,113 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         MULTICALL3 POOL-STATE READER                 ║
+║         One aggregate3 eth_call per tick             ║
+╚══════════════════════════════════════════════════════╝
+
+Packs every V2 getReserves() and V3/Slipstream slot0() read for a set of
+targets into a single Multicall3 aggregate3 call. The block number is read
+inside the same call, so all pool states in a snapshot come from one block.
+"""
+from web3 import Web3
+import eth_abi
+
+# Multicall3 is deployed at the same address on every EVM chain (Base included)
+MULTICALL3 = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+
+
+def selector(signature):
+    return bytes(Web3.keccak(text=signature)[:4])
+
+
+SEL_AGGREGATE3     = selector("aggregate3((address,bool,bytes)[])")
+SEL_BLOCK_NUMBER   = selector("getBlockNumber()")
+SEL_SLOT0          = selector("slot0()")
+SEL_GET_RESERVES   = selector("getReserves()")
+
+# ───────────────────────── ENCODING ─────────────────────────
+def encode_aggregate3(calls):
+    """calls: list of (target, allow_failure, calldata) tuples."""
+    return SEL_AGGREGATE3 + eth_abi.encode(['(address,bool,bytes)[]'], [calls])
+
+
+def decode_aggregate3(raw):
+    """Returns a list of (success, return_data) in call order."""
+    return eth_abi.decode(['(bool,bytes)[]'], bytes(raw))[0]
+
+
+def aggregate3(w3, calls, block='latest'):
+    raw = w3.eth.call({'to': MULTICALL3, 'data': encode_aggregate3(calls)}, block)
+    return decode_aggregate3(raw)
+
+
+def decode_slot0(data):
+    # Uni V3, Pancake V3 and Slipstream all start slot0 with (sqrtPriceX96, tick);
+    # the trailing fields differ between forks so only the first two words are read.
+    sqrt_price_x96, tick = eth_abi.decode(['uint160', 'int24'], data[:64])
+    return {'sqrtPriceX96': sqrt_price_x96, 'tick': tick}
+
+
+def decode_reserves(data):
+    # Aerodrome returns uint256 reserves, Uni V2 forks uint112 — both fit one word each
+    r0, r1 = eth_abi.decode(['uint256', 'uint256'], data[:64])
+    return {'reserve0': r0, 'reserve1': r1}
+
+
+# ───────────────────────── POOL SNAPSHOTS ─────────────────────────
+def target_pools(targets):
+    """
+    Flattens a TARGETS dict into unique (pool_address, kind) reads.
+    kind is 'v2' (getReserves) or 'v3' (slot0). Entries whose pool is not a
+    20-byte address (e.g. V4 pool ids) are skipped.
+    """
+    pools = {}
+    for data in targets.values():
+        legs = [
+            (data['aero_pool'], 'v3' if data['aero_type_val'] >= 1 else 'v2'),
+            (data['uni_pool'], 'v3'),
+        ]
+        for addr, kind in legs:
+            if Web3.is_address(addr):
+                pools[addr.lower()] = kind
+    return pools
+
+
+def build_pool_calls(pools):
+    calls = [(MULTICALL3, False, SEL_BLOCK_NUMBER)]
+    order = []
+    for addr, kind in pools.items():
+        calldata = SEL_SLOT0 if kind == 'v3' else SEL_GET_RESERVES
+        calls.append((Web3.to_checksum_address(addr), True, calldata))
+        order.append((addr, kind))
+    return calls, order
+
+
+def decode_pool_results(results, order):
+    block = eth_abi.decode(['uint256'], results[0][1])[0]
+    states = {}
+    for (addr, kind), (ok, data) in zip(order, results[1:]):
+        if not ok or len(data) < 64:
+            continue
+        states[addr] = decode_slot0(data) if kind == 'v3' else decode_reserves(data)
+    return {'block': block, 'pools': states}
+
+
+def read_pool_states(w3, pools):
+    """
+    Reads every pool in one aggregate3 call.
+    Returns {'block': n, 'pools': {addr_lower: state}}; pools whose read
+    reverted are simply absent from the snapshot.
+    """
+    calls, order = build_pool_calls(pools)
+    return decode_pool_results(aggregate3(w3, calls), order)
+
+
+# ───────────────────────── ASYNC (AsyncWeb3) ─────────────────────────
+async def aggregate3_async(aw3, calls, block='latest'):
+    raw = await aw3.eth.call({'to': MULTICALL3, 'data': encode_aggregate3(calls)}, block)
+    return decode_aggregate3(raw)
+
+
+async def read_pool_states_async(aw3, pools):
+    calls, order = build_pool_calls(pools)
+    return decode_pool_results(await aggregate3_async(aw3, calls), order)
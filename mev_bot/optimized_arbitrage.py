@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import requests
 import json
-from web3 import Web3
 from eth_abi import encode
 from dotenv import load_dotenv
 import os
@@ -9,6 +8,7 @@ import time
 import threading
 from queue import Queue
 from decimal import Decimal
+from rpc_pool import get_pool
 
 load_dotenv("mev_bot/.env")
 
@@ -23,20 +23,15 @@ class OptimizedArbitrage:
             "https://base.publicnode.com"
         ]
         
-        # Initialize Web3 instances
-        self.w3_instances = []
-        for rpc in self.rpc_list:
-            try:
-                w3 = Web3(Web3.HTTPProvider(rpc, request_kwargs={'timeout': 10}))
-                if w3.is_connected():
-                    self.w3_instances.append(w3)
-                    print(f"✅ Connected: {rpc[:50]}...")
-            except:
-                continue
+        # Persistent keep-alive sessions; liveness is probed in the background
+        self.pool = get_pool(self.rpc_list, request_kwargs={'timeout': 10})
+        self.pool.wait_ready()
+        self.w3_instances = [self.pool.client(rpc) for rpc in self.pool.live_urls()]
+        for rpc in self.pool.live_urls():
+            print(f"✅ Connected: {rpc[:50]}...")
         
         print(f"📡 Active RPCs: {len(self.w3_instances)}/{len(self.rpc_list)}")
         
-        self.current_rpc = 0
         self.flash_loan_contract = os.getenv("FLASH_ARB_CONTRACT")
         self.bot_address = os.getenv("BOT_ADDRESS", "0xF2B94CA9bCf9458392D207db8Ff94272F761AdDC")
         
@@ -58,24 +53,8 @@ class OptimizedArbitrage:
         self.cache_timeout = 5  # 5 seconds cache
         
     def get_w3(self):
-        """Get next available Web3 instance with rotation"""
-        max_retries = len(self.w3_instances)
-        
-        for _ in range(max_retries):
-            try:
-                w3 = self.w3_instances[self.current_rpc]
-                # Test if still responsive
-                if w3.is_connected():
-                    self.current_rpc = (self.current_rpc + 1) % len(self.w3_instances)
-                    return w3
-                else:
-                    # Try to reconnect
-                    self.current_rpc = (self.current_rpc + 1) % len(self.w3_instances)
-            except:
-                self.current_rpc = (self.current_rpc + 1) % len(self.w3_instances)
-                continue
-        
-        raise Exception("All RPCs failed")
+        """Get the fastest live Web3 instance (no per-call connectivity check)"""
+        return self.pool.get_w3()
     
     def get_cached_price(self, token_address, dex_name):
         """Get cached price or fetch new one"""
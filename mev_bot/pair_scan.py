@@ -0,0 +1,122 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         BATCHED AERO / UNI PAIR SCAN                 ║
+║         Whole scan pass in one or two batch POSTs    ║
+╚══════════════════════════════════════════════════════╝
+
+Phase 1 (only for cold caches): getPool on every fee tier + decimals().
+Phase 2 (every pass): getReserves / slot0 for every known pool, plus token0
+the first time a pool is seen. Once the caches are warm a scan pass is a
+single JSON-RPC batch, or, with a PoolStateEngine, a single eth_getLogs.
+"""
+from web3 import Web3
+from rpc_batch import RPCBatch
+from pricing import v2_price_x128, v3_price_x128, to_float
+
+AERO_FACTORY   = Web3.to_checksum_address("0x420DD381b31aEf6683db6B902084cB0FFECe40Da")
+UNI_V3_FACTORY = Web3.to_checksum_address("0x33128a8fC17869897dcE68Ed026d694621f6FDfD")
+
+
+def _prefetch_pools(batch, pairs, fees, dec_cache, pool_cache, registry=None):
+    """Queues getPool / decimals for anything not cached yet."""
+    pending = []
+    if registry is not None:
+        # A caught-up factory-event registry answers these without getPool
+        for a, b in pairs:
+            registry.fill(pool_cache, ("aero", a, b))
+            for f in fees:
+                registry.fill(pool_cache, ("uni", a, b, f))
+    for a, b in pairs:
+        if ("aero", a, b) not in pool_cache:
+            pending.append((("aero", a, b), batch.call(AERO_FACTORY, "getPool(address,address,bool)", ['address', 'address', 'bool'], [a, b, False], ['address'])))
+        for f in fees:
+            if ("uni", a, b, f) not in pool_cache:
+                pending.append((("uni", a, b, f), batch.call(UNI_V3_FACTORY, "getPool(address,address,uint24)", ['address', 'address', 'uint24'], [a, b, f], ['address'])))
+    decs = []
+    for token in {t for pair in pairs for t in pair}:
+        if token not in dec_cache:
+            decs.append((token, batch.call(token, "decimals()", out_types=['uint8'])))
+    return pending, decs
+
+
+def _known_pools(pairs, fees, pool_cache):
+    for a, b in pairs:
+        aero_pool = pool_cache.get(("aero", a, b))
+        if aero_pool: yield ("aero", a, b), aero_pool, 'v2'
+        for f in fees:
+            uni_pool = pool_cache.get(("uni", a, b, f))
+            if uni_pool: yield ("uni", a, b, f), uni_pool, 'v3'
+
+
+def read_pair_prices(url, pairs, fees, dec_cache, pool_cache, session=None, engine=None, w3=None, limiter=None, registry=None):
+    """
+    Prices every (token_a, token_b) pair on Aerodrome V2 and Uniswap V3.
+    Returns {(a, b): {'aero': price or None, 'uni': [(fee, price), ...]}} where
+    prices are token_b per token_a and 'uni' lists live tiers in fee order.
+
+    With an engine (pool_state.PoolStateEngine) and w3, pool state comes from
+    the event-sourced engine (one eth_getLogs per pass) instead of re-reading
+    getReserves / slot0 for every pool. With a caught-up pool_registry.PoolRegistry,
+    pool addresses come from it instead of getPool probes.
+    """
+    batch = RPCBatch(url, session=session, limiter=limiter)
+
+    pending, decs = _prefetch_pools(batch, pairs, fees, dec_cache, pool_cache, registry)
+    if len(batch):
+        batch.execute()
+        for key, item in pending:
+            # Missing tiers are cached as None so warm passes never re-probe them
+            if item.ok:
+                pool_cache[key] = Web3.to_checksum_address(item.result) if int(item.result, 16) != 0 else None
+        for token, item in decs:
+            if item.ok: dec_cache[token] = item.result
+
+    # token0 never changes: read it once per pool
+    token0s = [(pool, batch.call(pool, "token0()", out_types=['address']))
+               for _, pool, _ in _known_pools(pairs, fees, pool_cache) if ("token0", pool) not in pool_cache]
+
+    states = {}
+    if engine is not None:
+        if token0s:
+            batch.execute()
+            for pool, item in token0s:
+                if item.ok: pool_cache[("token0", pool)] = item.result
+        for _, pool, kind in _known_pools(pairs, fees, pool_cache):
+            engine.add_pool(pool, kind)
+        engine.sync(w3)
+        for key, pool, _ in _known_pools(pairs, fees, pool_cache):
+            states[key] = engine.state(pool)
+    else:
+        reads = {}
+        for key, pool, kind in _known_pools(pairs, fees, pool_cache):
+            reads[key] = batch.call(pool, "slot0()", out_types=['uint160', 'int24']) if kind == 'v3' \
+                else batch.call(pool, "getReserves()", out_types=['uint256', 'uint256', 'uint256'])
+        if len(batch):
+            batch.execute()
+        for pool, item in token0s:
+            if item.ok: pool_cache[("token0", pool)] = item.result
+        for key, item in reads.items():
+            if not item.ok: continue
+            r = item.result
+            states[key] = {'sqrtPriceX96': r[0], 'tick': r[1]} if key[0] == "uni" else {'reserve0': r[0], 'reserve1': r[1]}
+
+    prices = {}
+    for a, b in pairs:
+        out = {'aero': None, 'uni': []}
+        prices[(a, b)] = out
+        if a not in dec_cache or b not in dec_cache:
+            continue
+        da, db = dec_cache[a], dec_cache[b]
+
+        aero_pool = pool_cache.get(("aero", a, b))
+        st, t0 = states.get(("aero", a, b)), pool_cache.get(("token0", aero_pool))
+        if st and t0:
+            p = v2_price_x128(st['reserve0'], st['reserve1'], t0.lower() == a.lower(), da, db)
+            if p: out['aero'] = to_float(p)
+
+        for f in fees:
+            uni_pool = pool_cache.get(("uni", a, b, f))
+            st, t0 = states.get(("uni", a, b, f)), pool_cache.get(("token0", uni_pool))
+            p = v3_price_x128(st['sqrtPriceX96'], t0.lower() == a.lower(), da, db) if st and t0 else 0
+            if p: out['uni'].append((f, to_float(p)))
+    return prices
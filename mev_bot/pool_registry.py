@@ -0,0 +1,254 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         FACTORY-EVENT POOL REGISTRY                  ║
+║         Every Base pool from PoolCreated logs        ║
+╚══════════════════════════════════════════════════════╝
+
+Backfills PoolCreated / PairCreated from the Aerodrome V2, Slipstream,
+Uniswap V3 / V2 and PancakeSwap V3 factories. It uses one eth_getLogs per
+block range for all factories together and then keeps following new
+blocks. Pools go into the meta_index pools table (indexed on token0,
+token1) with their dex, kind, fee / tickSpacing / stable flag. The cursor
+is stored in the same file, so a restart resumes where it left off.
+
+Only one process on a given index file follows the factories: the first to
+take INDEX_FILE.registry.lock. The others pick up the pools it writes from
+the shared SQLite file. The backfill pauses BACKFILL_PAUSE between chunks
+and runs at PRIORITY_LOW through the rate-limited pool.
+
+Lookups (pools_for, pools_for_pair, find) are in-memory dict reads. Once
+the registry has caught up with the head (ready), "is there a pool for
+A/B at fee F" no longer needs a getPool call, and "no pool" is a definite
+answer.
+"""
+import fcntl
+import threading
+import time
+from web3 import Web3
+import eth_abi
+from meta_index import get_index
+from rate_limit import PRIORITY_LOW
+
+
+def topic(signature):
+    return bytes(Web3.keccak(text=signature))
+
+
+POOL_CREATED_V3   = topic("PoolCreated(address,address,uint24,int24,address)")   # Uni V3, Pancake V3
+POOL_CREATED_CL   = topic("PoolCreated(address,address,int24,address)")          # Slipstream
+POOL_CREATED_AERO = topic("PoolCreated(address,address,bool,address,uint256)")   # Aerodrome V2
+PAIR_CREATED      = topic("PairCreated(address,address,address,uint256)")        # Uni V2 forks
+TOPICS = [POOL_CREATED_V3, POOL_CREATED_CL, POOL_CREATED_AERO, PAIR_CREATED]
+
+# factory -> dex name (kind follows from the event)
+FACTORIES = {
+    "0x420dd381b31aef6683db6b902084cb0ffece40da": "aerodrome",
+    "0x5e7bb104d84c7cb9b682aac2f3d509f5f406809a": "slipstream",
+    "0x5f6dee43078a973b77d6fe1dbb7e398fc7ddda6e": "slipstream",
+    "0x33128a8fc17869897dce68ed026d694621f6fdfd": "uniswap_v3",
+    "0x8909dc15e40173ff4699343b6eb8132c65e18ec6": "uniswap_v2",
+    "0x0bfbcf9fa4f9c56b0f40a671ad40e0805a091865": "pancake_v3",
+}
+START_BLOCK = 1_000_000   # before the first of these factories was deployed on Base
+CURSOR      = "pool_registry"
+CHUNK       = 10_000      # blocks per eth_getLogs; halved on provider range errors, regrown on success
+MIN_CHUNK   = 250
+MAX_CHUNK   = 100_000
+CONFIRMATIONS = 0         # PoolCreated cannot be reorged into a different pool address; no need to lag
+FOLLOW_INTERVAL = 2.0
+BACKFILL_PAUSE  = 0.25    # between backfill chunks, so a cold start doesn't monopolise the endpoint
+
+
+def _addr(word):
+    return '0x' + bytes(word)[-20:].hex()
+
+
+def decode_created(log):
+    """(pool, fields) for one factory event, or None for anything else."""
+    t0, topics, data = bytes(log['topics'][0]), log['topics'], bytes(log['data'])
+    dex = FACTORIES.get(log['address'].lower())
+    if dex is None or len(topics) < 3:
+        return None
+    fields = {'token0': _addr(topics[1]), 'token1': _addr(topics[2]), 'dex': dex, 'factory': log['address'].lower()}
+    if t0 == POOL_CREATED_V3:
+        spacing, pool = eth_abi.decode(['int24', 'address'], data[:64])
+        fields.update(kind='v3', fee=eth_abi.decode(['uint24'], bytes(topics[3]))[0], tick_spacing=spacing)
+    elif t0 == POOL_CREATED_CL:
+        pool = eth_abi.decode(['address'], data[:32])[0]
+        fields.update(kind='v3', tick_spacing=eth_abi.decode(['int24'], bytes(topics[3]))[0])
+    elif t0 == POOL_CREATED_AERO:
+        pool = eth_abi.decode(['address'], data[:32])[0]
+        fields.update(kind='v2', stable=int(eth_abi.decode(['bool'], bytes(topics[3]))[0]))
+    elif t0 == PAIR_CREATED:
+        pool = eth_abi.decode(['address'], data[:32])[0]
+        fields.update(kind='v2', fee=3000, stable=0)
+    else:
+        return None
+    return pool.lower(), fields
+
+
+class PoolRegistry:
+    def __init__(self, index=None, factories=FACTORIES, start_block=START_BLOCK):
+        self.index = index or get_index()
+        self.factories = factories
+        self.start_block = start_block
+        self.chunk = CHUNK
+        self.head = 0
+        self.block = self.index.cursor(CURSOR) or start_block - 1   # last block fully indexed
+        self.by_pair = {}    # (token_lo, token_hi) -> [pool, ...]
+        self.by_token = {}   # token -> [pool, ...]
+        self.lock = threading.Lock()
+        self.following = False
+        self.owner = None    # open lock file while this process is the one following the factories
+        for addr, row in self.index.pools.items():
+            if row['dex'] and row['token0'] and row['token1']:
+                self._remember(addr, row)
+
+    def _remember(self, pool, row):
+        a, b = sorted((row['token0'], row['token1']))
+        pools = self.by_pair.setdefault((a, b), [])
+        if pool not in pools:
+            pools.append(pool)
+            self.by_token.setdefault(a, []).append(pool)
+            self.by_token.setdefault(b, []).append(pool)
+
+    @property
+    def ready(self):
+        """True once the backfill has reached the last head seen."""
+        return bool(self.head) and self.block >= self.head - CONFIRMATIONS
+
+    # ───────────────────────── LOOKUPS (memory only) ─────────────────────────
+    def pool(self, addr):
+        return self.index.pool(addr)
+
+    def pools_for(self, token):
+        return [(p, self.index.pools[p]) for p in self.by_token.get(token.lower(), [])]
+
+    def pools_for_pair(self, token_a, token_b, dex=None):
+        pair = tuple(sorted((token_a.lower(), token_b.lower())))
+        rows = [(p, self.index.pools[p]) for p in self.by_pair.get(pair, [])]
+        return [(p, r) for p, r in rows if dex is None or r['dex'] == dex]
+
+    def find(self, token_a, token_b, dex, fee=None, stable=None, tick_spacing=None):
+        """Checksummed address of the matching pool, or None (definite once ready)."""
+        for pool, row in self.pools_for_pair(token_a, token_b, dex):
+            if fee is not None and row['fee'] != fee: continue
+            if stable is not None and bool(row['stable']) != bool(stable): continue
+            if tick_spacing is not None and row['tick_spacing'] != tick_spacing: continue
+            return Web3.to_checksum_address(pool)
+        return None
+
+    def fill(self, pool_cache, key):
+        """
+        Answers a pair_scan pool_cache key (("aero", a, b) / ("uni", a, b, fee)) from
+        the registry once it is ready. A tier cached as missing is re-checked, since
+        the registry also sees pools created later. Only changes are written.
+        """
+        if not self.ready or pool_cache.get(key):
+            return
+        if key[0] == "aero":
+            found = self.find(key[1], key[2], "aerodrome", stable=False)
+        else:
+            found = self.find(key[1], key[2], "uniswap_v3", fee=key[3])
+        if found or key not in pool_cache:
+            pool_cache[key] = found
+
+    # ───────────────────────── BACKFILL / FOLLOW ─────────────────────────
+    def _filter(self, from_block, to_block):
+        return {
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': [Web3.to_checksum_address(f) for f in self.factories],
+            'topics': [['0x' + t.hex() for t in TOPICS]],
+        }
+
+    def step(self, w3, head=None):
+        """Indexes one chunk towards head. Returns the number of pools added."""
+        self.head = head or w3.eth.block_number
+        start = self.block + 1
+        if start > self.head - CONFIRMATIONS:
+            return 0
+        end = min(start + self.chunk - 1, self.head - CONFIRMATIONS)
+        try:
+            logs = w3.eth.get_logs(self._filter(start, end))
+        except Exception:
+            # Range / result-size limits differ per provider: shrink and retry next step
+            if self.chunk == MIN_CHUNK: raise
+            self.chunk = max(MIN_CHUNK, self.chunk // 2)
+            return 0
+        rows = [r for r in map(decode_created, logs) if r]
+        with self.lock:
+            self.index.add_pools(rows)
+            for pool, _ in rows:
+                self._remember(pool, self.index.pools[pool])
+            self.index.set_cursor(CURSOR, end)
+            self.block = end
+        self.chunk = min(MAX_CHUNK, self.chunk * 2)
+        return len(rows)
+
+    def sync(self, w3):
+        """Backfills all the way to the current head."""
+        added = 0
+        self.head = w3.eth.block_number
+        while not self.ready:
+            added += self.step(w3, self.head)
+        return added
+
+    def _claim(self):
+        """True if this process holds the follower lock for the index file."""
+        if self.owner is None:
+            f = open(self.index.path + '.registry.lock', 'w')
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self.owner = f
+        return True
+
+    def refresh(self, w3=None):
+        """Non-owner: takes in the pools and cursor another process has written."""
+        with self.lock:
+            for pool in self.index.reload_pools():
+                row = self.index.pools[pool]
+                if row['dex'] and row['token0'] and row['token1']:
+                    self._remember(pool, row)
+            self.block = self.index.cursor(CURSOR) or self.block
+        if w3: self.head = w3.eth.block_number
+
+    def follow(self, get_w3, interval=FOLLOW_INTERVAL):
+        """
+        Background thread. The process holding the follower lock backfills, then indexes
+        new blocks; every other process refreshes from the shared file. get_w3(priority) -> Web3.
+        """
+        if self.following:
+            return self
+        self.following = True
+
+        def loop():
+            while True:
+                try:
+                    w3 = get_w3(priority=PRIORITY_LOW)
+                    if self._claim():
+                        if w3:
+                            self.step(w3)
+                            time.sleep(interval if self.ready else BACKFILL_PAUSE)
+                            continue
+                    else:
+                        self.refresh(w3)
+                except Exception:
+                    pass
+                time.sleep(interval)
+        threading.Thread(target=loop, name="pool-registry", daemon=True).start()
+        return self
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    """Process-wide registry on the process-wide metadata index."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = PoolRegistry()
+    return _REGISTRY
@@ -0,0 +1,190 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         EVENT-SOURCED POOL STATE ENGINE              ║
+║         Seed once · follow Sync / Swap / Mint / Burn ║
+╚══════════════════════════════════════════════════════╝
+
+Each pool is seeded once with a Multicall3 read (getReserves, or slot0 +
+liquidity). After that, one eth_getLogs per block brings in every V2 Sync
+and V3 / Slipstream / Pancake Swap, Mint and Burn for all watched pools.
+Those events are applied in memory, so price reads cost no RPC. The RPC
+cost of a block does not depend on how many pools are watched.
+"""
+from web3 import Web3
+import eth_abi
+from multicall import MULTICALL3, SEL_BLOCK_NUMBER, SEL_SLOT0, SEL_GET_RESERVES, selector, \
+    aggregate3, aggregate3_async, decode_slot0, decode_reserves
+
+
+def topic(signature):
+    return bytes(Web3.keccak(text=signature))
+
+
+SYNC_V2      = topic("Sync(uint112,uint112)")                                                # Uni V2 forks
+SYNC_AERO    = topic("Sync(uint256,uint256)")                                                # Aerodrome V2
+SWAP_V3      = topic("Swap(address,address,int256,int256,uint160,uint128,int24)")            # Uni V3, Slipstream
+SWAP_PANCAKE = topic("Swap(address,address,int256,int256,uint160,uint128,int24,uint128,uint128)")
+MINT_V3      = topic("Mint(address,address,int24,int24,uint128,uint256,uint256)")
+BURN_V3      = topic("Burn(address,int24,int24,uint128,uint256,uint256)")
+TOPICS       = [SYNC_V2, SYNC_AERO, SWAP_V3, SWAP_PANCAKE, MINT_V3, BURN_V3]
+
+SEL_LIQUIDITY = selector("liquidity()")
+MAX_LOG_RANGE = 500   # blocks; further behind than this we re-seed instead of replaying logs
+
+
+def _hex(b):
+    return '0x' + bytes(b).hex()
+
+
+def _topic_int24(t):
+    return eth_abi.decode(['int24'], bytes(t))[0]
+
+
+class PoolStateEngine:
+    def __init__(self, pools=None):
+        """pools: {address: 'v2' | 'v3'} (the multicall.target_pools format)."""
+        self.pools = {}
+        self.books = {}   # address -> v3_sim.TickBook, kept current from Mint / Burn
+        self.block = 0
+        for addr, kind in (pools or {}).items():
+            self.add_pool(addr, kind)
+
+    def add_pool(self, addr, kind, token0=None):
+        addr = addr.lower()
+        if addr not in self.pools:
+            self.pools[addr] = {'kind': kind, 'token0': token0, 'seeded': None, 'state': None}
+        elif token0 and not self.pools[addr]['token0']:
+            self.pools[addr]['token0'] = token0
+
+    def state(self, addr):
+        p = self.pools.get(addr.lower())
+        return p['state'] if p else None
+
+    def snapshot(self):
+        """Same shape as multicall.read_pool_states, built from memory."""
+        return {'block': self.block, 'pools': {a: p['state'] for a, p in self.pools.items() if p['state']}}
+
+    # ───────────────────────── SEEDING ─────────────────────────
+    def _seed_calls(self, addrs):
+        calls = [(MULTICALL3, False, SEL_BLOCK_NUMBER)]
+        for addr in addrs:
+            target = Web3.to_checksum_address(addr)
+            if self.pools[addr]['kind'] == 'v3':
+                calls += [(target, True, SEL_SLOT0), (target, True, SEL_LIQUIDITY)]
+            else:
+                calls.append((target, True, SEL_GET_RESERVES))
+        return calls
+
+    def _apply_seed(self, addrs, results):
+        block = eth_abi.decode(['uint256'], results[0][1])[0]
+        i = 1
+        for addr in addrs:
+            p = self.pools[addr]
+            if p['kind'] == 'v3':
+                (ok_s, slot0), (ok_l, liq) = results[i], results[i + 1]
+                i += 2
+                if ok_s and ok_l and len(slot0) >= 64:
+                    p['state'] = dict(decode_slot0(slot0), liquidity=eth_abi.decode(['uint128'], liq)[0])
+                    p['seeded'] = block
+            else:
+                ok, data = results[i]
+                i += 1
+                if ok and len(data) >= 64:
+                    p['state'] = decode_reserves(data)
+                    p['seeded'] = block
+        if not self.block:
+            self.block = block
+        return block
+
+    def unseeded(self):
+        return [a for a, p in self.pools.items() if p['seeded'] is None]
+
+    def seed(self, w3, addrs=None):
+        addrs = self.unseeded() if addrs is None else addrs
+        if addrs:
+            return self._apply_seed(addrs, aggregate3(w3, self._seed_calls(addrs)))
+
+    async def seed_async(self, aw3, addrs=None):
+        addrs = self.unseeded() if addrs is None else addrs
+        if addrs:
+            return self._apply_seed(addrs, await aggregate3_async(aw3, self._seed_calls(addrs)))
+
+    # ───────────────────────── LOGS ─────────────────────────
+    def log_filter(self, to_block):
+        return {
+            'fromBlock': self.block + 1,
+            'toBlock': to_block,
+            'address': [Web3.to_checksum_address(a) for a in self.pools],
+            'topics': [[_hex(t) for t in TOPICS]],
+        }
+
+    def fetch_logs(self, w3, to_block):
+        """Read-only: {'block': to_block, 'logs': [...]} for everything after self.block."""
+        if to_block <= self.block: return {'block': to_block, 'logs': []}
+        return {'block': to_block, 'logs': list(w3.eth.get_logs(self.log_filter(to_block)))}
+
+    async def fetch_logs_async(self, aw3, to_block):
+        if to_block <= self.block: return {'block': to_block, 'logs': []}
+        return {'block': to_block, 'logs': list(await aw3.eth.get_logs(self.log_filter(to_block)))}
+
+    def apply_update(self, update):
+        """Applies fetched logs in chain order; returns the set of pools that changed."""
+        changed = set()
+        if update['block'] <= self.block:
+            return changed
+        # Not reorg-aware: eth_getLogs never returns removed logs, so a reorged-away
+        # event stays applied until the next re-seed (sync past MAX_LOG_RANGE)
+        for log in sorted(update['logs'], key=lambda l: (l['blockNumber'], l['logIndex'])):
+            if self.apply_log(log):
+                changed.add(log['address'].lower())
+        self.block = update['block']
+        return changed
+
+    def apply_log(self, log):
+        p = self.pools.get(log['address'].lower())
+        if not p or p['state'] is None or log['blockNumber'] <= p['seeded']:
+            return False
+        t0, data, s = bytes(log['topics'][0]), bytes(log['data']), p['state']
+        if t0 in (SYNC_V2, SYNC_AERO):
+            s['reserve0'], s['reserve1'] = eth_abi.decode(['uint256', 'uint256'], data[:64])
+        elif t0 in (SWAP_V3, SWAP_PANCAKE):
+            _, _, s['sqrtPriceX96'], s['liquidity'], s['tick'] = eth_abi.decode(
+                ['int256', 'int256', 'uint160', 'uint128', 'int24'], data[:160])
+        elif t0 in (MINT_V3, BURN_V3):
+            # Only liquidity added/removed around the current tick is active
+            lower, upper = _topic_int24(log['topics'][2]), _topic_int24(log['topics'][3])
+            amount = eth_abi.decode(['uint128'], data[32:64] if t0 == MINT_V3 else data[:32])[0]
+            delta = amount if t0 == MINT_V3 else -amount
+            if lower <= s['tick'] < upper:
+                s['liquidity'] += delta
+            book = self.books.get(log['address'].lower())
+            if book:
+                book.update(lower, upper, delta)
+        else:
+            return False
+        return True
+
+    # ───────────────────────── SYNC ─────────────────────────
+    def needs_reseed(self, to_block):
+        """True when replaying logs up to to_block is not possible (never seeded, or too far behind)."""
+        return not self.block or to_block - self.block > MAX_LOG_RANGE
+
+    def sync(self, w3, to_block=None):
+        """Seeds new pools, then replays logs up to to_block. Returns changed pools."""
+        to_block = to_block or w3.eth.block_number
+        if self.needs_reseed(to_block):
+            self.block = 0
+            self.books.clear()
+            return set(self.pools) if self.seed(w3, list(self.pools)) else set()
+        seeded = set(self.unseeded())
+        self.seed(w3)
+        return seeded | self.apply_update(self.fetch_logs(w3, to_block))
+
+    async def sync_async(self, aw3, to_block):
+        if self.needs_reseed(to_block):
+            self.block = 0
+            self.books.clear()
+            return set(self.pools) if await self.seed_async(aw3, list(self.pools)) else set()
+        seeded = set(self.unseeded())
+        await self.seed_async(aw3)
+        return seeded | self.apply_update(await self.fetch_logs_async(aw3, to_block))
@@ -0,0 +1,109 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         FIXED-POINT POOL PRICING                     ║
+║         Exact Q128 integers · float only for display ║
+╚══════════════════════════════════════════════════════╝
+
+Prices are exact Q128 integers: the price of the base token in the quote
+token, times 2**128. They are built straight from sqrtPriceX96 or raw
+reserves. Decimal scale factors are computed once per (base, quote) decimals
+pair. Spreads are integer parts-per-million, so a 1% threshold is compared
+exactly. to_float() exists for logs and messages only.
+
+The numpy path (v3_prices / v2_prices / spreads_ppm) prices whole arrays of
+pools in one call in float64 (about 16 significant digits). It is meant for
+screening: anything close to a threshold gets confirmed with the exact
+integers.
+"""
+from functools import lru_cache
+import numpy as np
+
+Q96  = 1 << 96
+Q128 = 1 << 128
+PPM  = 1_000_000
+
+
+@lru_cache(maxsize=None)
+def decimal_scale(dec_base, dec_quote):
+    """(num, den) turning a raw quote/base ratio into a human one: raw * 10**dec_base / 10**dec_quote."""
+    diff = dec_base - dec_quote
+    return (10 ** diff, 1) if diff >= 0 else (1, 10 ** -diff)
+
+
+# ───────────────────────── EXACT ─────────────────────────
+def v3_price_x128(sqrt_price_x96, base_is_token0=True, dec_base=0, dec_quote=0):
+    """Q128 price of base in quote from slot0's sqrtPriceX96 (0 for an uninitialised pool)."""
+    if not sqrt_price_x96:
+        return 0
+    num, den = decimal_scale(dec_base, dec_quote)
+    sq = sqrt_price_x96 * sqrt_price_x96  # token1/token0 as Q192
+    if base_is_token0:
+        return (sq * num) // (den << 64)
+    return (num << 320) // (sq * den)
+
+
+def v2_price_x128(reserve0, reserve1, base_is_token0=True, dec_base=0, dec_quote=0):
+    """Q128 mid price of base in quote from raw reserves (0 for an empty pool)."""
+    if not reserve0 or not reserve1:
+        return 0
+    num, den = decimal_scale(dec_base, dec_quote)
+    r_base, r_quote = (reserve0, reserve1) if base_is_token0 else (reserve1, reserve0)
+    return ((r_quote * num) << 128) // (r_base * den)
+
+
+def pool_price_x128(state, base_is_token0=True, dec_base=0, dec_quote=0):
+    """Prices a pool_state / multicall snapshot entry of either kind."""
+    if not state:
+        return 0
+    if 'sqrtPriceX96' in state:
+        return v3_price_x128(state['sqrtPriceX96'], base_is_token0, dec_base, dec_quote)
+    return v2_price_x128(state['reserve0'], state['reserve1'], base_is_token0, dec_base, dec_quote)
+
+
+def spread_ppm(p_from, p_to):
+    """Signed (p_to - p_from) / p_from in parts per million, rounded toward zero."""
+    diff = (p_to - p_from) * PPM
+    return diff // p_from if diff >= 0 else -((-diff) // p_from)
+
+
+def pct_to_ppm(pct):
+    return round(pct * 10_000)
+
+
+def to_float(price_x128):
+    """Display only: int / int true division is correctly rounded."""
+    return price_x128 / Q128
+
+
+# ───────────────────────── VECTORIZED (float64 screen) ─────────────────────────
+def _scale_f64(dec_base, dec_quote):
+    if dec_base is None:
+        return 1.0
+    return 10.0 ** (np.asarray(dec_base, dtype=np.float64) - np.asarray(dec_quote, dtype=np.float64))
+
+
+def v3_prices(sqrt_prices_x96, base_is_token0, dec_base=None, dec_quote=None):
+    """Array of base-in-quote prices for many V3 pools; 0 where the pool is uninitialised."""
+    sq = np.asarray(sqrt_prices_x96, dtype=np.float64) / Q96
+    ratio = sq * sq
+    with np.errstate(divide='ignore'):
+        price = np.where(np.asarray(base_is_token0, dtype=bool), ratio, 1.0 / ratio)
+    return np.where(ratio > 0, price, 0.0) * _scale_f64(dec_base, dec_quote)
+
+
+def v2_prices(reserve0, reserve1, base_is_token0, dec_base=None, dec_quote=None):
+    r0 = np.asarray(reserve0, dtype=np.float64)
+    r1 = np.asarray(reserve1, dtype=np.float64)
+    t0 = np.asarray(base_is_token0, dtype=bool)
+    base, quote = np.where(t0, r0, r1), np.where(t0, r1, r0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price = quote / base
+    return np.where((r0 > 0) & (r1 > 0), price, 0.0) * _scale_f64(dec_base, dec_quote)
+
+
+def spreads_ppm(p_from, p_to):
+    """Vectorized spread_ppm; NaN where either side has no price."""
+    p_from = np.asarray(p_from, dtype=np.float64)
+    p_to = np.asarray(p_to, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((p_from > 0) & (p_to > 0), (p_to - p_from) / p_from * PPM, np.nan)
@@ -8,6 +8,8 @@
 from web3 import Web3
 import json, time, os, requests, eth_abi
 from dotenv import load_dotenv
+from block_cache import CACHE, CachedHTTPProvider
+from gas_model import get_gas_model, route_key
 
 load_dotenv()
 
@@ -17,8 +19,10 @@ BOT_ADDRESS      = Web3.to_checksum_address(os.getenv("BOT_ADDRESS"))
 CONTRACT_ADDRESS = Web3.to_checksum_address(os.getenv("FLASH_ARB_CONTRACT"))
 TG_TOKEN         = os.getenv("TELEGRAM_BOT_TOKEN")
 TG_CHAT          = os.getenv("TELEGRAM_CHAT_ID")
-RPC_URL          = "https://base-mainnet.g.alchemy.com/v2/USbVaOTSKlqazrRw7rjg2"
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+RPC_URL          = os.getenv("MEV_RPC_URLS", "https://base-mainnet.g.alchemy.com/v2/USbVaOTSKlqazrRw7rjg2").split(",")[0]
+w3 = Web3(CachedHTTPProvider(RPC_URL))  # same-block repeat reads come from memory
+GAS = get_gas_model()  # liquidation gas learned per route instead of a flat 1.2M limit
+LIQ_DEFAULT_GAS = 1200000
 
 # Assets
 WETH = Web3.to_checksum_address("0x4200000000000000000000000000000000000006")
@@ -48,18 +52,19 @@ def fire_aave_liquidation(victim, debt_raw):
     # params: bool isLiq, address collateralAsset, uint24 fee, bool buyAero, address victim
     # Assuming USDC debt, WETH collateral for now (most common)
     params = eth_abi.encode(['bool', 'address', 'uint24', 'bool', 'address'], [True, WETH, 3000, False, victim])
-    
-    tx = contract.functions.execute(USDC, int(debt_raw), params).build_transaction({
-        'from': BOT_ADDRESS,
-        'nonce': w3.eth.get_transaction_count(BOT_ADDRESS),
-        'gas': 1200000,
-        'maxFeePerGas': int(w3.eth.gas_price * 1.5),
-        'maxPriorityFeePerGas': w3.to_wei('0.1', 'gwei'),
-    })
+    fn = contract.functions.execute(USDC, int(debt_raw), params)
+    route = route_key(CONTRACT_ADDRESS, "aave_v3", "liq", 3000)
     
     try:
-        # Simulate
-        w3.eth.call(tx)
+        # Simulate (estimateGas reverts like eth_call) and learn the route's gas
+        GAS.observe(route, fn.estimate_gas({'from': BOT_ADDRESS}))
+        tx = fn.build_transaction({
+            'from': BOT_ADDRESS,
+            'nonce': w3.eth.get_transaction_count(BOT_ADDRESS),
+            'gas': GAS.limit(route, LIQ_DEFAULT_GAS),
+            'maxFeePerGas': int(w3.eth.gas_price * 1.5),
+            'maxPriorityFeePerGas': w3.to_wei('0.1', 'gwei'),
+        })
         signed = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
         h = w3.eth.send_raw_transaction(signed.raw_transaction)
         send_tg(f"🏹 LIQUIDATION ATTEMPT SENT!\nVictim: {victim}\nTx: {h.hex()}")
@@ -91,6 +96,7 @@ def scan():
             targets = set([line.strip() for line in f if line.strip()])
     
     aave = w3.eth.contract(address=AAVE_POOL, abi=AAVE_ABI)
+    CACHE.advance(w3.eth.block_number)
     print(f"[{time.strftime('%H:%M:%S')}] Monitoring {len(targets)} active whales...")
     
     count = 0
@@ -0,0 +1,144 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         ADAPTIVE PER-ENDPOINT RATE LIMITER           ║
+║         Token bucket · AIMD on 429 · priority queue  ║
+╚══════════════════════════════════════════════════════╝
+
+Each endpoint gets a token bucket sized to the provider's published quota.
+A 429 / -32005 halves the refill rate. Every successful answer wins a little
+of it back, up to the quota. When the bucket is empty, callers wait in a
+priority queue instead of being dropped, so sends jump ahead of scans and
+scans jump ahead of liveness probes. Throughput settles just under the
+provider ceiling instead of alternating between bursts and lockouts.
+"""
+import heapq
+import threading
+import time
+
+# ───────────────────────── QUOTAS ─────────────────────────
+# Sustained requests/second per provider (free tiers); first substring match wins
+PROVIDER_QUOTAS = [
+    ("mainnet.base.org",     10),
+    ("rpc.ankr.com",         30),
+    ("publicnode.com",       20),
+    ("blockpi.network",      10),
+    ("1rpc.io",              10),
+    ("tenderly.co",          10),
+    ("lavanet.xyz",          10),
+    ("llamarpc.com",         10),
+    ("alchemy.com",          25),
+    ("quiknode.pro",         25),
+    ("127.0.0.1",          1000),
+    ("localhost",          1000),
+]
+DEFAULT_QUOTA = 10
+
+# ───────────────────────── TUNING ─────────────────────────
+DECREASE          = 0.5    # multiplicative cut on every throttle...
+CUT_COOLDOWN      = 1.0    # ...at most once per second (one burst of 429s = one cut)
+MIN_RATE_FRACTION = 0.05   # never drop below 5% of the quota
+RECOVER_STEP      = 0.01   # each success wins back 1% of the quota
+
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 1, 2
+
+# Methods that must not wait behind a scan
+METHOD_PRIORITY = {
+    'eth_sendRawTransaction': PRIORITY_HIGH,
+    'eth_getTransactionCount': PRIORITY_HIGH,
+    'eth_estimateGas': PRIORITY_HIGH,
+}
+
+
+def quota_for(url):
+    for fragment, rps in PROVIDER_QUOTAS:
+        if fragment in url:
+            return rps
+    return DEFAULT_QUOTA
+
+
+class RateLimiter:
+    def __init__(self, quota, burst=None):
+        self.quota = float(quota)
+        self.rate = self.quota
+        self.burst = float(burst or max(1.0, self.quota))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.last_cut = 0.0
+        self.cond = threading.Condition()
+        self.waiters = []  # heap of (priority, seq)
+        self.seq = 0
+        self.counters = {'granted': 0, 'queued': 0, 'timeouts': 0, 'throttled': 0, 'cuts': 0, 'wait_seconds': 0.0}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # ── admission ──
+    def try_acquire(self, priority=PRIORITY_NORMAL, cost=1):
+        """Takes a token only if one is free right now and nobody more urgent is queued."""
+        cost = min(cost, self.burst)
+        with self.cond:
+            if self.waiters and self.waiters[0][0] <= priority:
+                return False
+            self._refill(time.monotonic())
+            if self.tokens < cost:
+                return False
+            self.tokens -= cost
+            self.counters['granted'] += 1
+            return True
+
+    def acquire(self, priority=PRIORITY_NORMAL, cost=1, timeout=None):
+        """Waits in priority order for a token; False only if timeout expires first."""
+        cost = min(cost, self.burst)
+        start = time.monotonic()
+        with self.cond:
+            self.seq += 1
+            me = (priority, self.seq)
+            heapq.heappush(self.waiters, me)
+            queued = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    head = self.waiters[0] == me
+                    if head and self.tokens >= cost:
+                        self.tokens -= cost
+                        self.counters['granted'] += 1
+                        self.counters['wait_seconds'] += now - start
+                        return True
+                    remaining = None if timeout is None else timeout - (now - start)
+                    if remaining is not None and remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        return False
+                    if not queued:
+                        queued = True
+                        self.counters['queued'] += 1
+                    # The head sleeps until its tokens accrue; everyone else until the head leaves
+                    waits = [w for w in ((cost - self.tokens) / self.rate if head else None, remaining) if w is not None]
+                    self.cond.wait(min(waits) if waits else None)
+            finally:
+                self.waiters.remove(me)
+                heapq.heapify(self.waiters)
+                self.cond.notify_all()
+
+    # ── feedback ──
+    def on_throttle(self):
+        with self.cond:
+            now = time.monotonic()
+            self.counters['throttled'] += 1
+            self._refill(now)
+            self.tokens = 0.0
+            if now - self.last_cut >= CUT_COOLDOWN:
+                self.rate = max(self.quota * MIN_RATE_FRACTION, self.rate * DECREASE)
+                self.last_cut = now
+                self.counters['cuts'] += 1
+
+    def on_success(self):
+        if self.rate < self.quota:
+            with self.cond:
+                self._refill(time.monotonic())
+                self.rate = min(self.quota, self.rate + self.quota * RECOVER_STEP)
+
+    def report(self):
+        with self.cond:
+            return dict(self.counters, rate=self.rate, quota=self.quota, queued_now=len(self.waiters))
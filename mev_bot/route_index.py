@@ -0,0 +1,97 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         INCREMENTAL ROUTE INDEX                      ║
+║         Re-score only what a block actually touched  ║
+╚══════════════════════════════════════════════════════╝
+
+A route is anything scored from pool state: a two-leg TARGETS pair, or a
+longer cycle from cycle_graph. The index maps each pool to the routes that
+use it. Each block, PoolStateEngine reports which pools changed, and only
+the routes that touch those pools are re-scored. Scores are kept in a
+max-heap with lazy invalidation, so the best routes come out first. The
+cost of a block grows with the number of pool updates, not with the number
+of routes watched.
+
+    ROUTES = RouteIndex()
+    ROUTES.add("VVV", [aero_pool, uni_pool], data)
+    for key in ROUTES.affected(ENGINE.apply_update(update)):
+        ROUTES.score(key, score_of(ROUTES.routes[key]))
+    for key, score in ROUTES.top(min_score=0): ...
+"""
+import heapq
+from itertools import count
+
+
+class RouteIndex:
+    def __init__(self):
+        self.routes = {}     # key -> payload (TARGETS entry, cycle dict, ...)
+        self.pools = {}      # key -> (pool, ...)
+        self.by_pool = {}    # pool -> {key, ...}
+        self.scores = {}     # key -> latest score (None = not scorable)
+        self.heap = []       # (-score, seq, key); stale entries skipped on pop
+        self.seq = count()
+
+    def __len__(self):
+        return len(self.routes)
+
+    def add(self, key, pools, payload=None):
+        if key in self.routes:
+            self.remove(key)
+        self.routes[key] = payload
+        self.pools[key] = tuple(p.lower() for p in pools)
+        for pool in self.pools[key]:
+            self.by_pool.setdefault(pool, set()).add(key)
+
+    def remove(self, key):
+        for pool in self.pools.pop(key, ()):
+            keys = self.by_pool.get(pool)
+            if keys:
+                keys.discard(key)
+                if not keys: del self.by_pool[pool]
+        self.routes.pop(key, None)
+        self.scores.pop(key, None)
+
+    def affected(self, changed):
+        """Routes that use any of the changed pools."""
+        keys = set()
+        for pool in changed:
+            keys |= self.by_pool.get(pool.lower(), set())
+        return keys
+
+    # ───────────────────────── PRIORITY QUEUE ─────────────────────────
+    def score(self, key, score):
+        """Records a route's new score; None takes it out of the queue until the next one."""
+        if key not in self.routes:
+            return
+        self.scores[key] = score
+        if score is not None:
+            heapq.heappush(self.heap, (-score, next(self.seq), key))
+        if len(self.heap) > 4 * len(self.routes) + 64:
+            self._compact()
+
+    def _live(self, entry):
+        neg, _, key = entry
+        return self.scores.get(key) == -neg
+
+    def _compact(self):
+        # Drop superseded entries; keep one per route
+        seen, heap = set(), []
+        for entry in sorted(self.heap):
+            if entry[2] not in seen and self._live(entry):
+                seen.add(entry[2])
+                heap.append(entry)
+        self.heap = heap   # a sorted list is already a heap
+
+    def top(self, min_score=float('-inf'), limit=None):
+        """[(key, score), ...] best first, every route scoring at least min_score. Leaves the queue intact."""
+        out, keep, seen = [], [], set()
+        while self.heap and -self.heap[0][0] >= min_score and (limit is None or len(out) < limit):
+            entry = heapq.heappop(self.heap)
+            if entry[2] in seen or not self._live(entry):
+                continue
+            seen.add(entry[2])
+            keep.append(entry)
+            out.append((entry[2], -entry[0]))
+        for entry in keep:
+            heapq.heappush(self.heap, entry)
+        return out
@@ -0,0 +1,95 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         JSON-RPC BATCH TRANSPORT                     ║
+║         Many reads, one HTTP POST                    ║
+╚══════════════════════════════════════════════════════╝
+
+Collects reads into a JSON-RPC batch array and sends them together. Every
+item keeps its own result or error, so one reverted fee-tier probe does not
+sink the rest of the batch. With a limiter, each chunk waits for as many
+tokens as it has items, because providers bill batches per call.
+"""
+import requests
+import eth_abi
+from multicall import selector
+
+MAX_BATCH = 100  # Most public Base endpoints cap batches at 100 items
+
+
+class BatchError(Exception):
+    """The endpoint rejected the batch as a whole (HTTP error or non-array reply)."""
+
+
+class BatchItem:
+    __slots__ = ('method', 'params', 'decoder', 'result', 'error')
+
+    def __init__(self, method, params, decoder=None):
+        self.method = method
+        self.params = params
+        self.decoder = decoder
+        self.result = None
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.result is not None
+
+
+class RPCBatch:
+    def __init__(self, url, timeout=8, session=None, max_batch=MAX_BATCH, limiter=None):
+        self.url = url
+        self.limiter = limiter
+        self.timeout = timeout
+        self.session = session or requests
+        self.max_batch = max_batch
+        self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, method, params, decoder=None):
+        item = BatchItem(method, params, decoder)
+        self.items.append(item)
+        return item
+
+    def call(self, to, signature, arg_types=(), args=(), out_types=None, block='latest'):
+        """Queues an eth_call; the result is decoded with out_types (single values are unwrapped)."""
+        data = selector(signature) + (eth_abi.encode(list(arg_types), list(args)) if arg_types else b'')
+
+        def decode(raw):
+            out = eth_abi.decode(list(out_types), bytes.fromhex(raw[2:]))
+            return out[0] if len(out) == 1 else out
+
+        return self.add('eth_call', [{'to': to, 'data': '0x' + data.hex()}, block], decode if out_types else None)
+
+    def execute(self):
+        """Sends every queued item and returns them with result/error filled in."""
+        items, self.items = self.items, []
+        for start in range(0, len(items), self.max_batch):
+            self._send(items[start:start + self.max_batch])
+        return items
+
+    def _send(self, chunk):
+        payload = [{'jsonrpc': '2.0', 'id': i, 'method': it.method, 'params': it.params} for i, it in enumerate(chunk)]
+        if self.limiter:
+            self.limiter.acquire(cost=len(chunk))
+        resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+        if resp.status_code != 200:
+            if self.limiter and resp.status_code == 429: self.limiter.on_throttle()
+            raise BatchError(f"HTTP {resp.status_code}")
+        body = resp.json()
+        if not isinstance(body, list):
+            raise BatchError(body.get('error') if isinstance(body, dict) else body)
+
+        by_id = {r.get('id'): r for r in body if isinstance(r, dict)}
+        for i, item in enumerate(chunk):
+            r = by_id.get(i)
+            if r is None:
+                item.error = 'missing from batch reply'
+            elif r.get('error') is not None:
+                item.error = r['error']
+            else:
+                try:
+                    item.result = item.decoder(r['result']) if item.decoder else r['result']
+                except Exception as e:
+                    item.error = f"decode: {e}"
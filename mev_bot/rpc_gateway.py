@@ -0,0 +1,208 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         LOCAL RPC GATEWAY                            ║
+║         One upstream budget for every bot process    ║
+╚══════════════════════════════════════════════════════╝
+
+Every bot process points its RPC URL at this gateway (MEV_RPC_URLS). The
+gateway:
+- merges identical requests across processes while they are in flight
+- answers same-block repeat reads from memory (block_cache)
+- packs reads that arrive within a few ms into one upstream JSON-RPC batch
+- sends through the shared router, so each upstream key has one token
+  bucket no matter how many bots are running
+Transactions skip the batcher and go out at once at high priority.
+
+    python3 mev_bot/rpc_gateway.py &
+    python3 mev_bot/rpc_gateway.py --wait     # exits 0 once the gateway answers
+    MEV_RPC_URLS=http://127.0.0.1:8547 python3 mev_bot/radar.py
+
+GET /stats returns cache, batch and per-upstream limiter counters.
+"""
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from block_cache import CACHE
+from rpc_batch import RPCBatch, MAX_BATCH
+from rpc_pool import get_pool
+from rpc_router import is_rate_limit
+
+# ───────────────────────── CONFIG ─────────────────────────
+GATEWAY_HOST  = os.getenv("MEV_GATEWAY_HOST", "127.0.0.1")
+GATEWAY_PORT  = int(os.getenv("MEV_GATEWAY_PORT", "8547"))
+UPSTREAM_URLS = [u for u in os.getenv("MEV_UPSTREAM_URLS", "").split(",") if u] or [
+    "https://base-mainnet.g.alchemy.com/v2/USbVaOTSKlqazrRw7rjg2",
+    "https://rpc.ankr.com/base/f7ad576d9633a69e5bd0548cc5b3ee550aa73b2cef04945136af53e95629668f",
+    "https://base.llamarpc.com",
+    "https://1rpc.io/base",
+    "https://mainnet.base.org",
+]
+BATCH_WINDOW   = 0.003   # seconds a read waits for company before the batch goes out
+HEAD_POLL      = 0.5     # seconds between head polls (Base blocks are 2 s)
+REQUEST_TIMEOUT = 15
+DIRECT_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction'}
+READY_TIMEOUT  = 60      # seconds --wait polls before giving up
+
+
+class Gateway:
+    def __init__(self, upstreams, batch_window=BATCH_WINDOW):
+        self.pool = get_pool(upstreams, request_kwargs={'timeout': 8})
+        self.router = self.pool.router
+        self.batch_window = batch_window
+        self.queue = queue.Queue()
+        self.flushers = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gw-flush")
+        self.workers = ThreadPoolExecutor(max_workers=32, thread_name_prefix="gw-item")  # never blocks a flusher
+        self.head = 0
+        self.head_at = 0.0
+        self.counters = {'requests': 0, 'direct': 0, 'head_hits': 0, 'upstream_batches': 0, 'upstream_items': 0}
+
+    def start(self):
+        threading.Thread(target=self._batch_loop, name="gw-batcher", daemon=True).start()
+        threading.Thread(target=self._follow_heads, name="gw-heads", daemon=True).start()
+        return self
+
+    # ── heads ──
+    def _follow_heads(self):
+        while True:
+            try:
+                resp = self.router.request('eth_blockNumber', [])
+                self._see_head(int(resp['result'], 16))
+            except Exception:
+                pass
+            time.sleep(HEAD_POLL)
+
+    def _see_head(self, n):
+        if n >= self.head:
+            self.head, self.head_at = n, time.monotonic()
+        CACHE.advance(n)
+
+    # ── upstream batching ──
+    def submit(self, method, params):
+        fut = Future()
+        self.queue.put((method, params, fut))
+        return fut.result(REQUEST_TIMEOUT)
+
+    def _batch_loop(self):
+        while True:
+            items = [self.queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(items) < MAX_BATCH:
+                try:
+                    items.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self.flushers.submit(self._flush, items)
+
+    def _flush(self, items):
+        last_error = None
+        for url in self.router.ranked()[:2]:
+            batch = RPCBatch(url, session=self.pool.session(url), limiter=self.pool.limiter(url))
+            entries = [batch.add(method, params) for method, params, _ in items]
+            start = time.perf_counter()
+            try:
+                batch.execute()
+            except Exception as e:
+                self.router.record(url, time.perf_counter() - start, e)
+                last_error = e
+                continue
+            throttled = next((it.error for it in entries if it.error is not None and is_rate_limit(it.error)), None)
+            self.router.record(url, time.perf_counter() - start, throttled)
+            self.counters['upstream_batches'] += 1
+            self.counters['upstream_items'] += len(entries)
+            for (_, _, fut), it in zip(items, entries):
+                fut.set_result({'jsonrpc': '2.0', 'id': 0, 'error': it.error} if it.error is not None
+                               else {'jsonrpc': '2.0', 'id': 0, 'result': it.result})
+            return
+        for _, _, fut in items:
+            fut.set_exception(last_error or ConnectionError("no upstream available"))
+
+    # ── client requests ──
+    def handle(self, req):
+        self.counters['requests'] += 1
+        method, params = req.get('method'), req.get('params', [])
+        try:
+            if method in DIRECT_METHODS:
+                self.counters['direct'] += 1
+                resp = self.router.request(method, params)
+            elif method == 'eth_blockNumber' and self.head and time.monotonic() - self.head_at < HEAD_POLL:
+                self.counters['head_hits'] += 1
+                resp = {'result': hex(self.head)}
+            else:
+                resp = CACHE.request(method, params, lambda: self.submit(method, params))
+        except Exception as e:
+            resp = {'error': {'code': -32603, 'message': f"gateway: {str(e)[:120]}"}}
+        return {'jsonrpc': '2.0', 'id': req.get('id'), **{k: v for k, v in resp.items() if k in ('result', 'error')}}
+
+    def handle_body(self, body):
+        if not isinstance(body, list):
+            return self.handle(body)
+        # Items of a client batch are resolved concurrently so they share upstream batches
+        return list(self.workers.map(self.handle, body)) if len(body) > 1 else [self.handle(r) for r in body]
+
+    def stats(self):
+        return {'gateway': dict(self.counters, head=self.head), 'cache': CACHE.report(), 'upstreams': self.router.report()}
+
+
+def serve(gateway, host=GATEWAY_HOST, port=GATEWAY_PORT):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, obj):
+            data = json.dumps(obj).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            try:
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            except ValueError:
+                return self._send({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': 'parse error'}})
+            self._send(gateway.handle_body(body))
+
+        def do_GET(self):
+            self._send(gateway.stats())
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def wait_serving(url, timeout=READY_TIMEOUT):
+    """Polls url with eth_blockNumber until the gateway answers it; False on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            r = requests.post(url, json={'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}, timeout=2)
+            if 'result' in r.json(): return True
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['--wait']:
+        raise SystemExit(0 if wait_serving(f"http://127.0.0.1:{GATEWAY_PORT}") else f"RPC gateway not answering on port {GATEWAY_PORT}")
+    print(__doc__)
+    gateway = Gateway(UPSTREAM_URLS).start()
+    try:
+        server = serve(gateway)
+    except OSError as e:
+        # Another process already runs the gateway on this port: the bots use that one
+        print(f"Gateway not started: {e}")
+        raise SystemExit(0)
+    gateway.pool.wait_ready()
+    print(f"🔀 RPC gateway on http://{GATEWAY_HOST}:{GATEWAY_PORT} -> {len(UPSTREAM_URLS)} upstreams")
+    server.serve_forever()
@@ -3,6 +3,7 @@ import requests
 import time
 from web3 import Web3
 from dotenv import load_dotenv
+from rpc_router import RPCRouter
 import os
 
 load_dotenv("mev_bot/.env")
@@ -138,49 +139,27 @@ def create_rpc_rotation_class():
     class RPCRotator:
         def __init__(self, rpc_list):
             self.rpc_list = rpc_list
-            self.current_index = 0
+            # Selection is driven by measured latency / errors / 429s, not call counts
+            self.router = RPCRouter(rpc_list)
             self.w3_instances = {}
-            self.last_used = {}
-            self.rate_limits = {}
             
             # Initialize Web3 instances
             for rpc in rpc_list:
-                self.w3_instances[rpc] = Web3(Web3.HTTPProvider(rpc))
-                self.last_used[rpc] = 0
-                self.rate_limits[rpc] = {'calls': 0, 'window_start': time.time()}
+                self.w3_instances[rpc] = Web3(self.router.providers[rpc])
         
         def get_w3(self):
-            """Get next available Web3 instance"""
-            best_rpc = self._get_best_rpc()
-            self.rate_limits[best_rpc]['calls'] += 1
-            self.last_used[best_rpc] = time.time()
-            return self.w3_instances[best_rpc]
+            """Get a Web3 instance that routes every request to the best live RPC"""
+            return self.router.get_w3()
         
         def _get_best_rpc(self):
-            """Select best RPC based on performance and rate limits"""
-            current_time = time.time()
-            
-            # Reset rate limit windows every 60 seconds
-            for rpc in self.rpc_list:
-                if current_time - self.rate_limits[rpc]['window_start'] > 60:
-                    self.rate_limits[rpc] = {'calls': 0, 'window_start': current_time}
-            
-            # Find RPC with lowest usage
-            best_rpc = None
-            min_calls = float('inf')
-            
-            for rpc in self.rpc_list:
-                if self.rate_limits[rpc]['calls'] < min_calls:
-                    min_calls = self.rate_limits[rpc]['calls']
-                    best_rpc = rpc
-            
-            return best_rpc
+            """Select best RPC based on latency, error rate and recent rate limits"""
+            return self.router.best()
         
         def handle_rate_limit(self, rpc):
             """Handle rate limit for specific RPC"""
             print(f"⚠️ Rate limit hit for {rpc}")
-            # Add delay and try next RPC
-            time.sleep(1)
+            # Halves this endpoint's token rate; callers queue on the limiter instead of sleeping
+            self.router.record(rpc, 0.0, {'code': -32005, 'message': 'rate limit'})
     
     return RPCRotator
 
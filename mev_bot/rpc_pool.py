@@ -0,0 +1,128 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         PROCESS-WIDE RPC CONNECTION POOL             ║
+║         Keep-alive sessions · background liveness    ║
+╚══════════════════════════════════════════════════════╝
+
+One persistent requests.Session per endpoint (TLS is negotiated once), and a
+daemon thread that probes every endpoint with eth_blockNumber. The probe feeds
+the router's latency/error stats and benches endpoints that fall behind the
+chain head, so get_w3() never needs an is_connected() round trip.
+"""
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from rpc_router import RPCRouter
+from rate_limit import PRIORITY_LOW
+from block_cache import CACHE
+from http2_provider import TRANSPORT, http2_client
+
+PROBE_INTERVAL = 5     # seconds between liveness sweeps
+MAX_BLOCK_LAG  = 3     # Base blocks (2 s each) an endpoint may trail the best head
+POOL_SIZE      = 16    # keep-alive connections per endpoint
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def make_session(pool_size=POOL_SIZE):
+    if TRANSPORT == "http2":
+        return http2_client()  # one multiplexed connection instead of a pool
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class ConnectionPool:
+    def __init__(self, urls, request_kwargs=None, probe_interval=PROBE_INTERVAL):
+        self.urls = list(urls)
+        self.request_kwargs = request_kwargs or {'timeout': 8}
+        self.probe_interval = probe_interval
+        self.sessions = {url: make_session() for url in self.urls}
+        self.router = RPCRouter(self.urls, self.request_kwargs, self.sessions)
+        self.heads = {url: 0 for url in self.urls}
+        self.healthy = {url: False for url in self.urls}
+        self.clients = {}
+        self.ready = threading.Event()
+        self._thread = None
+
+    # ── hot path: no I/O ──
+    def get_w3(self, priority=None):
+        """Web3 routed to the fastest live endpoint over its keep-alive session; liveness is probed in the background."""
+        return self.router.get_w3(priority)
+
+    def client(self, url):
+        """Web3 pinned to one endpoint, sharing that endpoint's keep-alive session."""
+        if url not in self.clients:
+            self.clients[url] = Web3(self.router.providers[url])
+        return self.clients[url]
+
+    def session(self, url):
+        return self.sessions.get(url)
+
+    def limiter(self, url):
+        return self.router.limiters.get(url)
+
+    def live_urls(self):
+        now = time.time()
+        return [u for u in self.router.ranked() if self.healthy[u] and self.router.stats[u].is_live(now)]
+
+    # ── background liveness ──
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rpc-pool-probe", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=10):
+        """Blocks until the first probe sweep has finished (startup only)."""
+        return self.ready.wait(timeout)
+
+    def _probe(self, url):
+        payload = {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}
+        # Probes spend the same quota as real traffic, but queue behind it
+        if not self.router.limiters[url].acquire(PRIORITY_LOW, timeout=self.probe_interval):
+            return
+        start = time.perf_counter()
+        self.healthy[url] = False
+        try:
+            resp = self.sessions[url].post(url, json=payload, **self.request_kwargs)
+            resp.raise_for_status()
+            body = resp.json()
+            if 'error' in body:
+                self.router.record(url, time.perf_counter() - start, body['error'])
+                return
+            self.heads[url] = int(body['result'], 16)
+            self.healthy[url] = True
+            self.router.record(url, time.perf_counter() - start)
+        except Exception as e:
+            self.router.record(url, time.perf_counter() - start, e)
+
+    def sweep(self):
+        threads = [threading.Thread(target=self._probe, args=(url,)) for url in self.urls]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        best_head = max(self.heads.values())
+        CACHE.advance(best_head)
+        for url, head in self.heads.items():
+            if head and best_head - head > MAX_BLOCK_LAG:
+                self.router.bench(url)
+
+    def _run(self):
+        while True:
+            self.sweep()
+            self.ready.set()
+            time.sleep(self.probe_interval)
+
+
+def get_pool(urls, request_kwargs=None):
+    """The process-wide pool for this endpoint list, started on first use."""
+    key = tuple(urls)
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = ConnectionPool(urls, request_kwargs).start()
+        return _POOLS[key]
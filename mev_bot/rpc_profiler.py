@@ -0,0 +1,256 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         CONTINUOUS RPC LATENCY PROFILER              ║
+║         HDR histograms · p50/p95/p99 · block lag     ║
+╚══════════════════════════════════════════════════════╝
+
+Probes every endpoint concurrently, once per round, with the calls the bots
+actually make:
+- eth_blockNumber
+- eth_call slot0() on a Uni V3 pool
+- eth_call getReserves() on an Aerodrome pool
+- an eth_sendRawTransaction dry run: a real signed tx from a throwaway
+  zero-balance key, which the node rejects after full validation
+
+Latencies go into fixed-memory log-linear histograms. Block lag is measured
+against the best head of the round. The ranking is written to
+rpc_ranking.json; RPCRouter and gorilla_bot read that file at startup so
+endpoint choice rests on tail latency, not on one lucky sample.
+
+    python3 mev_bot/rpc_profiler.py                      # default endpoint list
+    python3 mev_bot/rpc_profiler.py https://a https://b  # or explicit URLs
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+import requests
+from eth_account import Account
+
+# ───────────────────────── CONFIG ─────────────────────────
+PROFILE_URLS = [
+    "https://base-mainnet.g.alchemy.com/v2/USbVaOTSKlqazrRw7rjg2",
+    "https://rpc.ankr.com/base/f7ad576d9633a69e5bd0548cc5b3ee550aa73b2cef04945136af53e95629668f",
+    "https://base.llamarpc.com",
+    "https://1rpc.io/base",
+    "https://mainnet.base.org",
+    "https://base.publicnode.com",
+]
+RANKING_FILE    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rpc_ranking.json")
+RANKING_MAX_AGE = 3600   # seconds; older rankings are ignored by the bots
+ROUND_INTERVAL  = 2.0    # one probe round per Base block
+WRITE_EVERY     = 15     # rounds between ranking file writes
+LAG_WINDOW      = 300    # rounds of block-lag history kept
+BLOCK_SECONDS   = 2.0    # a block of lag costs as much as 2 s of latency
+
+UNI_V3_WETH_USDC = "0xd0b53D9277642d899DF5C87A3966A349A798F224"
+AERO_WETH_USDC   = "0xcDAC0d6c6C59727a65F871236188350531885C43"
+SEL_SLOT0        = "0x3850c7bd"
+SEL_GET_RESERVES = "0x0902f1ac"
+
+
+# ───────────────────────── HISTOGRAM ─────────────────────────
+class Histogram:
+    """
+    HDR-style log-linear histogram over microseconds: exact below 64 µs, then
+    32 linear sub-buckets per power of two (~3% relative error), fixed memory.
+    """
+    SUB = 32
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.total = 0
+        self.max = 0.0
+
+    def _index(self, us):
+        if us < 2 * self.SUB:
+            return us
+        shift = us.bit_length() - 6
+        return self.SUB * shift + (us >> shift)
+
+    def _value(self, index):
+        if index < 2 * self.SUB:
+            return index
+        shift, mantissa = index // self.SUB - 1, index % self.SUB + self.SUB
+        return (mantissa << shift) + (1 << shift) // 2  # bucket midpoint
+
+    def record(self, seconds):
+        self.counts[self._index(max(0, int(seconds * 1e6)))] += 1
+        self.total += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Seconds at percentile p (0..1), or None while empty."""
+        if not self.total:
+            return None
+        rank, seen = p * self.total, 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return self._value(index) / 1e6
+        return self.max
+
+    def summary(self):
+        ms = lambda v: None if v is None else round(v * 1000, 2)
+        return {'count': self.total, 'p50_ms': ms(self.percentile(0.5)), 'p95_ms': ms(self.percentile(0.95)),
+                'p99_ms': ms(self.percentile(0.99)), 'max_ms': ms(self.max if self.total else None)}
+
+
+# ───────────────────────── PROBES ─────────────────────────
+def _dry_run_tx():
+    # Zero-balance throwaway key: nodes check signature, nonce and funds, then reject
+    acct = Account.create()
+    tx = {'to': acct.address, 'value': 0, 'gas': 21000, 'maxFeePerGas': 10**9, 'maxPriorityFeePerGas': 10**6,
+          'nonce': 0, 'chainId': 8453, 'type': 2}
+    return '0x' + bytes(acct.sign_transaction(tx).raw_transaction).hex()
+
+
+PROBES = [
+    ('eth_blockNumber', lambda: []),
+    ('slot0', lambda: [{'to': UNI_V3_WETH_USDC, 'data': SEL_SLOT0}, 'latest']),
+    ('getReserves', lambda: [{'to': AERO_WETH_USDC, 'data': SEL_GET_RESERVES}, 'latest']),
+    ('eth_sendRawTransaction', None),
+]
+METHOD_OF = {'slot0': 'eth_call', 'getReserves': 'eth_call'}
+
+
+class EndpointProfile:
+    def __init__(self, url):
+        self.url = url
+        self.hist = {name: Histogram() for name, _ in PROBES}
+        self.errors = defaultdict(int)
+        self.lag = deque(maxlen=LAG_WINDOW)
+        self.head = 0
+
+    def all_calls(self):
+        merged = Histogram()
+        for h in self.hist.values():
+            for i, c in h.counts.items(): merged.counts[i] += c
+            merged.total += h.total
+            merged.max = max(merged.max, h.max)
+        return merged
+
+    def error_rate(self):
+        done = sum(h.total for h in self.hist.values()) + sum(self.errors.values())
+        return sum(self.errors.values()) / done if done else 0.0
+
+    def score(self):
+        """Expected tail cost in seconds: p99 over all hot-path calls, inflated by errors and lag."""
+        p99 = self.all_calls().percentile(0.99)
+        if p99 is None:
+            return float('inf')
+        lag = sorted(self.lag)[len(self.lag) // 2] if self.lag else 0
+        return p99 * (1 + 4 * self.error_rate()) + lag * BLOCK_SECONDS
+
+    def summary(self):
+        lag = sorted(self.lag)
+        return {
+            'url': self.url,
+            'score_ms': round(self.score() * 1000, 2) if self.score() != float('inf') else None,
+            'error_rate': round(self.error_rate(), 4),
+            'block_lag': {'p50': lag[len(lag) // 2] if lag else None, 'max': lag[-1] if lag else None},
+            'all': self.all_calls().summary(),
+            'methods': {name: dict(h.summary(), errors=self.errors[name]) for name, h in self.hist.items()},
+        }
+
+
+class Profiler:
+    def __init__(self, urls, out_path=RANKING_FILE, interval=ROUND_INTERVAL, timeout=8):
+        self.urls = list(dict.fromkeys(urls))
+        self.out_path = out_path
+        self.interval = interval
+        self.timeout = timeout
+        self.sessions = {url: requests.Session() for url in self.urls}
+        self.profiles = {url: EndpointProfile(url) for url in self.urls}
+        self.raw_tx = _dry_run_tx()
+        self.rounds = 0
+
+    def _call(self, url, method, params):
+        payload = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}
+        start = time.perf_counter()
+        resp = self.sessions[url].post(url, json=payload, timeout=self.timeout)
+        elapsed = time.perf_counter() - start
+        resp.raise_for_status()
+        return elapsed, resp.json()
+
+    def probe(self, url):
+        prof = self.profiles[url]
+        for name, params in PROBES:
+            method = METHOD_OF.get(name, name)
+            try:
+                elapsed, body = self._call(url, method, [self.raw_tx] if params is None else params())
+            except Exception:
+                prof.errors[name] += 1
+                continue
+            err = body.get('error')
+            # The dry run is supposed to be rejected; every other error is a failure
+            if err and (method != 'eth_sendRawTransaction' or err.get('code') in (-32005, 429)):
+                prof.errors[name] += 1
+                continue
+            prof.hist[name].record(elapsed)
+            if method == 'eth_blockNumber':
+                prof.head = int(body['result'], 16)
+
+    def round(self):
+        threads = [threading.Thread(target=self.probe, args=(url,)) for url in self.urls]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        best = max(p.head for p in self.profiles.values())
+        for p in self.profiles.values():
+            if p.head: p.lag.append(best - p.head)
+        self.rounds += 1
+
+    def ranking(self):
+        ranked = sorted(self.profiles.values(), key=lambda p: p.score())
+        return {'generated': time.time(), 'rounds': self.rounds, 'endpoints': [p.summary() for p in ranked]}
+
+    def write(self):
+        tmp = self.out_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.ranking(), f, indent=2)
+        os.replace(tmp, self.out_path)  # readers never see a half-written file
+
+    def run(self):
+        while True:
+            started = time.monotonic()
+            self.round()
+            if self.rounds % WRITE_EVERY == 0:
+                self.write()
+                self.print_table()
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def print_table(self):
+        print(f"\n[{time.strftime('%H:%M:%S')}] round {self.rounds}")
+        for i, e in enumerate(self.ranking()['endpoints'], 1):
+            a = e['all']
+            print(f"{i}. {e['url'][:48]:48} p50 {a['p50_ms']}ms p95 {a['p95_ms']}ms p99 {a['p99_ms']}ms "
+                  f"lag {e['block_lag']['p50']} err {e['error_rate']:.1%}")
+
+
+# ───────────────────────── CONSUMERS ─────────────────────────
+def load_ranking(path=RANKING_FILE, max_age=RANKING_MAX_AGE):
+    """{url: endpoint summary} from a fresh ranking file, or {} if missing/stale."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if time.time() - data.get('generated', 0) > max_age:
+        return {}
+    return {e['url']: e for e in data.get('endpoints', [])}
+
+
+def rank_urls(urls, ranking=None):
+    """urls reordered best-first by the profiler; unprofiled ones keep their order at the end."""
+    ranking = load_ranking() if ranking is None else ranking
+    order = {url: i for i, url in enumerate(ranking)}
+    return sorted(urls, key=lambda u: order.get(u, len(order)))
+
+
+if __name__ == "__main__":
+    urls = sys.argv[1:] or [u for u in os.getenv("MEV_RPC_URLS", "").split(",") if u] or PROFILE_URLS
+    print(__doc__)
+    print(f"Profiling {len(urls)} endpoints every {ROUND_INTERVAL}s -> {RANKING_FILE}")
+    Profiler(urls).run()
@@ -0,0 +1,222 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         LATENCY-SCORED RPC ROUTER                    ║
+║         EWMA latency · error rate · 429 shedding     ║
+╚══════════════════════════════════════════════════════╝
+
+Every request is timed and fed back into per-endpoint stats. Each new request
+goes to the endpoint with the best score; endpoints that keep erroring or
+rate-limiting are benched for a while and retried later. Each endpoint also
+has its own token bucket (rate_limit.py); if the best endpoint's bucket is
+empty, the request takes the next live endpoint that has a token, and only
+queues when every bucket is empty.
+"""
+import time
+import threading
+from collections import deque
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+from rate_limit import RateLimiter, quota_for, METHOD_PRIORITY, PRIORITY_NORMAL
+from block_cache import CACHE
+from rpc_profiler import load_ranking
+from http2_provider import make_provider
+
+# ───────────────────────── TUNING ─────────────────────────
+EWMA_ALPHA        = 0.2    # weight of the newest latency sample
+ERROR_ALPHA       = 0.1    # weight of the newest ok/error sample
+RATE_LIMIT_WINDOW = 30     # seconds a 429 counts against an endpoint
+SHED_ERROR_RATE   = 0.5    # bench an endpoint above this error rate...
+SHED_429_COUNT    = 3      # ...or after this many 429s inside the window
+BENCH_SECONDS     = 10     # first bench; doubles on every repeat, capped below
+MAX_BENCH_SECONDS = 300
+EXPLORE_EVERY     = 20     # every Nth request re-samples the stalest live endpoint
+
+
+def is_rate_limit(error):
+    """True for HTTP 429 responses and JSON-RPC 'limit exceeded' (-32005) errors."""
+    if isinstance(error, dict):
+        return error.get('code') == -32005 or 'rate limit' in str(error.get('message', '')).lower()
+    resp = getattr(error, 'response', None)
+    if getattr(resp, 'status_code', None) == 429:
+        return True
+    text = str(error).lower()
+    return '429' in text or 'too many requests' in text or 'rate limit' in text
+
+
+class EndpointStats:
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.error_rate = 0.0
+        self.rate_limits = deque()
+        self.calls = 0
+        self.last_used = 0.0
+        self.benched_until = 0.0
+        self.bench_seconds = BENCH_SECONDS
+
+    def recent_429s(self, now):
+        while self.rate_limits and now - self.rate_limits[0] > RATE_LIMIT_WINDOW:
+            self.rate_limits.popleft()
+        return len(self.rate_limits)
+
+    def score(self, now):
+        """Expected cost of a request here in seconds (lower is better)."""
+        if self.latency is None:
+            # Untried endpoints go first; ones that have only ever failed go last
+            return 0.0 if self.error_rate == 0 else float('inf')
+        return self.latency * (1 + 4 * self.error_rate) * (1 + self.recent_429s(now))
+
+    def is_live(self, now):
+        return now >= self.benched_until
+
+
+class RPCRouter:
+    def __init__(self, urls, request_kwargs=None, sessions=None, ranking=None):
+        self.urls = list(urls)
+        self.request_kwargs = request_kwargs or {'timeout': 8}
+        self.sessions = sessions or {}
+        self.stats = {url: EndpointStats(url) for url in self.urls}
+        self.apply_ranking(load_ranking() if ranking is None else ranking)
+        self.limiters = {url: RateLimiter(quota_for(url)) for url in self.urls}
+        self.providers = {
+            url: make_provider(url, self.request_kwargs, self.sessions.get(url)) for url in self.urls
+        }
+        self.lock = threading.Lock()
+        self.requests = 0
+        self._w3 = {}
+
+    # ── stats ──
+    def record(self, url, latency, error=None):
+        now = time.time()
+        if error is None:
+            self.limiters[url].on_success()
+        elif is_rate_limit(error):
+            self.limiters[url].on_throttle()
+        with self.lock:
+            s = self.stats[url]
+            s.calls += 1
+            s.last_used = now
+            if error is None:
+                s.latency = latency if s.latency is None else s.latency + EWMA_ALPHA * (latency - s.latency)
+                s.error_rate *= (1 - ERROR_ALPHA)
+                s.bench_seconds = BENCH_SECONDS
+                return
+            s.error_rate += ERROR_ALPHA * (1 - s.error_rate)
+            if is_rate_limit(error):
+                s.rate_limits.append(now)
+            if s.error_rate > SHED_ERROR_RATE or s.recent_429s(now) >= SHED_429_COUNT:
+                self._bench(s, now)
+
+    def apply_ranking(self, ranking):
+        """Starts each endpoint from the profiler's p95 / error rate instead of a blank slate."""
+        for url, entry in ranking.items():
+            s = self.stats.get(url)
+            p95 = entry.get('all', {}).get('p95_ms')
+            if s is None or p95 is None: continue
+            s.latency = p95 / 1000
+            s.error_rate = entry.get('error_rate', 0.0)
+
+    def bench(self, url):
+        """Takes an endpoint out of rotation (e.g. it is lagging behind the chain head)."""
+        with self.lock:
+            self._bench(self.stats[url], time.time())
+
+    def _bench(self, s, now):
+        s.benched_until = now + s.bench_seconds
+        s.bench_seconds = min(s.bench_seconds * 2, MAX_BENCH_SECONDS)
+        s.rate_limits.clear()
+        s.error_rate = SHED_ERROR_RATE / 2  # come back on probation, not fully trusted
+
+    def ranked(self):
+        """Live endpoints best-first, then benched ones by how soon they return."""
+        now = time.time()
+        with self.lock:
+            live = sorted((s for s in self.stats.values() if s.is_live(now)), key=lambda s: s.score(now))
+            benched = sorted((s for s in self.stats.values() if not s.is_live(now)), key=lambda s: s.benched_until)
+            self.requests += 1
+            if len(live) > 1 and self.requests % EXPLORE_EVERY == 0:
+                # Keep stats on the runners-up fresh so a recovered node can win again
+                stalest = min(live[1:], key=lambda s: s.last_used)
+                live.remove(stalest)
+                live.insert(0, stalest)
+        return [s.url for s in live + benched]
+
+    def best(self):
+        return self.ranked()[0]
+
+    def report(self):
+        now = time.time()
+        with self.lock:
+            return [
+                {'url': s.url, 'latency_ms': None if s.latency is None else s.latency * 1000, 'error_rate': s.error_rate,
+                 'recent_429': s.recent_429s(now), 'live': s.is_live(now), 'score': s.score(now),
+                 'limiter': self.limiters[s.url].report()}
+                for s in self.stats.values()
+            ]
+
+    # ── requests ──
+    def _admit(self, order, priority):
+        """First live endpoint in order with a free token; if all are saturated, queue on the best."""
+        now = time.time()
+        live = [u for u in order if self.stats[u].is_live(now)] or order[:1]
+        for url in live:
+            if self.limiters[url].try_acquire(priority):
+                return url
+        self.limiters[live[0]].acquire(priority)
+        return live[0]
+
+    def request(self, method, params, attempts=2, priority=None):
+        """Sends one request to the best endpoint, failing over to the next on transport errors."""
+        if priority is None:
+            priority = METHOD_PRIORITY.get(method, PRIORITY_NORMAL)
+        last_error = None
+        order = self.ranked()
+        for _ in range(min(attempts, len(order))):
+            url = self._admit(order, priority)
+            order.remove(url)
+            start = time.perf_counter()
+            try:
+                resp = self.providers[url].make_request(method, params)
+            except Exception as e:
+                self.record(url, time.perf_counter() - start, e)
+                last_error = e
+                continue
+            err = resp.get('error')
+            # Reverts are healthy answers; only throttling counts against the node
+            self.record(url, time.perf_counter() - start, err if err and is_rate_limit(err) else None)
+            if err and is_rate_limit(err):
+                last_error = err
+                continue
+            return resp
+        if isinstance(last_error, Exception):
+            raise last_error
+        return {'jsonrpc': '2.0', 'id': 0, 'error': last_error}
+
+    def get_w3(self, priority=None):
+        """A Web3 whose every request is routed to the currently best endpoint."""
+        if priority not in self._w3:
+            self._w3[priority] = Web3(RoutedProvider(self, priority))
+        return self._w3[priority]
+
+
+class RoutedProvider(JSONBaseProvider):
+    def __init__(self, router, priority=None):
+        super().__init__()
+        self.router = router
+        self.priority = priority
+
+    @property
+    def endpoint_uri(self):
+        # Raw-HTTP helpers (e.g. JSON-RPC batches) follow the router too
+        return self.router.best()
+
+    def make_request(self, method, params):
+        # Same-block repeats of 'latest' reads are answered from the process-wide cache
+        return CACHE.request(method, params, lambda: self.router.request(method, params, priority=self.priority))
+
+    def is_connected(self, show_traceback=False):
+        try:
+            return 'result' in self.make_request('web3_clientVersion', [])
+        except Exception:
+            if show_traceback: raise
+            return False
@@ -0,0 +1,63 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         OPTIMAL TRADE SIZING                         ║
+║         Borrow what maximises net profit             ║
+╚══════════════════════════════════════════════════════╝
+
+Net profit of a two-leg arbitrage as a function of the borrowed amount x is
+
+    round_trip(x) - x - flash_fee(x) - fixed_cost
+
+and is concave: each leg's output grows ever more slowly with its input. Its
+maximum is found by golden-section search over [0, cap] on the in-process
+quoters (v3_sim, aero_quoter). That is about 25 round trips and no RPC.
+Every route here has a V3 / Slipstream leg, so there is no V2 <-> V2 closed form.
+
+The flash loan comes from the Balancer V2 vault, which charges no fee on
+Base today; FLASH_FEE_PPM is there for when that changes.
+"""
+PPM = 1_000_000
+FLASH_FEE_PPM = 0
+INV_PHI = (5 ** 0.5 - 1) / 2
+REL_TOL = 1e-4          # search stops when the bracket is this fraction of the cap
+MIN_TOL = 10 ** 12      # ...or this many wei, whichever is larger
+
+
+def flash_fee(amount, fee_ppm=FLASH_FEE_PPM):
+    return -(-amount * fee_ppm // PPM)
+
+
+# ───────────────────────── SEARCH ─────────────────────────
+def _golden_max(f, lo, hi, tol):
+    a, b = lo, hi
+    c, d = b - int((b - a) * INV_PHI), a + int((b - a) * INV_PHI)
+    fc, fd = f(c), f(d)
+    while b - a > tol:
+        if fc < fd:
+            a, c, fc = c, d, fd
+            d = a + int((b - a) * INV_PHI)
+            fd = f(d)
+        else:
+            b, d, fd = d, c, fc
+            c = b - int((b - a) * INV_PHI)
+            fc = f(c)
+    return (c, fc) if fc >= fd else (d, fd)
+
+
+def best_size(round_trip, cap, fixed_cost=0, fee_ppm=FLASH_FEE_PPM):
+    """
+    round_trip(x): tokens back after both legs for x borrowed, or None if it can't be quoted.
+    Returns {'amount', 'out', 'profit'} for the best size, or None if nothing is profitable.
+    """
+    outs = {}
+
+    def profit(x):
+        if x not in outs:
+            outs[x] = round_trip(x) if x > 0 else 0
+        out = outs[x]
+        return float('-inf') if out is None else out - x - flash_fee(x, fee_ppm) - fixed_cost
+
+    x, p = _golden_max(profit, 0, cap, max(int(cap * REL_TOL), MIN_TOL))
+    if x <= 0 or p <= 0:
+        return None
+    return {'amount': x, 'out': outs[x], 'profit': p}
@@ -0,0 +1,79 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         VECTORIZED CROSS-DEX SPREAD MATRIX           ║
+║         Every token · every buy/sell pair · one call ║
+╚══════════════════════════════════════════════════════╝
+
+Per-token pool lists are packed into padded (tokens x pools) NumPy arrays of
+price, liquidity and fee. The net spread for buying on pool i and selling on
+pool j is
+
+    (price_j * (1 - fee_j) - price_i * (1 + fee_i)) / (price_i * (1 + fee_i))
+
+It is computed for every token at once as a (tokens x pools x pools) tensor.
+The best buy/sell pair per token is a single argmax over the last two axes,
+so a rescan of thousands of tokens is a few array operations instead of an
+O(n²) Python loop per token.
+"""
+import numpy as np
+
+
+def pack(groups, price_key='price', liq_key='liq', fee_key='fee'):
+    """
+    groups: list (one entry per token) of lists of pool dicts.
+    Returns (prices, liqs, fees) as (tokens x max_pools) float arrays, NaN-padded.
+    A missing fee_key (or fee_key=None) means a fee of 0.
+    """
+    width = max((len(g) for g in groups), default=0)
+    shape = (len(groups), max(width, 1))
+    prices, liqs, fees = np.full(shape, np.nan), np.full(shape, np.nan), np.zeros(shape)
+    for t, pools in enumerate(groups):
+        for p, pool in enumerate(pools):
+            prices[t, p] = float(pool.get(price_key) or 0) or np.nan
+            liqs[t, p] = float(pool.get(liq_key) or 0)
+            if fee_key: fees[t, p] = float(pool.get(fee_key) or 0)
+    return prices, liqs, fees
+
+
+def spread_matrix(prices, fees=None):
+    """(tokens x buy x sell) net spread as a fraction; -inf on the diagonal and for missing prices."""
+    fees = np.zeros_like(prices) if fees is None else fees
+    buy = prices * (1 + fees)    # cost of one unit on each pool
+    sell = prices * (1 - fees)   # proceeds of one unit on each pool
+    with np.errstate(invalid='ignore', divide='ignore'):
+        m = (sell[:, None, :] - buy[:, :, None]) / buy[:, :, None]
+    m[~np.isfinite(m)] = -np.inf
+    idx = np.arange(prices.shape[1])
+    m[:, idx, idx] = -np.inf
+    return m
+
+
+def best_pairs(prices, fees=None):
+    """Per token: (buy index, sell index, net spread fraction); spread is -inf if no pair exists."""
+    m = spread_matrix(prices, fees)
+    tokens, width = m.shape[0], m.shape[1]
+    flat = m.reshape(tokens, width * width).argmax(axis=1)
+    buy, sell = np.divmod(flat, width)
+    return buy, sell, m[np.arange(tokens), buy, sell]
+
+
+def rank_opportunities(groups, min_spread_pct=0.0, min_liq=0.0, top=None,
+                       price_key='price', liq_key='liq', fee_key='fee'):
+    """
+    Best fee-adjusted buy/sell pair for every token, ranked by spread.
+    Returns dicts: token (index into groups), buy / sell (the original pool
+    dicts), spread (percent) and max_liq (the smaller pool's liquidity).
+    """
+    if not groups:
+        return []
+    prices, liqs, fees = pack(groups, price_key, liq_key, fee_key)
+    if min_liq:
+        prices = np.where(liqs >= min_liq, prices, np.nan)
+    buy, sell, spread = best_pairs(prices, fees)
+    pct = spread * 100
+    rows = np.arange(len(groups))
+    max_liq = np.minimum(liqs[rows, buy], liqs[rows, sell])
+    keep = np.flatnonzero(np.isfinite(pct) & (pct >= min_spread_pct))
+    keep = keep[np.argsort(-pct[keep], kind='stable')][:top]
+    return [{'token': int(t), 'buy': groups[t][buy[t]], 'sell': groups[t][sell[t]],
+             'spread': float(pct[t]), 'max_liq': float(max_liq[t])} for t in keep]
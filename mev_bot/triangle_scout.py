@@ -1,3 +1,5 @@
+import os
+import time
 import requests
 
 def triangle_scan():
@@ -49,5 +51,77 @@ def triangle_scan():
             # print(f"Error checking {t['name']}: {e}")
             pass
 
+
+# ───────────────────────── ON-CHAIN CYCLES (any length) ─────────────────────────
+CYCLE_TOKENS = [
+    '0x4200000000000000000000000000000000000006',   # WETH
+    '0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913',   # USDC
+    '0x0b3e328455c4059EEb9e3f84b5543F74E24e7E1b',   # VIRTUAL
+    '0x532f27101965dd1a3c95fef19C0693A8B59E5046',   # BRETT
+    '0x9401813063411C64a1C02154D495638C4C34a210',   # AERO
+]
+CANDIDATE_SLACK = 0.05      # cycles within 5% of break-even are tracked as candidates
+REDISCOVER_BLOCKS = 300     # full search this often, for cycles that moved into range
+
+
+def cycle_scan(tokens=CYCLE_TOKENS, max_len=4, min_profit=0.001, interval=2.0):
+    """
+    Every registry pool between `tokens` goes into one negative-log graph. A full
+    search (every REDISCOVER_BLOCKS) collects cycles of up to max_len hops near
+    break-even into a RouteIndex; each block only the cycles through pools that
+    changed are re-scored. Prints the ones above min_profit (mid-price, fees
+    included) with their pool path; sizing is left to the local quoters.
+    """
+    from rpc_pool import get_pool
+    from pool_registry import get_registry
+    from pool_state import PoolStateEngine
+    from aero_quoter import AeroQuoter
+    from cycle_graph import from_registry
+    from route_index import RouteIndex
+
+    urls = [u for u in os.getenv("MEV_RPC_URLS", "").split(",") if u]
+    registry = get_registry()
+    if urls:
+        w3 = get_pool(urls).get_w3()
+        registry.sync(w3)
+    elif registry.by_pair:
+        # Public endpoint: per-block reads only, pools from whatever meta_index.db already holds
+        w3 = get_pool(["https://mainnet.base.org"]).get_w3()
+    else:
+        print("cycle scan: set MEV_RPC_URLS (the factory backfill is too heavy for the public endpoint) "
+              "or run a bot that fills meta_index.db first")
+        return
+
+    pools = {}
+    for i, a in enumerate(tokens):
+        for b in tokens[i + 1:]:
+            pools.update((p, row) for p, row in registry.pools_for_pair(a, b))
+    engine = PoolStateEngine({p: row['kind'] for p, row in pools.items()})
+    aero = AeroQuoter()
+    aero.load(w3, [p for p, row in pools.items() if row['dex'] == 'aerodrome'])
+    graph = from_registry(registry, pools, aero=aero)
+    routes, found_at = RouteIndex(), 0
+    print(f"--- CYCLES over {len(graph.tokens)} tokens / {len(graph.pools)} pools (≤{max_len} hops) ---")
+
+    while True:
+        try:
+            changed = engine.sync(w3)
+            states = engine.snapshot()['pools']
+            graph.update({p: states[p] for p in changed if p in states}, aero.meta)
+            if engine.block - found_at >= REDISCOVER_BLOCKS:
+                for c in graph.find_cycles(sources=tokens, max_len=max_len, min_profit=-CANDIDATE_SLACK, limit=None):
+                    routes.add(tuple(c['pools']), c['pools'], c)
+                changed, found_at = set(graph.pools), engine.block
+            for key in routes.affected(changed):
+                routes.score(key, graph.profit(routes.routes[key]))
+            for key, profit in routes.top(min_score=min_profit):
+                c = routes.routes[key]
+                path = ' -> '.join(t[:8] for t in c['tokens'])
+                print(f"#{engine.block} {profit * 100:+.3f}%  {path}  via {', '.join(p[:10] for p in c['pools'])}")
+        except Exception as e:
+            print(f"cycle scan: {e}")
+        time.sleep(interval)
+
+
 if __name__ == '__main__':
-    triangle_scan()
+    cycle_scan() if os.getenv("TRIANGLE_ONCHAIN") else triangle_scan()
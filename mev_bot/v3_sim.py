@@ -0,0 +1,351 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         LOCAL V3 SWAP SIMULATOR                      ║
+║         TickMath · SwapMath · zero RPC per quote     ║
+╚══════════════════════════════════════════════════════╝
+
+Integer ports of Uniswap V3 TickMath, SqrtPriceMath and SwapMath, and the
+swap loop that steps through initialized ticks. Uni V3, Pancake V3 and
+Slipstream share this math, so one engine quotes all three.
+
+For each pool a TickBook is loaded once: fee, tickSpacing, the tickBitmap
+words around the current tick and liquidityNet of every initialized tick in
+them. The reads are pinned to the PoolStateEngine's block. After that the
+engine keeps the books current from Mint / Burn events, and Swap events
+already move sqrtPrice / tick / liquidity. quote() then returns the exact
+output of an exact-input swap from memory. A swap that would leave the
+loaded words returns None instead of a guess.
+"""
+import math
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
+from web3 import Web3
+import eth_abi
+from multicall import SEL_SLOT0, selector, aggregate3, aggregate3_async, decode_slot0
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+Q96 = 1 << 96
+PIPS = 1_000_000
+BITMAP_WORDS = 2   # words loaded each side of the current one (256 spacings per word)
+RELOAD_DRIFT = 1   # reload a book once the current tick is this many words off its centre
+
+SEL_FEE          = selector("fee()")
+SEL_TICK_SPACING = selector("tickSpacing()")
+
+
+def sel_tick_bitmap(word):
+    return selector("tickBitmap(int16)") + eth_abi.encode(['int16'], [word])
+
+
+def sel_ticks(tick):
+    return selector("ticks(int24)") + eth_abi.encode(['int24'], [tick])
+
+
+# ───────────────────────── FULL MATH ─────────────────────────
+def mul_div(a, b, d):
+    return a * b // d
+
+
+def mul_div_up(a, b, d):
+    return -(-a * b // d)
+
+
+def div_up(a, d):
+    return -(-a // d)
+
+
+# ───────────────────────── TICK MATH ─────────────────────────
+_TICK_FACTORS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+
+
+@lru_cache(maxsize=65536)
+def sqrt_ratio_at_tick(tick):
+    """TickMath.getSqrtRatioAtTick: sqrt(1.0001^tick) * 2^96, rounded up."""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"tick {tick} out of range")
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in _TICK_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = ((1 << 256) - 1) // ratio
+    return (ratio >> 32) + (1 if ratio & 0xffffffff else 0)
+
+
+def tick_at_sqrt_ratio(sqrt_price_x96):
+    """TickMath.getTickAtSqrtRatio: the greatest tick whose sqrt ratio is <= the price."""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError("sqrt price out of range")
+    # float log lands within a tick; the exact ratios settle the boundary
+    tick = math.floor(2 * math.log(sqrt_price_x96 / Q96) / math.log(1.0001))
+    tick = min(max(tick, MIN_TICK), MAX_TICK)
+    while tick > MIN_TICK and sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+# ───────────────────────── SQRT PRICE MATH ─────────────────────────
+def amount0_delta(sqrt_a, sqrt_b, liquidity, round_up):
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    num1, num2 = liquidity << 96, sqrt_b - sqrt_a
+    if round_up:
+        return div_up(mul_div_up(num1, num2, sqrt_b), sqrt_a)
+    return mul_div(num1, num2, sqrt_b) // sqrt_a
+
+
+def amount1_delta(sqrt_a, sqrt_b, liquidity, round_up):
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    return (mul_div_up if round_up else mul_div)(liquidity, sqrt_b - sqrt_a, Q96)
+
+
+def next_sqrt_from_input(sqrt_p, liquidity, amount_in, zero_for_one):
+    if zero_for_one:
+        # getNextSqrtPriceFromAmount0RoundingUp(add=true), including its overflow fallback
+        if amount_in == 0:
+            return sqrt_p
+        num1 = liquidity << 96
+        product = amount_in * sqrt_p
+        if product < 1 << 256 and num1 + product < 1 << 256:
+            return mul_div_up(num1, sqrt_p, num1 + product)
+        return div_up(num1, num1 // sqrt_p + amount_in)
+    # getNextSqrtPriceFromAmount1RoundingDown(add=true)
+    return sqrt_p + (amount_in << 96) // liquidity
+
+
+# ───────────────────────── SWAP MATH ─────────────────────────
+def compute_swap_step(sqrt_p, sqrt_target, liquidity, amount_remaining, fee):
+    """SwapMath.computeSwapStep for exact input: (sqrt_next, amount_in, amount_out, fee_amount)."""
+    zero_for_one = sqrt_p >= sqrt_target
+    remaining_less_fee = mul_div(amount_remaining, PIPS - fee, PIPS)
+    amount_in = amount0_delta(sqrt_target, sqrt_p, liquidity, True) if zero_for_one \
+        else amount1_delta(sqrt_p, sqrt_target, liquidity, True)
+    if remaining_less_fee >= amount_in:
+        sqrt_next = sqrt_target
+    else:
+        sqrt_next = next_sqrt_from_input(sqrt_p, liquidity, remaining_less_fee, zero_for_one)
+    reached = sqrt_next == sqrt_target
+    if zero_for_one:
+        if not reached: amount_in = amount0_delta(sqrt_next, sqrt_p, liquidity, True)
+        amount_out = amount1_delta(sqrt_next, sqrt_p, liquidity, False)
+    else:
+        if not reached: amount_in = amount1_delta(sqrt_p, sqrt_next, liquidity, True)
+        amount_out = amount0_delta(sqrt_p, sqrt_next, liquidity, False)
+    fee_amount = mul_div_up(amount_in, fee, PIPS - fee) if reached else amount_remaining - amount_in
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+# ───────────────────────── TICK BOOK ─────────────────────────
+class TickBook:
+    """Initialized ticks of one pool inside the loaded bitmap words [word_lo, word_hi]."""
+
+    def __init__(self, fee, spacing, word_lo, word_hi):
+        self.fee = fee
+        self.spacing = spacing
+        self.word_lo, self.word_hi = word_lo, word_hi
+        self.gross = {}
+        self.net = {}
+        self.compressed = []   # sorted tick // spacing of every initialized tick
+
+    def set_tick(self, tick, gross, net):
+        c = tick // self.spacing
+        i = bisect_left(self.compressed, c)
+        present = i < len(self.compressed) and self.compressed[i] == c
+        if gross:
+            self.gross[tick], self.net[tick] = gross, net
+            if not present: self.compressed.insert(i, c)
+        else:
+            self.gross.pop(tick, None)
+            self.net.pop(tick, None)
+            if present: del self.compressed[i]
+
+    def update(self, lower, upper, delta):
+        """Mint (delta > 0) or Burn (delta < 0) of a position [lower, upper)."""
+        self.set_tick(lower, self.gross.get(lower, 0) + delta, self.net.get(lower, 0) + delta)
+        self.set_tick(upper, self.gross.get(upper, 0) + delta, self.net.get(upper, 0) - delta)
+
+    def next_initialized(self, tick, lte):
+        """
+        TickBitmap.nextInitializedTickWithinOneWord: (next tick, initialized),
+        or None if the word it lives in was not loaded.
+        """
+        c = tick // self.spacing
+        if lte:
+            word, lo = c >> 8, c - (c % 256)
+            if word < self.word_lo: return None
+            i = bisect_right(self.compressed, c) - 1
+            if i >= 0 and self.compressed[i] >= lo:
+                return self.compressed[i] * self.spacing, True
+            return lo * self.spacing, False
+        c += 1
+        word, hi = c >> 8, c + 255 - (c % 256)
+        if word > self.word_hi: return None
+        i = bisect_left(self.compressed, c)
+        if i < len(self.compressed) and self.compressed[i] <= hi:
+            return self.compressed[i] * self.spacing, True
+        return hi * self.spacing, False
+
+
+# ───────────────────────── SWAP ─────────────────────────
+def swap(book, state, zero_for_one, amount_in, sqrt_limit=None):
+    """
+    Exact-input swap against book + state (sqrtPriceX96, tick, liquidity).
+    Returns (amount_out, state_after) or None if it runs past the loaded ticks.
+    """
+    if sqrt_limit is None:
+        sqrt_limit = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+    sqrt_p, tick, liquidity = state['sqrtPriceX96'], state['tick'], state['liquidity']
+    remaining, out = amount_in, 0
+    while remaining and sqrt_p != sqrt_limit:
+        step = book.next_initialized(tick, zero_for_one)
+        if step is None:
+            return None
+        nxt, initialized = step
+        nxt = min(max(nxt, MIN_TICK), MAX_TICK)
+        sqrt_next = sqrt_ratio_at_tick(nxt)
+        target = sqrt_limit if (sqrt_next < sqrt_limit if zero_for_one else sqrt_next > sqrt_limit) else sqrt_next
+        sqrt_start = sqrt_p
+        sqrt_p, step_in, step_out, fee_amount = compute_swap_step(sqrt_p, target, liquidity, remaining, book.fee)
+        remaining -= step_in + fee_amount
+        out += step_out
+        if sqrt_p == sqrt_next:
+            if initialized:
+                net = book.net[nxt]
+                liquidity += -net if zero_for_one else net
+            tick = nxt - 1 if zero_for_one else nxt
+        elif sqrt_p != sqrt_start:
+            tick = tick_at_sqrt_ratio(sqrt_p)
+    return out, {'sqrtPriceX96': sqrt_p, 'tick': tick, 'liquidity': liquidity}
+
+
+def quote(engine, pool, zero_for_one, amount_in):
+    """Exact output of swapping amount_in through pool at the engine's current state; None if unknown."""
+    pool = pool.lower()
+    book, state = engine.books.get(pool), engine.state(pool)
+    if book is None or not state or 'sqrtPriceX96' not in state:
+        return None
+    result = swap(book, state, zero_for_one, amount_in)
+    return result[0] if result else None
+
+
+# ───────────────────────── LOADING ─────────────────────────
+def _drifted(book, state):
+    """True once the price has moved RELOAD_DRIFT words from where the book was loaded (towards its edge)."""
+    if not state or 'tick' not in state:
+        return False
+    word = (state['tick'] // book.spacing) >> 8
+    return abs(word - (book.word_lo + book.word_hi) // 2) >= RELOAD_DRIFT
+
+
+def missing_books(engine):
+    """Seeded V3 pools with no book, or whose book no longer covers the price with BITMAP_WORDS to spare."""
+    return [a for a, p in engine.pools.items() if p['kind'] == 'v3' and p['seeded'] is not None
+            and (a not in engine.books or _drifted(engine.books[a], p['state']))]
+
+
+def _meta_calls(addrs):
+    calls = []
+    for addr in addrs:
+        target = Web3.to_checksum_address(addr)
+        calls += [(target, True, SEL_FEE), (target, True, SEL_TICK_SPACING), (target, True, SEL_SLOT0)]
+    return calls
+
+
+def _word_range(tick, spacing):
+    word = (tick // spacing) >> 8
+    return word - BITMAP_WORDS, word + BITMAP_WORDS
+
+
+def _bitmap_calls(metas):
+    calls = []
+    for addr, (fee, spacing, tick) in metas.items():
+        lo, hi = _word_range(tick, spacing)
+        calls += [(Web3.to_checksum_address(addr), True, sel_tick_bitmap(w)) for w in range(lo, hi + 1)]
+    return calls
+
+
+def _decode_metas(addrs, results):
+    metas = {}
+    for n, addr in enumerate(addrs):
+        (ok_f, fee), (ok_s, spacing), (ok_0, slot0) = results[3 * n: 3 * n + 3]
+        if ok_f and ok_s and ok_0 and len(slot0) >= 64:
+            metas[addr] = (eth_abi.decode(['uint24'], fee)[0], eth_abi.decode(['int24'], spacing)[0],
+                           decode_slot0(slot0)['tick'])
+    return metas
+
+
+def _decode_bitmaps(metas, results):
+    """Builds empty books and lists the initialized ticks to read."""
+    books, ticks, i = {}, [], 0
+    for addr, (fee, spacing, tick) in metas.items():
+        lo, hi = _word_range(tick, spacing)
+        books[addr] = TickBook(fee, spacing, lo, hi)
+        for w in range(lo, hi + 1):
+            ok, data = results[i]
+            i += 1
+            bits = eth_abi.decode(['uint256'], data)[0] if ok and len(data) >= 32 else 0
+            while bits:
+                low = bits & -bits
+                ticks.append((addr, ((w << 8) + low.bit_length() - 1) * spacing))
+                bits ^= low
+    return books, ticks
+
+
+def _apply_ticks(engine, books, ticks, results):
+    for (addr, tick), (ok, data) in zip(ticks, results):
+        if ok and len(data) >= 64:
+            # Uni / Pancake / Slipstream ticks() all start with (liquidityGross, liquidityNet)
+            books[addr].set_tick(tick, *eth_abi.decode(['uint128', 'int128'], data[:64]))
+    engine.books.update(books)
+    return set(books)
+
+
+def load_books(w3, engine, addrs=None):
+    """Loads tick books for seeded V3 pools at engine.block. Three aggregate3 calls in total."""
+    addrs = missing_books(engine) if addrs is None else [a.lower() for a in addrs]
+    if not addrs or not engine.block:
+        return set()
+    block = engine.block
+    metas = _decode_metas(addrs, aggregate3(w3, _meta_calls(addrs), block))
+    books, ticks = _decode_bitmaps(metas, aggregate3(w3, _bitmap_calls(metas), block) if metas else [])
+    results = aggregate3(w3, [(Web3.to_checksum_address(a), True, sel_ticks(t)) for a, t in ticks], block) if ticks else []
+    return _apply_ticks(engine, books, ticks, results) if engine.block == block else set()
+
+
+async def load_books_async(aw3, engine, addrs=None):
+    addrs = missing_books(engine) if addrs is None else [a.lower() for a in addrs]
+    if not addrs or not engine.block:
+        return set()
+    block = engine.block
+    metas = _decode_metas(addrs, await aggregate3_async(aw3, _meta_calls(addrs), block))
+    books, ticks = _decode_bitmaps(metas, await aggregate3_async(aw3, _bitmap_calls(metas), block) if metas else [])
+    results = await aggregate3_async(aw3, [(Web3.to_checksum_address(a), True, sel_ticks(t)) for a, t in ticks], block) if ticks else []
+    # Events after `block` may have been applied meanwhile; the book would miss them
+    return _apply_ticks(engine, books, ticks, results) if engine.block == block else set()
@@ -0,0 +1,150 @@
+"""
+╔══════════════════════════════════════════════════════╗
+║         STREAMING VOLATILITY ENGINE                  ║
+║         Ring buffers per pair · 1m / 5m / 1h · O(1)  ║
+╚══════════════════════════════════════════════════════╝
+
+Every pair keeps one fixed-size ring of bucket closes per window (60
+buckets: 1 s for 1m, 5 s for 5m, 60 s for 1h). A price update either
+overwrites the current bucket's close or rolls the ring forward. When a
+bucket rolls, the new log return is added to a running sum of squares and
+the return that fell out of the window is subtracted. Monotonic deques
+track the window high and the deepest drawdown from it. Every figure is
+O(1) amortised per update, and memory per pair is fixed (about 20 KB), so
+hundreds of pairs stay within a few MB.
+
+The per-pair minimum gap follows from the pair's own stress, i.e. the
+largest of its 1h move, 1h realised volatility and 1h drawdown. The gap
+slides from CALM_GAP at zero stress down to STRESSED_GAP at
+STRESS_FULL (3%), which is the SHIELD / AGGRESSIVE switch executor.py
+used to make globally off WETH/USDC alone.
+"""
+import math
+import time
+from collections import deque
+
+BUCKETS = 60
+WINDOWS = {'1m': 1, '5m': 5, '1h': 60}   # window -> bucket seconds (x BUCKETS = window length)
+MIN_BUCKETS = 10      # returns needed before a window's figures are trusted
+
+CALM_GAP = 0.8        # % gap required in a quiet market (SHIELD)
+STRESSED_GAP = 0.5    # % gap once a pair is moving (AGGRESSIVE)
+STRESS_FULL = 0.03    # stress (fraction) at which the gap reaches STRESSED_GAP
+STRESS_WINDOW = '1h'
+
+
+class Window:
+    """Fixed ring of bucket closes with rolling return, realised vol and max drawdown."""
+
+    def __init__(self, bucket_s, size=BUCKETS):
+        self.bucket_s = bucket_s
+        self.size = size
+        self.close = [0.0] * size     # log price at each bucket's close
+        self.ret = [0.0] * size       # log return into each bucket
+        self.seq = -1                 # absolute bucket number of the newest slot
+        self.count = 0                # buckets filled (<= size)
+        self.sum_sq = 0.0
+        self.peaks = deque()          # closed buckets (seq, log close), decreasing: window high first
+        self.drops = deque()          # closed buckets (seq, drawdown), decreasing: worst first
+
+    def _push(self, seq, lp):
+        prev = self.close[self.seq % self.size]
+        i = seq % self.size
+        if self.count == self.size:
+            self.sum_sq -= self.ret[i] * self.ret[i]
+        r = lp - prev
+        self.close[i], self.ret[i] = lp, r
+        self.sum_sq += r * r
+        self.seq = seq
+        self.count = min(self.count + 1, self.size)
+
+    def _expire(self, q):
+        while q and q[0][0] <= self.seq - self.size:
+            q.popleft()
+
+    def _close_bucket(self):
+        """Moves the newest bucket (now final) into the high / drawdown deques."""
+        seq, lp = self.seq, self.close[self.seq % self.size]
+        while self.peaks and self.peaks[-1][1] <= lp: self.peaks.pop()
+        self.peaks.append((seq, lp))
+        self._expire(self.peaks)
+        dd = -math.expm1(lp - self.peaks[0][1])
+        while self.drops and self.drops[-1][1] <= dd: self.drops.pop()
+        self.drops.append((seq, dd))
+
+    def update(self, lp, now):
+        seq = int(now // self.bucket_s)
+        if self.seq < 0:
+            self.seq, self.count = seq, 1
+            self.close[seq % self.size] = lp
+        elif seq <= self.seq:
+            # Same bucket: the close moves, and so does the return into it
+            i = self.seq % self.size
+            if self.count > 1:
+                r = self.ret[i] + lp - self.close[i]
+                self.sum_sq += r * r - self.ret[i] * self.ret[i]
+                self.ret[i] = r
+            self.close[i] = lp
+        else:
+            # Quiet buckets in between close flat; never more than one full window of them
+            last = self.close[self.seq % self.size]
+            self._close_bucket()
+            for s in range(max(self.seq + 1, seq - self.size + 1), seq):
+                self._push(s, last)
+                self._close_bucket()
+            self._push(seq, lp)
+            self._expire(self.peaks)
+            self._expire(self.drops)
+
+    @property
+    def ready(self):
+        return self.count > MIN_BUCKETS
+
+    def change(self):
+        """Return over the window (fraction)."""
+        if self.count < 2: return 0.0
+        oldest = (self.seq - self.count + 1) % self.size
+        return math.expm1(self.close[self.seq % self.size] - self.close[oldest])
+
+    def realised_vol(self):
+        """sqrt of summed squared log returns over the window (not annualised)."""
+        return math.sqrt(max(self.sum_sq, 0.0)) if self.count > 1 else 0.0
+
+    def max_drawdown(self):
+        """Deepest fall from the running window high (fraction), open bucket included."""
+        if self.seq < 0: return 0.0
+        lp = self.close[self.seq % self.size]
+        peak = max(self.peaks[0][1], lp) if self.peaks else lp
+        return max(self.drops[0][1] if self.drops else 0.0, -math.expm1(lp - peak))
+
+
+class VolatilityEngine:
+    def __init__(self, windows=WINDOWS, size=BUCKETS):
+        self.windows = windows
+        self.size = size
+        self.pairs = {}    # pair -> {window name: Window}
+
+    def update(self, pair, price, now=None):
+        if not price or price <= 0: return
+        now = time.time() if now is None else now
+        wins = self.pairs.get(pair)
+        if wins is None:
+            wins = self.pairs[pair] = {n: Window(s, self.size) for n, s in self.windows.items()}
+        lp = math.log(price)
+        for w in wins.values():
+            w.update(lp, now)
+
+    def stats(self, pair):
+        """{window: {'change', 'vol', 'drawdown', 'ready'}} for one pair."""
+        return {n: {'change': w.change(), 'vol': w.realised_vol(), 'drawdown': w.max_drawdown(), 'ready': w.ready}
+                for n, w in self.pairs.get(pair, {}).items()}
+
+    def stress(self, pair, window=STRESS_WINDOW):
+        """Largest of |move|, realised vol and drawdown over the window; 0 until it is ready."""
+        w = self.pairs.get(pair, {}).get(window)
+        if w is None or not w.ready: return 0.0
+        return max(abs(w.change()), w.realised_vol(), w.max_drawdown())
+
+    def min_gap(self, pair, calm=CALM_GAP, stressed=STRESSED_GAP):
+        """% gap this pair needs before firing: calm when quiet, sliding to stressed at STRESS_FULL."""
+        return calm - (calm - stressed) * min(1.0, self.stress(pair) / STRESS_FULL)
@@ -3,8 +3,21 @@ import os
 import asyncio
 import time
 import httpx
-from web3 import Web3
+from web3 import Web3, AsyncWeb3
 from dotenv import load_dotenv
+from multicall import target_pools
+from pool_state import PoolStateEngine
+from hedge import HedgedReader
+from block_scheduler import BlockScheduler
+from block_cache import CACHE
+from http2_provider import make_async_provider
+from rpc_profiler import rank_urls
+from pricing import v3_price_x128, spread_ppm, pct_to_ppm, to_float
+from v3_sim import quote, missing_books, load_books_async
+from aero_quoter import AeroQuoter
+from sizing import best_size
+from route_index import RouteIndex
+from gas_model import get_gas_model, route_key, TX_OVERHEAD
 
 # Use absolute path for .env
 env_path = "/home/peter-karingithi/Pictures/Linkivo/EPS32 configuration/mev_bot/.env"
@@ -14,7 +27,29 @@ load_dotenv(env_path)
 # Universal contract v2.0 deployed by Antigravity: 0xDd5C596fB7d3E895818b7bAFfbF021058477C38A
 CONTRACT_ADDR = "0xDd5C596fB7d3E895818b7bAFfbF021058477C38A"
 WETH = "0x4200000000000000000000000000000000000006"
-RPC_URL = "https://rpc.ankr.com/base/f7ad576d9633a69e5bd0548cc5b3ee550aa73b2cef04945136af53e95629668f"
+# MEV_RPC_URLS (comma-separated) replaces every endpoint, e.g. with benchmark/rpc_replay.py.
+# Ordered best-first by the latest rpc_profiler ranking when one is on disk.
+RPC_URLS = rank_urls([u for u in os.getenv("MEV_RPC_URLS", "").split(",") if u] or [
+    "https://rpc.ankr.com/base/f7ad576d9633a69e5bd0548cc5b3ee550aa73b2cef04945136af53e95629668f",
+    "https://base-mainnet.g.alchemy.com/v2/USbVaOTSKlqazrRw7rjg2",
+    "https://mainnet.base.org",
+])
+RPC_URL = RPC_URLS[0]
+WS_URL = os.getenv("WS_RPC_URL", "wss://rpc.ankr.com/base/ws/f7ad576d9633a69e5bd0548cc5b3ee550aa73b2cef04945136af53e95629668f")
+TRADE_COOLDOWN = 5  # seconds a target sits out after a trade attempt
+# Borrow size is solved per trade; this caps it (per target: "max_loan_eth").
+# loan_eth is only used when a leg has no local model yet.
+MAX_LOAN_ETH = 50.0
+# Gas is learned per route (gas_model.json); DEFAULT_GAS only until a route has been estimated
+DEFAULT_GAS = 850_000
+PRIORITY_FEE = Web3.to_wei(0.01, 'gwei')
+FLASH_TX_SIZE = 4 + 9 * 32 + TX_OVERHEAD  # execute(uint256, (8 static fields)) signed
+
+# Hedged reads (opt-in): race the tick read against a second endpoint once the
+# primary is slower than its own HEDGE_PERCENTILE latency
+HEDGE_READS = os.getenv("HEDGE_READS", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_RPC_URLS = RPC_URLS
 
 # Telegram Config
 TG_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -91,22 +126,39 @@ TARGETS = {
     }
 }
 
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+POOLS = target_pools(TARGETS)
+ENGINE = PoolStateEngine(POOLS)
+AERO = AeroQuoter()  # Aerodrome V2 metadata + fees; reserves come from ENGINE
+AERO_V2_POOLS = [d['aero_pool'] for d in TARGETS.values() if d['aero_type_val'] < 1]
+ROUTES = RouteIndex()  # pool -> targets using it; a block re-scores only the targets whose pools changed
+for _name, _data in TARGETS.items():
+    ROUTES.add(_name, [_data['aero_pool'], _data['uni_pool']], _data)
+COOLDOWN_UNTIL = {}
+GAS = get_gas_model()
+LAST_GAS_PRICE = None  # baseFee + tip of the last block whose fees could be read
+
+# One shared async client: reads, nonce/balance lookups and sends never block the loop
+# Balance / base fee / simulation reads are cached per block and merged while in flight
+aw3 = AsyncWeb3(make_async_provider(RPC_URL, timeout=8, cached=True))  # MEV_RPC_TRANSPORT=http2 multiplexes
+tg_client = httpx.AsyncClient(timeout=40)
 account = Web3.to_checksum_address(os.getenv("BOT_ADDRESS"))
 priv_key = os.getenv("BOT_PRIVATE_KEY")
 
-ABI_V2 = [{"inputs":[],"name":"getReserves","outputs":[{"name":"_reserve0","type":"uint256"},{"name":"_reserve1","type":"uint256"},{"name":"_blockTimestampLast","type":"uint32"}],"stateMutability":"view","type":"function"}]
-ABI_V3 = [{"inputs":[],"name":"slot0","outputs":[{"name":"sqrtPriceX96","type":"uint160"},{"name":"tick","type":"int24"}],"stateMutability":"view","type":"function"}]
 ABI_FLASH = [{"inputs": [{"type": "uint256", "name": "amount"}, {"components": [{"name": "targetToken", "type": "address"}, {"name": "uniRouter", "type": "address"}, {"name": "aeroRouter", "type": "address"}, {"name": "aeroFactory", "type": "address"}, {"name": "uniFee", "type": "uint24"}, {"name": "aeroFeeOrTS", "type": "uint24"}, {"name": "mode", "type": "uint8"}, {"name": "aeroType", "type": "uint8"}], "name": "config", "type": "tuple"}], "name": "execute", "outputs": [], "stateMutability": "nonpayable", "type": "function"}]
 
-flash_contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDR), abi=ABI_FLASH)
+hedged_reader = HedgedReader(
+    {url: AsyncWeb3(make_async_provider(url, timeout=8)) for url in HEDGE_RPC_URLS},
+    ENGINE.fetch_logs_async,
+    percentile=HEDGE_PERCENTILE,
+)
+
+flash_contract = aw3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDR), abi=ABI_FLASH)
 
 async def send_tg(msg):
     if not TG_TOKEN or not TG_CHAT_ID: return
     try:
         url = f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage"
-        async with httpx.AsyncClient() as client:
-            await client.post(url, json={"chat_id": TG_CHAT_ID, "text": msg, "parse_mode": "HTML"})
+        await tg_client.post(url, json={"chat_id": TG_CHAT_ID, "text": msg, "parse_mode": "HTML"})
     except Exception as e:
         print(f"TG Send Error: {e}")
 
@@ -141,8 +193,8 @@ async def handle_tg_commands():
                         continue
                         
                     if text == "/balance":
-                        bal = w3.eth.get_balance(account)
-                        eth_bal = w3.from_wei(bal, "ether")
+                        bal = await aw3.eth.get_balance(account)
+                        eth_bal = Web3.from_wei(bal, "ether")
                         await send_tg(f"💰 <b>Wallet Balance:</b> {eth_bal:.6f} ETH\nAddress: <code>{account}</code>")
                     elif text == "/status":
                         targets_list = "\n".join([f"- {name}" for name in TARGETS.keys()])
@@ -161,25 +213,47 @@ async def handle_tg_commands():
             pass
         await asyncio.sleep(2)
 
-def get_v3_price(pool_addr, is_token0):
-    try:
-        pool = w3.eth.contract(address=Web3.to_checksum_address(pool_addr), abi=ABI_V3)
-        s = pool.functions.slot0().call()
-        p = (s[0] / 2**96)**2
-        return p if is_token0 else (1/p)
-    except: return 0
+# Exact Q128 prices; both legs are the same pair, so decimals cancel in the spread
+def get_v3_price(snap, pool_addr, is_token0):
+    s = snap['pools'].get(pool_addr.lower())
+    return v3_price_x128(s['sqrtPriceX96'], is_token0) if s else 0
 
-def get_v2_price(pool_addr, is_token0):
-    try:
-        pool = w3.eth.contract(address=Web3.to_checksum_address(pool_addr), abi=ABI_V2)
-        r = pool.functions.getReserves().call()
-        p = r[1] / r[0] if is_token0 else r[0] / r[1]
-        return p
-    except: return 0
+def get_v2_price(snap, pool_addr, is_token0):
+    r = snap['pools'].get(pool_addr.lower())
+    # Stable pools are priced on the curve's slope; volatile (or not yet loaded) by reserve ratio
+    return AERO.price_x128(pool_addr, r['reserve0'], r['reserve1'], is_token0) if r else 0
 
-async def execute_flash(name, data, mode, spread):
+def aero_router_for(data):
     default_aero_router = AERO_V3_ROUTER if data['aero_type_val'] >= 1 else AERO_V2_ROUTER
-    aero_router = data.get('aero_router', default_aero_router)
+    return data.get('aero_router', default_aero_router)
+
+def flash_route(data, mode):
+    return route_key(CONTRACT_ADDR, aero_router_for(data), data['aero_type_val'], mode)
+
+async def gas_cost(data, mode):
+    """
+    Wei one flash on this route costs (L2 execution + L1 data) at this block's fees,
+    or at the last fees read if they can't be read now; None if fees were never read.
+    """
+    global LAST_GAS_PRICE
+    try:
+        # Both reads are block-cached: at most one of each per block, however many targets ask
+        block, l1 = await asyncio.gather(aw3.eth.get_block('latest'), GAS.l1_fee_async(aw3, FLASH_TX_SIZE))
+        LAST_GAS_PRICE = block['baseFeePerGas'] + PRIORITY_FEE
+    except Exception:
+        l1 = GAS.l1_last
+    if LAST_GAS_PRICE is None or l1 is None:
+        return None
+    return GAS.cost_wei(flash_route(data, mode), LAST_GAS_PRICE, l1, DEFAULT_GAS)
+
+async def track_receipt(route, tx_hash):
+    # Our own receipts are the ground truth for the route's gas
+    try: GAS.record_receipt(route, await aw3.eth.wait_for_transaction_receipt(tx_hash, timeout=60))
+    except Exception: pass
+
+async def execute_flash(name, data, mode, spread, amount_wei=None, expected=None):
+    aero_router = aero_router_for(data)
+    route = flash_route(data, mode)
     aero_factory = AERO_V3_FACTORY if data['aero_type_val'] >= 1 else AERO_V2_FACTORY
     
     config = (
@@ -193,26 +267,35 @@ async def execute_flash(name, data, mode, spread):
         data['aero_type_val']
     )
     
-    amount_wei = int(data['loan_eth'] * 10**18)
-    msg = f"🔥 <b>ATTACKING {name}</b>\nSpread: {spread:+.2f}%\nLoan: {data['loan_eth']} ETH"
+    amount_wei = amount_wei or int(data['loan_eth'] * 10**18)
+    msg = f"🔥 <b>ATTACKING {name}</b>\nSpread: {spread:+.2f}%\nLoan: {amount_wei / 10**18:.4f} ETH"
+    if expected is not None: msg += f"\nExpected: +{expected / 10**18:.5f} ETH net of gas"
     print(msg.replace("<b>","").replace("</b>",""), flush=True)
     await send_tg(msg)
     
     try:
-        bal = w3.eth.get_balance(account)
-        if bal < w3.to_wei(0.003, 'ether'):
+        # Balance, nonce, base fee and the simulation go out concurrently;
+        # estimateGas is the simulation (it reverts the same way) and feeds the route's gas model
+        fn = flash_contract.functions.execute(amount_wei, config)
+        bal, nonce, block, gas = await asyncio.gather(
+            aw3.eth.get_balance(account),
+            aw3.eth.get_transaction_count(account),
+            aw3.eth.get_block('latest'),
+            fn.estimate_gas({'from': account}),
+        )
+        GAS.observe(route, gas)
+        if bal < Web3.to_wei(0.003, 'ether'):
             await send_tg("⚠️ <b>OUT OF GAS!</b> Trade aborted.")
             return False
-
-        flash_contract.functions.execute(amount_wei, config).call({'from': account})
         
-        tx = flash_contract.functions.execute(amount_wei, config).build_transaction({
-            'from': account, 'gas': 850000, 'nonce': w3.eth.get_transaction_count(account), 'chainId': 8453,
-            'maxFeePerGas': w3.eth.get_block('latest')['baseFeePerGas'] + w3.to_wei(0.01, 'gwei'),
-            'maxPriorityFeePerGas': w3.to_wei(0.01, 'gwei')
+        tx = await fn.build_transaction({
+            'from': account, 'gas': GAS.limit(route, DEFAULT_GAS), 'nonce': nonce, 'chainId': 8453,
+            'maxFeePerGas': block['baseFeePerGas'] + PRIORITY_FEE,
+            'maxPriorityFeePerGas': PRIORITY_FEE
         })
-        signed = w3.eth.account.sign_transaction(tx, priv_key)
-        tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+        signed = aw3.eth.account.sign_transaction(tx, priv_key)
+        tx_hash = await aw3.eth.send_raw_transaction(signed.raw_transaction)
+        asyncio.create_task(track_receipt(route, tx_hash))
         success_msg = f"💰 <b>SUCCESS! {name} TRADE FIRED</b>\nHash: <code>{tx_hash.hex()}</code>"
         print(success_msg.replace("<b>","").replace("</b>","").replace("<code>","").replace("</code>",""), flush=True)
         await send_tg(success_msg)
@@ -224,21 +307,89 @@ async def execute_flash(name, data, mode, spread):
         print(err_msg.replace("<b>","").replace("</b>",""), flush=True)
         return False
 
-async def check_token(name, data):
-    p1 = get_v3_price(data['aero_pool'], data.get('aero_is_token0', False)) if data['aero_type_val'] >= 1 else get_v2_price(data['aero_pool'], data.get('aero_is_token0', False))
-    p2 = get_v3_price(data['uni_pool'], data.get('uni_is_token0', False))
+def simulate_round_trip(data, mode, amount_in):
+    """WETH back from buying on one leg and selling on the other, all in process; None if a leg can't be modelled."""
+    buy, sell = ('aero', 'uni') if mode == 1 else ('uni', 'aero')
+    got = amount_in
+    for leg, weth_in in ((buy, True), (sell, False)):
+        leg_quote = AERO.quote if leg == 'aero' and data['aero_type_val'] < 1 else quote
+        # WETH is token0 exactly when the target is not
+        got = leg_quote(ENGINE, data[f'{leg}_pool'], weth_in != data.get(f'{leg}_is_token0', False), got)
+        if got is None: return None
+    return got
+
+def route_spread(name, data, snap):
+    """Signed spread in ppm, or None while either leg has no price."""
+    p1 = get_v3_price(snap, data['aero_pool'], data.get('aero_is_token0', False)) if data['aero_type_val'] >= 1 else get_v2_price(snap, data['aero_pool'], data.get('aero_is_token0', False))
+    p2 = get_v3_price(snap, data['uni_pool'], data.get('uni_is_token0', False))
     
-    if p1 == 0 or p2 == 0: return
+    if p1 == 0 or p2 == 0: return None
+    spread = spread_ppm(p1, p2)
+    print(f"📊 {name:10} | Aero: {to_float(p1):.10g} | Uni: {to_float(p2):.10g} | Spread: {spread / 10_000:+.2f}%", end="\r")
+    return spread
+
+def route_margin(name, data, snap):
+    """ROUTES score: ppm by which the spread clears the target's threshold (negative below it)."""
+    spread = route_spread(name, data, snap)
+    # Integer ppm against an integer threshold: no float rounding at the trigger
+    return None if spread is None else abs(spread) - pct_to_ppm(data['threshold'])
+
+async def check_token(name, data, snap):
+    if time.time() < COOLDOWN_UNTIL.get(name, 0): return
+    spread = route_spread(name, data, snap)
+    if spread is None or abs(spread) < pct_to_ppm(data['threshold']): return
     
-    spread = (p2 - p1) / p1 * 100
-    print(f"📊 {name:10} | Aero: {p1:.10f} | Uni: {p2:.10f} | Spread: {spread:+.2f}%", end="\r")
+    # Size the loan on the local pool models: the amount maximising profit net of
+    # gas, or nothing at all when price impact and gas eat the mid-price spread
+    mode = 1 if spread > 0 else 2
+    amount_wei, expected = None, None
+    cost = await gas_cost(data, mode)
+    if cost is None:
+        # Never fire blind on gas
+        print(f"⛽ {name:10} | Spread {spread / 10_000:+.2f}% skipped: gas price unknown", end="\r")
+        return
+    if simulate_round_trip(data, mode, 10**15) is not None:
+        cap = int(data.get('max_loan_eth', MAX_LOAN_ETH) * 10**18)
+        plan = best_size(lambda x: simulate_round_trip(data, mode, x), cap, fixed_cost=cost)
+        if plan is None:
+            print(f"🧮 {name:10} | Spread {spread / 10_000:+.2f}% gone after impact and gas ({cost / 10**18:.6f} ETH) at every size", end="\r")
+            return
+        amount_wei, expected = plan['amount'], plan['profit']
+    elif int(data['loan_eth'] * 10**18) * abs(spread) // 1_000_000 <= cost:
+        # No local model: the fixed loan's mid-price edge (an upper bound) must at least beat gas
+        print(f"🧮 {name:10} | Spread {spread / 10_000:+.2f}% on {data['loan_eth']} ETH doesn't cover gas ({cost / 10**18:.6f} ETH)", end="\r")
+        return
     
-    if spread >= data['threshold']:
-        await execute_flash(name, data, 1, spread)
-        await asyncio.sleep(5)
-    elif spread <= -data['threshold'] :
-        await execute_flash(name, data, 2, abs(spread))
-        await asyncio.sleep(5)
+    # A fired trade must not be cut off when the next block cancels this pass
+    COOLDOWN_UNTIL[name] = time.time() + TRADE_COOLDOWN
+    await asyncio.shield(execute_flash(name, data, mode, abs(spread) / 10_000, amount_wei, expected))
+
+async def evaluate_block(block):
+    CACHE.advance(block)
+    # Pools are seeded once; after that each block is a single eth_getLogs
+    # (Sync / Swap / Mint / Burn) applied to in-memory state
+    # A gap past MAX_LOG_RANGE (e.g. after an outage) goes through sync_async, which re-seeds
+    if HEDGE_READS and ENGINE.block and not ENGINE.unseeded() and not ENGINE.needs_reseed(block):
+        update = await hedged_reader.read(block)
+        if not update: return
+        changed = ENGINE.apply_update(update)
+    else:
+        changed = await ENGINE.sync_async(aw3, block)
+    if missing_books(ENGINE) or AERO.missing(AERO_V2_POOLS):
+        # Tick books load per pool, again after a re-seed or once the price drifts a word
+        # from the centre of the loaded range; Mint / Burn keep them current in between.
+        # Aerodrome V2 metadata loads once, fees are refreshed every FEE_TTL.
+        try:
+            for loaded in await asyncio.gather(load_books_async(aw3, ENGINE), AERO.load_async(aw3, AERO_V2_POOLS)):
+                changed |= loaded
+        except Exception: pass
+    snap = ENGINE.snapshot()
+    # Only targets with a pool that moved are re-scored; the queue keeps everyone else's last score
+    for name in ROUTES.affected(changed):
+        ROUTES.score(name, route_margin(name, TARGETS[name], snap))
+    # Best margin first; targets still over threshold are re-checked each block so a cooldown can lapse
+    tasks = [check_token(name, TARGETS[name], snap) for name, _ in ROUTES.top(min_score=0)]
+    await asyncio.gather(*tasks)
 
 async def main():
     start_msg = "🚀 <b>SPEED-DEMON v6.7 ONLINE</b>\nBot reset successful. Monitoring Base.\nTry <code>/status</code> to confirm targets."
@@ -248,10 +399,8 @@ async def main():
     # Start TG listener in background
     asyncio.create_task(handle_tg_commands())
     
-    while True:
-        tasks = [check_token(name, data) for name, data in TARGETS.items()]
-        await asyncio.gather(*tasks)
-        await asyncio.sleep(0.01)
+    # One pass per new block (newHeads, HTTP poll fallback) instead of a 10 ms busy-poll
+    await BlockScheduler(aw3, WS_URL).run(evaluate_block)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,8 +1,13 @@
 from web3 import Web3
-import json
 import time
 import os
 from dotenv import load_dotenv
+from pair_scan import read_pair_prices
+from pool_state import PoolStateEngine
+from rpc_pool import get_pool
+from rpc_router import is_rate_limit
+from meta_index import get_index
+from pool_registry import get_registry
 
 load_dotenv()
 BOT_ADDRESS = os.getenv("BOT_ADDRESS")
@@ -15,25 +20,12 @@ RPC_URLS = [
     "https://1rpc.io/base",
     "https://base.meowrpc.com"
 ]
-rpc_index = 0
+POOL = get_pool(RPC_URLS, request_kwargs={'timeout': 8})
 
 def get_w3():
-    global rpc_index
-    for _ in range(len(RPC_URLS)):
-        url = RPC_URLS[rpc_index]
-        rpc_index = (rpc_index + 1) % len(RPC_URLS)
-        try:
-            w3 = Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': 8}))
-            if w3.is_connected():
-                return w3
-        except:
-            continue
-    return None
+    return POOL.get_w3()
 
 # ───────────────────────── CONTRACTS ─────────────────────────
-AERO_FACTORY = Web3.to_checksum_address("0x420DD381b31aEf6683db6B902084cB0FFECe40Da")
-UNI_V3_FACTORY = Web3.to_checksum_address("0x33128a8fC17869897dcE68Ed026d694621f6FDfD")
-
 TOKENS = {
     "WETH":    Web3.to_checksum_address("0x4200000000000000000000000000000000000006"),
     "USDC":    Web3.to_checksum_address("0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"),
@@ -51,103 +43,20 @@ PAIRS = [
     ("DEGEN",   "WETH"),
 ]
 
-# ───────────────────────── ABIs ─────────────────────────
-FACTORY_ABI    = json.loads('[{"inputs":[{"name":"tokenA","type":"address"},{"name":"tokenB","type":"address"},{"name":"stable","type":"bool"}],"name":"getPool","outputs":[{"name":"","type":"address"}],"type":"function"}]')
-V3_FACTORY_ABI = json.loads('[{"inputs":[{"name":"tokenA","type":"address"},{"name":"tokenB","type":"address"},{"name":"fee","type":"uint24"}],"name":"getPool","outputs":[{"name":"","type":"address"}],"type":"function"}]')
-RESERVES_ABI   = json.loads('[{"inputs":[],"name":"getReserves","outputs":[{"name":"","type":"uint112"},{"name":"","type":"uint112"},{"name":"","type":"uint32"}],"type":"function"},{"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"type":"function"}]')
-V3_POOL_ABI    = json.loads('[{"inputs":[],"name":"slot0","outputs":[{"name":"sqrtPriceX96","type":"uint160"},{"name":"tick","type":"int24"},{"name":"","type":"uint16"},{"name":"","type":"uint16"},{"name":"","type":"uint16"},{"name":"","type":"uint8"},{"name":"","type":"bool"}],"type":"function"},{"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"type":"function"}]')
-ERC20_ABI      = json.loads('[{"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"type":"function"}]')
-
 # ───────────────────────── CACHING ─────────────────────────
-DECIMAL_CACHE = {}
-POOL_CACHE = {}  # (dex, tokenA, tokenB) -> pool_address
-
-def get_decimals(addr, w3):
-    if addr not in DECIMAL_CACHE:
-        DECIMAL_CACHE[addr] = w3.eth.contract(address=addr, abi=ERC20_ABI).functions.decimals().call()
-    return DECIMAL_CACHE[addr]
-
-# ───────────────────────── AERODROME PRICE ─────────────────────────
-def get_aero_price(token_a, token_b, w3):
-    """Returns the price of token_a denominated in token_b on Aerodrome."""
-    try:
-        cache_key = ("aero", token_a, token_b)
-        if cache_key in POOL_CACHE:
-            pool_addr = POOL_CACHE[cache_key]
-        else:
-            factory = w3.eth.contract(address=AERO_FACTORY, abi=FACTORY_ABI)
-            pool_addr = factory.functions.getPool(token_a, token_b, False).call()
-            if pool_addr == "0x0000000000000000000000000000000000000000":
-                return None
-            POOL_CACHE[cache_key] = pool_addr
-
-        pool = w3.eth.contract(address=pool_addr, abi=RESERVES_ABI)
-        res = pool.functions.getReserves().call()
-        pool_token0 = pool.functions.token0().call()
-
-        dec_a = get_decimals(token_a, w3)
-        dec_b = get_decimals(token_b, w3)
-
-        # Figure out which reserve belongs to which token
-        if pool_token0.lower() == token_a.lower():
-            reserve_a, reserve_b = res[0], res[1]
-        else:
-            reserve_a, reserve_b = res[1], res[0]
-
-        # Price = how much token_b you get per 1 token_a
-        if reserve_a == 0:
-            return None
-        price = (reserve_b / 10**dec_b) / (reserve_a / 10**dec_a)
-        # Sanity: reject impossible prices
-        if price <= 0 or price > 1e12:
-            return None
-        return price
-    except:
+# Persisted across restarts (meta_index.db): a warm start makes no metadata RPCs
+INDEX = get_index()
+DECIMAL_CACHE = INDEX.decimals_view()
+POOL_CACHE = INDEX.pool_cache_view()  # (dex, tokenA, tokenB) -> pool_address, ("token0", pool) -> token0
+ENGINE = PoolStateEngine()  # reserves / slot0 kept current from Sync & Swap logs
+REGISTRY = get_registry().follow(POOL.get_w3)  # every Base pool from factory events; no getPool once caught up
+UNI_FEES = [500, 3000, 10000, 100]
+
+def sane_price(price):
+    # Sanity: reject impossible prices
+    if price is None or price <= 0 or price > 1e12:
         return None
-
-# ───────────────────────── UNISWAP V3 PRICE ─────────────────────────
-def get_uni_price(token_a, token_b, w3):
-    """Returns the price of token_a denominated in token_b on Uniswap V3."""
-    for fee in [500, 3000, 10000, 100]:
-        try:
-            cache_key = ("uni", token_a, token_b, fee)
-            if cache_key in POOL_CACHE:
-                pool_addr = POOL_CACHE[cache_key]
-            else:
-                factory = w3.eth.contract(address=UNI_V3_FACTORY, abi=V3_FACTORY_ABI)
-                pool_addr = factory.functions.getPool(token_a, token_b, fee).call()
-                if pool_addr == "0x0000000000000000000000000000000000000000":
-                    continue
-                POOL_CACHE[cache_key] = pool_addr
-
-            pool = w3.eth.contract(address=pool_addr, abi=V3_POOL_ABI)
-            slot0 = pool.functions.slot0().call()
-            sqrtPriceX96 = slot0[0]
-            if sqrtPriceX96 == 0:
-                continue
-
-            pool_token0 = pool.functions.token0().call()
-            dec_a = get_decimals(token_a, w3)
-            dec_b = get_decimals(token_b, w3)
-
-            # sqrtPriceX96 gives price of token1 in terms of token0
-            # price_raw = (token1 / token0) in raw units
-            price_raw = (sqrtPriceX96 / (2**96)) ** 2
-
-            if pool_token0.lower() == token_a.lower():
-                # token0 = A, token1 = B → price_raw = B_raw / A_raw
-                price = price_raw * (10**dec_a) / (10**dec_b)
-            else:
-                # token0 = B, token1 = A → price_raw = A_raw / B_raw → invert
-                price = (1.0 / price_raw) * (10**dec_b) / (10**dec_a)
-
-            # Sanity: reject impossible prices
-            if price <= 0 or price > 1e12:
-                continue
-            return price
-        except:
-            continue
-    return None
+    return price
 
 # ───────────────────────── MAIN SCANNER ─────────────────────────
 def main():
@@ -168,11 +77,14 @@ def main():
                 time.sleep(5)
                 continue
 
-            for name_a, name_b in PAIRS:
-                addr_a, addr_b = TOKENS[name_a], TOKENS[name_b]
+            # Seeded once, then one eth_getLogs per pass instead of a request per read
+            pairs = [(TOKENS[a], TOKENS[b]) for a, b in PAIRS]
+            url = w3.provider.endpoint_uri
+            prices = read_pair_prices(url, pairs, UNI_FEES, DECIMAL_CACHE, POOL_CACHE, session=POOL.session(url), engine=ENGINE, w3=w3, limiter=POOL.limiter(url), registry=REGISTRY)
 
-                aero = get_aero_price(addr_a, addr_b, w3)
-                uni  = get_uni_price(addr_a, addr_b, w3)
+            for (name_a, name_b), pair in zip(PAIRS, pairs):
+                aero = sane_price(prices[pair]['aero'])
+                uni  = next((p for _, p in prices[pair]['uni'] if sane_price(p)), None)
 
                 if aero and uni and aero > 0 and uni > 0:
                     p_gap = (abs(aero - uni) / min(aero, uni)) * 100
@@ -192,6 +104,10 @@ def main():
             time.sleep(8)
 
         except Exception as e:
+            if is_rate_limit(e):
+                # The limiter already backed off; no need to stall the loop
+                print(f"Throttled: {e}")
+                continue
             print(f"Error: {e}")
             time.sleep(5)
 
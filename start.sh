@@ -1 +1,3 @@
-python3 mev_bot/vvv_flash_orb.py
+python3 mev_bot/rpc_gateway.py &
+python3 mev_bot/rpc_gateway.py --wait || exit 1
+MEV_RPC_URLS=http://127.0.0.1:${MEV_GATEWAY_PORT:-8547} python3 mev_bot/vvv_flash_orb.py